@@ -0,0 +1,300 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from csvReader import TENORS, YieldStore, get_yield_store
+from models.buttefly import ButterflyScanner
+from models.cubicSpline import CubicSplineAnalyzer
+from models.fitCache import FitCache
+from models.nelsonSiegelModel import NelsonSiegelModel
+from models.spreadMatrix import SpreadMatrix
+from models.spreadMeanCalculator import MeanReversionCalculator
+from models.syntheticCurves import SyntheticCurveGenerator
+
+BASELINE_PATH = 'benchmark_baseline.json'
+
+# Synthetic data sets: the bundled history's length, 50 years of daily closes, and a month of 5-minute snapshots
+SCALES = {
+    'history': {'days': 636, 'snapshots_per_day': 1},
+    'production': {'days': 12600, 'snapshots_per_day': 1},
+    'intraday': {'days': 21, 'snapshots_per_day': 78},
+}
+
+MATURITIES = [1/12, 2/12, 3/12, 4/12, 6/12, 1, 2, 3, 5, 7, 10, 20, 30]
+
+
+def benchmark_jacobian():
+    """
+    Fit every day of the history with warm-started L-BFGS-B, once with finite-difference
+    gradients and once with the analytic gradient, and report nfev/time for both.
+
+    :return: A dict of {label: (seconds, total nfev, total iterations, mean error)}.
+    """
+    yields = get_yield_store().yields
+    results = {}
+
+    for label, use_jacobian in (('finite differences', False), ('analytic jacobian', True)):
+        model = NelsonSiegelModel(yields[0])
+        nfev = nit = 0
+        errors = np.zeros(len(yields))
+
+        start = time.perf_counter()
+        for day_index, daily_yields in enumerate(yields):
+            # Reuse the model so fitted_params carries the warm start from the previous day
+            model.observed_yields = daily_yields
+            result = model.fit_nelson_siegel_svensson(use_jacobian=use_jacobian)
+            nfev += result.nfev
+            nit += result.nit
+            errors[day_index] = result.fun
+        elapsed = time.perf_counter() - start
+
+        results[label] = (elapsed, nfev, nit, errors.mean())
+
+    return results
+
+
+def _fit_chain(yields, use_warm_start):
+    model = NelsonSiegelModel(yields[0])
+    nfev = nit = 0
+    for daily_yields in yields:
+        model.observed_yields = daily_yields
+        result = model.fit_nelson_siegel_svensson(use_warm_start=use_warm_start)
+        nfev += result.nfev
+        nit += result.nit
+    return {'nfev': int(nfev), 'iterations': int(nit)}
+
+
+def bench_nss_fit_cold(dates, yields):
+    return _fit_chain(yields, use_warm_start=False)
+
+
+def bench_nss_fit_warm(dates, yields):
+    return _fit_chain(yields, use_warm_start=True)
+
+
+def bench_nss_objective(dates, yields):
+    # Per-call cost of the fused single-day objective and gradient (Numba kernels when installed)
+    model = NelsonSiegelModel(yields[0])
+    params = np.array([4.5, -1.5, -4.0, 3.0, 0.8, 0.15])
+    for daily_yields in yields:
+        model.observed_yields = daily_yields
+        for _ in range(10):
+            model.nelson_siegel_svensson_error_and_gradient(params)
+    return {'calls': 10 * len(yields)}
+
+
+def bench_nss_separable(dates, yields):
+    NelsonSiegelModel(yields[0]).fit_nelson_siegel_svensson_separable(yields)
+    return {}
+
+
+def bench_nss_controller(dates, yields):
+    from controller.nelsonSiegelController import NelsonSiegelController
+    controller = NelsonSiegelController()
+    controller.store = YieldStore(dates, yields, TENORS)
+    table = controller.run_batch(workers=1, use_cache=False)
+    return {'iterations': int(table['Iterations'].sum())}
+
+
+def bench_butterfly_run(dates, yields):
+    from controller.butterflySpreadController import ButterflyController
+    from view.butterflyView import ButterflyView
+    from view.reportRenderer import ReportRenderer
+
+    with tempfile.TemporaryDirectory() as output, ReportRenderer(output, fmt='png') as renderer:
+        controller = ButterflyController(renderer)
+        controller.df2, controller.df5, controller.df10 = (yields[:, TENORS.index(tenor)] for tenor in ('2 Yr', '5 Yr', '10 Yr'))
+        controller.dates = dates
+        controller.full_curve_data = yields
+        controller.full_curve_dates = dates
+        controller.view = ButterflyView(controller.df2, controller.df5, controller.df10, renderer)
+        controller.fit_cache = FitCache(os.path.join(output, 'fits.npz'))
+        controller.run()
+    return {}
+
+
+def bench_cubic_spline(dates, yields):
+    analyzer = CubicSplineAnalyzer(None)
+    for daily_yields in yields:
+        analyzer.calculate_spline(daily_yields)
+    return {}
+
+
+def bench_cubic_spline_surface(dates, yields):
+    CubicSplineAnalyzer(None).evaluate_surface(np.linspace(1 / 12, 30, 100), yields=yields)
+    return {}
+
+
+def bench_spread_statistics(dates, yields):
+    calculator = MeanReversionCalculator()
+    two_year, five_year = yields[:, TENORS.index('2 Yr')], yields[:, TENORS.index('5 Yr')]
+    summary = calculator.spread_summary(two_year, five_year)
+    calculator.rolling_statistics(summary['spreads'])
+
+    SpreadMatrix(yields, TENORS).rolling_statistics()
+    ButterflyScanner(yields, TENORS, MATURITIES).rank()
+    return {}
+
+
+BENCHMARKS = {
+    'nss_fit_cold': bench_nss_fit_cold,
+    'nss_fit_warm': bench_nss_fit_warm,
+    'nss_objective': bench_nss_objective,
+    'nss_separable': bench_nss_separable,
+    'nss_controller_batch': bench_nss_controller,
+    'butterfly_run': bench_butterfly_run,
+    'cubic_spline': bench_cubic_spline,
+    'cubic_spline_surface': bench_cubic_spline_surface,
+    'spread_statistics': bench_spread_statistics,
+}
+
+# Benchmarks that run one optimizer per curve, limited by --fit-days at large scales
+FIT_BENCHMARKS = {'nss_fit_cold', 'nss_fit_warm', 'nss_controller_batch', 'butterfly_run'}
+
+
+def measure(benchmark, dates, yields, repeat=1):
+    """
+    Run one benchmark: best wall time over `repeat` runs, then one more run under tracemalloc for the peak memory.
+
+    :return: dict with 'seconds', 'peak_memory_mb', 'curves' and the benchmark's own counters (nfev, iterations).
+    """
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            counters = benchmark(dates, yields)
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            benchmark(dates, yields)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {'seconds': min(timings), 'peak_memory_mb': peak / 2**20, 'curves': len(yields), **counters}
+
+
+def run_suite(scale='history', names=None, fit_days=None, repeat=1, seed=0):
+    """
+    Generate a synthetic data set and run the selected benchmarks on it.
+
+    :param scale: Key of SCALES.
+    :param names: Benchmarks to run, defaults to all of BENCHMARKS.
+    :param fit_days: Limit the per-curve optimizer benchmarks to the last fit_days curves.
+    :param repeat: Timed runs per benchmark (the best is kept).
+    :param seed: Seed of the synthetic curve generator.
+    :return: dict {benchmark name: record}.
+    """
+    dates, yields, _ = SyntheticCurveGenerator(seed).generate(**SCALES[scale])
+    results = {}
+    for name in names or BENCHMARKS:
+        if name in FIT_BENCHMARKS and fit_days:
+            results[name] = measure(BENCHMARKS[name], dates[-fit_days:], yields[-fit_days:], repeat)
+        else:
+            results[name] = measure(BENCHMARKS[name], dates, yields, repeat)
+    return results
+
+
+def load_baselines(path=BASELINE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_baselines(scale, results, path=BASELINE_PATH):
+    """
+    Store the results as the baseline of a scale, keeping the other scales' baselines.
+    """
+    baselines = load_baselines(path)
+    baselines[scale] = results
+    with open(path + '.tmp', 'w') as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Find the metrics that got worse than the baseline by more than `tolerance`.
+
+    Runs with a different number of curves are not comparable and are skipped.
+
+    :return: List of (benchmark, metric, baseline value, new value).
+    """
+    regressions = []
+    for name, record in results.items():
+        previous = baseline.get(name)
+        if previous is None or previous.get('curves') != record['curves']:
+            continue
+        for metric in ('seconds', 'peak_memory_mb', 'nfev', 'iterations'):
+            if metric in record and metric in previous and record[metric] > previous[metric] * (1 + tolerance):
+                regressions.append((name, metric, previous[metric], record[metric]))
+    return regressions
+
+
+def print_results(scale, results, baseline=None):
+    print(f"Benchmarks at '{scale}' scale")
+    for name, record in results.items():
+        line = f"{name:>22}: {record['seconds']:8.3f}s, peak {record['peak_memory_mb']:8.1f} MB, curves={record['curves']}"
+        for metric in ('nfev', 'iterations'):
+            if metric in record:
+                line += f", {metric}={record[metric]}"
+        previous = (baseline or {}).get(name)
+        if previous and previous.get('curves') == record['curves'] and previous['seconds'] > 0:
+            line += f"  ({record['seconds'] / previous['seconds']:.2f}x baseline)"
+        print(line)
+
+    if 'nss_objective' in results:
+        objective = results['nss_objective']
+        backend = 'numba' if NelsonSiegelModel.use_jit else 'numpy'
+        print(f"NSS objective and gradient: {objective['seconds'] / objective['calls'] * 1e6:.1f} µs per call ({backend})")
+
+    if 'nss_fit_cold' in results and 'nss_fit_warm' in results and results['nss_fit_cold']['curves'] == results['nss_fit_warm']['curves']:
+        cold, warm = results['nss_fit_cold'], results['nss_fit_warm']
+        print(f"Warm-start savings: {1 - warm['seconds'] / cold['seconds']:.0%} time, "
+              f"{1 - warm['nfev'] / cold['nfev']:.0%} function evaluations")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the curve fitting and spread analytics on synthetic data.")
+    parser.add_argument('--scale', choices=list(SCALES), default='history')
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="Run only these benchmarks.")
+    parser.add_argument('--fit-days', type=int, help="Limit the per-curve optimizer benchmarks to this many curves.")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--save-baseline', action='store_true', help=f"Store the results in {BASELINE_PATH}.")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown against the baseline.")
+    parser.add_argument('--jacobian', action='store_true', help="Compare finite-difference and analytic gradients on the bundled data.")
+    args = parser.parse_args(argv)
+
+    if args.jacobian:
+        print(f"NSS fit over the full history ({len(get_yield_store())} days)")
+        for label, (elapsed, nfev, nit, mean_error) in benchmark_jacobian().items():
+            print(f"{label:>20}: {elapsed:7.3f}s, nfev={nfev}, iterations={nit}, mean error={mean_error:.5f}")
+        return 0
+
+    results = run_suite(args.scale, args.only, args.fit_days, args.repeat)
+    baseline = load_baselines().get(args.scale, {})
+    print_results(args.scale, results, baseline)
+
+    regressions = compare(results, baseline, args.tolerance)
+    for name, metric, previous, current in regressions:
+        print(f"REGRESSION {name}.{metric}: {previous:.4g} -> {current:.4g}")
+
+    if args.save_baseline:
+        save_baselines(args.scale, results)
+        print(f"Baseline for '{args.scale}' saved to {BASELINE_PATH}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
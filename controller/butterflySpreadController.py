@@ -1,12 +1,13 @@
+import time
+
 import numpy as np
-import pandas as pd
 
-from models.buttefly import Butterfly
-from csvReader import get_five_year_yields_from_last_3_months, get_ten_year_yields_from_last_3_months, get_two_year_yields_from_last_3_months
+from instrumentation import Instrumentation
+from models.buttefly import Butterfly, ButterflyScanner
 from models.nelsonSiegelModel import NelsonSiegelModel
-from controller.nelsonSiegelController import NelsonSiegelController
+from models.fitCache import FitCache
 from view.butterflyView import ButterflyView
-from csvReader import load_my_data
+from csvReader import TENORS, get_yield_store
 
 
 class ButterflyController:
@@ -14,24 +15,27 @@ class ButterflyController:
     Controller for managing the butterfly spread between yields.
     """
 
-    def __init__(self):
+    def __init__(self, renderer=None, instrumentation=None):
+        # Per-fit records and stage timings go to the instrumentation's sinks
+        self.instrumentation = instrumentation or Instrumentation()
         self.maturities = [1/12, 2/12, 3/12, 6/12, 1, 2, 3, 5, 7, 10, 20, 30]  # Maturities in years
+        self.tenor_maturities = [1/12, 2/12, 3/12, 4/12, 6/12, 1, 2, 3, 5, 7, 10, 20, 30]  # One per TENORS column
         self.butterfly = Butterfly(self.maturities)
-        # Load the last 3 months of yields for 2, 5, and 10 years
-        self.df2 = get_two_year_yields_from_last_3_months()
-        self.df5 = get_five_year_yields_from_last_3_months()
-        self.df10 = get_ten_year_yields_from_last_3_months()
-        
-        # Get dates for indexing (load once)
-        self.df = load_my_data()
-        last_3_months = self.df[self.df['Date'] >= (self.df['Date'].max() - pd.DateOffset(months=3))]
-        self.dates = last_3_months['Date'].values
-        
-        self.view = ButterflyView(self.df2, self.df5, self.df10)
+        with self.instrumentation.stage('load'):
+            # One window of the last 3 months: the 2, 5 and 10 year yields, the dates and the
+            # full curves fitted by NSS are all views on the same rows, so day i is the same day in each
+            window = get_yield_store().last('3M')
+            self.df2 = window.column('2 Yr')
+            self.df5 = window.column('5 Yr')
+            self.df10 = window.column('10 Yr')
+            self.dates = window.dates
+            self.full_curve_data = window.yields
+            self.full_curve_dates = window.dates
         
-        # Initialize Nelson-Siegel controller to get full curve data
-        self.nss_controller = NelsonSiegelController()
-        self.full_curve_data = self.nss_controller.extract_yields()  # Full yield curve data
+        self.view = ButterflyView(self.df2, self.df5, self.df10, renderer)
+
+        # Daily NSS fits are reused across runs; only new or changed days are refitted
+        self.fit_cache = FitCache()
 
     def run(self):
         print("=== EFFICIENT BUTTERFLY SPREAD ANALYSIS ===")
@@ -41,8 +45,9 @@ class ButterflyController:
         print("- Mean Reversion: R² < 0.10 (mean-reverting), R² > 0.50 (trending)")
         print()
         
-        # Use the full curve data from NSS controller
-        num_days = min(len(self.df2), len(self.full_curve_data))
+        num_days = len(self.full_curve_data)
+        if not len(self.df2) == len(self.df5) == len(self.df10) == len(self.dates) == len(self.full_curve_dates) == num_days:
+            raise ValueError("Butterfly yields, dates and curves must cover the same days.")
         
         # Pre-allocate arrays for batch processing (MAJOR EFFICIENCY GAIN)
         butterfly_spreads_market = np.zeros(num_days)
@@ -51,56 +56,78 @@ class ButterflyController:
         twos_tens_spreads = np.zeros(num_days)
         five_year_levels = np.zeros(num_days)
         
-        # Create single NSS model for parameter initialization (EFFICIENCY GAIN)
-        print("Initializing NSS model...")
-        template_nss_model = NelsonSiegelModel([self.full_curve_data[0]])
-        template_nss_model.fit_nelson_siegel_svensson()
-        initial_params = template_nss_model.fitted_params
-        print(f"Template NSS parameters: {initial_params}")
+        # Template NSS parameters are only needed if some day is not in the fit cache
+        initial_params = None
+        solver_settings = {'method': 'L-BFGS-B', 'max_iter': 1000, 'warm_start': 'first day'}
         
         # Batch process all days with individual fitting
-        for i in range(num_days):
-            # Get market yields for butterfly calculation
-            m_y2 = self.df2[i]
-            m_y5 = self.df5[i]
-            m_y10 = self.df10[i]
+        with self.instrumentation.stage('fit'):
+            for i in range(num_days):
+                # Get market yields for butterfly calculation
+                m_y2 = self.df2[i]
+                m_y5 = self.df5[i]
+                m_y10 = self.df10[i]
 
-            # Calculate the butterfly spread using market yields
-            butterfly_spreads_market[i] = self.butterfly.calculate_butterfly_spread(m_y2, m_y5, m_y10)
+                # Calculate the butterfly spread using market yields
+                butterfly_spreads_market[i] = self.butterfly.calculate_butterfly_spread(m_y2, m_y5, m_y10)
 
-            # Get the full yield curve for this day from NSS controller
-            daily_full_curve = self.full_curve_data[i]
+                # Get the full yield curve for this day from NSS controller
+                daily_full_curve = self.full_curve_data[i]
             
-            # Fit NSS model to THIS specific day (maintains accuracy)
-            daily_nss_model = NelsonSiegelModel([daily_full_curve])
-            daily_nss_model.fitted_params = initial_params  # Warm start for efficiency
-            daily_nss_model.fit_nelson_siegel_svensson()
+                daily_nss_model = NelsonSiegelModel([daily_full_curve])
+                cache_key = FitCache.make_key(self.full_curve_dates[i], daily_full_curve, 'NSS',
+                                              daily_nss_model.nss_bounds, solver_settings)
+                cached_fit = self.fit_cache.get(cache_key)
+
+                if cached_fit is not None:
+                    daily_nss_model.fitted_params = cached_fit['params']
+                else:
+                    if initial_params is None:
+                        # Create single NSS model for parameter initialization (EFFICIENCY GAIN)
+                        print("Initializing NSS model...")
+                        template_nss_model = NelsonSiegelModel([self.full_curve_data[0]])
+                        template_nss_model.fit_nelson_siegel_svensson()
+                        initial_params = template_nss_model.fitted_params
+                        print(f"Template NSS parameters: {initial_params}")
+
+                    # Fit NSS model to THIS specific day (maintains accuracy)
+                    daily_nss_model.fitted_params = initial_params  # Warm start for efficiency
+                    fit_start = time.perf_counter()
+                    result = daily_nss_model.fit_nelson_siegel_svensson()
+                    self.instrumentation.record_fit(self.full_curve_dates[i], result, time.perf_counter() - fit_start)
             
-            # Get the fitted curve for this day
-            nss_curve = daily_nss_model.get_nelson_siegel_svensson_curve(daily_nss_model.fitted_params)
+                # Get the fitted curve for this day
+                nss_curve = daily_nss_model.get_nelson_siegel_svensson_curve(daily_nss_model.fitted_params)
             
-            # Calculate R² for this day's curve fit (now should be excellent!)
-            r_squared_values[i] = daily_nss_model.get_R_squared(daily_full_curve, nss_curve)
+                # Calculate R² for this day's curve fit (now should be excellent!)
+                r_squared_values[i] = daily_nss_model.get_R_squared(daily_full_curve, nss_curve)
+
+                if cached_fit is None:
+                    self.fit_cache.put(cache_key, result.x, r_squared_values[i], result.nit,
+                                       daily_nss_model.get_segment_errors(daily_full_curve, nss_curve))
             
-            # Extract yields for butterfly calculation from NSS fitted curve
-            nss_y2_yield = nss_curve[6]   # 2Y yield at index 6
-            nss_y5_yield = nss_curve[8]   # 5Y yield at index 8  
-            nss_y10_yield = nss_curve[10] # 10Y yield at index 10
+                # Extract yields for butterfly calculation from NSS fitted curve
+                nss_y2_yield = nss_curve[6]   # 2Y yield at index 6
+                nss_y5_yield = nss_curve[8]   # 5Y yield at index 8  
+                nss_y10_yield = nss_curve[10] # 10Y yield at index 10
             
-            # Calculate NSS butterfly spread
-            butterfly_spreads_nss[i] = self.butterfly.calculate_butterfly_spread(nss_y2_yield, nss_y5_yield, nss_y10_yield)
+                # Calculate NSS butterfly spread
+                butterfly_spreads_nss[i] = self.butterfly.calculate_butterfly_spread(nss_y2_yield, nss_y5_yield, nss_y10_yield)
             
-            # Store regression features for batch processing
-            twos_tens_spreads[i] = self.df2[i] - self.df10[i]
-            five_year_levels[i] = self.df5[i]
-            five_year_levels[i] = self.df5[i]
+                # Store regression features for batch processing
+                twos_tens_spreads[i] = self.df2[i] - self.df10[i]
+                five_year_levels[i] = self.df5[i]
+                five_year_levels[i] = self.df5[i]
+
+        self.fit_cache.save()
 
         # Batch regression hedging (SOLVES CIRCULAR DEPENDENCY + EFFICIENCY)
         print("Running batch multilinear regression hedging...")
         X = np.column_stack([twos_tens_spreads, five_year_levels])
         y = butterfly_spreads_nss
-        self.butterfly.multilinear_regression_hedging(X, y)
-        print(f"Regression coefficients: {self.butterfly.model.coef_}")
+        with self.instrumentation.stage('regress'):
+            self.butterfly.multilinear_regression_hedging(X, y)
+        print(f"Regression coefficients: {self.butterfly.regression['coef']}")
         print(f"Updated weights: {self.butterfly.weights}")
 
         #Mean reversion analysis for comparison
@@ -111,5 +138,65 @@ class ButterflyController:
         print(f"Standard Deviation of Reversion Spread: {std_reversion_spread:.4f}%({std_reversion_spread * 100:.1f} bps)")
     
 
-        self.view.plot_butterfly_spreads(butterfly_spreads_market, butterfly_spreads_nss, r_squared_values, self.dates)
-        self.view.plot_butterfly_z_scores(mean_reversion_spread, std_reversion_spread, butterfly_spreads_market - butterfly_spreads_nss)
+        with self.instrumentation.stage('render'):
+            self.view.plot_butterfly_spreads(butterfly_spreads_market, butterfly_spreads_nss, r_squared_values, self.dates)
+            self.view.plot_butterfly_z_scores(mean_reversion_spread, std_reversion_spread, butterfly_spreads_market - butterfly_spreads_nss)
+        self.instrumentation.flush()
+
+    def run_hedge_ratios(self, mode='rolling', window=60):
+        """
+        Daily hedge ratios of the NSS 2s5s10s butterfly against 2s10s and the 5Y level over the full history.
+
+        :param mode: 'rolling' for a trailing window of `window` days, or 'expanding' for all days so far.
+        :param window: Rolling window length in trading days (also used for the residual z-scores).
+        :return: dict with 'dates' and the daily 'coef', 'intercept', 'residuals' and 'z_scores'.
+        """
+        if mode not in ('rolling', 'expanding'):
+            raise ValueError(f"Unknown hedge ratio mode: {mode}")
+        store = get_yield_store()
+        yields = store.yields
+        two_year, five_year, ten_year = (yields[:, TENORS.index(tenor)] for tenor in ('2 Yr', '5 Yr', '10 Yr'))
+
+        # Every day's NSS curve from one separable fit of the whole history
+        nss_model = NelsonSiegelModel(yields[-1])
+        params, _ = nss_model.fit_nelson_siegel_svensson_separable(yields)
+        nss_curves = nss_model.get_nelson_siegel_svensson_curve(params)
+        butterfly_spreads_nss = self.butterfly.calculate_butterfly_spread(
+            nss_curves[:, TENORS.index('2 Yr')], nss_curves[:, TENORS.index('5 Yr')], nss_curves[:, TENORS.index('10 Yr')])
+
+        X = np.column_stack([two_year - ten_year, five_year])
+        result = self.butterfly.rolling_hedge_ratios(X, butterfly_spreads_nss, window if mode == 'rolling' else None,
+                                                     z_window=window)
+        result['dates'] = store.dates
+
+        print(f"{mode.capitalize()} hedge ratios on {str(store.dates[-1])[:10]}:")
+        print(f"2s10s beta: {result['coef'][-1, 0]:.4f}, 5Y beta: {result['coef'][-1, 1]:.4f}, "
+              f"intercept: {result['intercept'][-1]:.4f}")
+        print(f"Hedged residual: {result['residuals'][-1]*100:.1f} bps, z-score {result['z_scores'][-1]:.2f}")
+        return result
+
+    def run_scan(self, window=60, method='fixed', curve='market', top=10):
+        """
+        Scan every (wing, belly, wing) butterfly of the curve for rich and cheap bellies.
+
+        :param window: Window length in trading days for the z-scores.
+        :param method: 'fixed' (1:2:1), 'maturity', 'duration' or 'regression' weights.
+        :param curve: 'market' for the observed yields or 'nss' for grid-fitted NSS curves.
+        :param top: Number of butterflies to print.
+        :return: List of dicts with 'butterfly', 'spread', 'z_score' and 'belly', largest |z-score| first.
+        """
+        yields = get_yield_store().yields
+        if curve == 'nss':
+            # One separable fit of the whole history gives every day's NSS curve at once
+            nss_model = NelsonSiegelModel(yields[-1])
+            params, _ = nss_model.fit_nelson_siegel_svensson_separable(yields)
+            yields = nss_model.get_nelson_siegel_svensson_curve(params)
+
+        scanner = ButterflyScanner(yields, TENORS, self.tenor_maturities)
+        ranking = scanner.rank(window, method, top=top)
+
+        print(f"Butterfly scan ({curve} curve, {method} weights, {window}d z-score):")
+        for row in ranking:
+            print(f"{row['butterfly']:>20}: {row['spread']:.4f}% ({row['spread']*100:.1f} bps), "
+                  f"z-score {row['z_score']:.2f} ({row['belly']} belly)")
+        return ranking
@@ -1,32 +1,57 @@
-from csvReader import load_my_data
+from csvReader import YieldStore, get_yield_store
 from view.cubicSplineView import CubicSplineView
 from models.cubicSpline import CubicSplineAnalyzer
 import numpy as np
+import pandas as pd
 
 
 
 class CubicSplineController:
-    def __init__(self):
-        # Load the data
-        self.df = load_my_data()
-        self.view = CubicSplineView()
-        self.model = CubicSplineAnalyzer(self.df)
+    def __init__(self, renderer=None):
+        # Open the shared yield store; its arrays are used in place
+        self.store = get_yield_store()
+        self.view = CubicSplineView(renderer)
+        self.model = CubicSplineAnalyzer(self.store)
+
+    @property
+    def df(self):
+        """
+        DataFrame copy of the store (Date column followed by the tenors), built on demand.
+        """
+        return self.store.to_dataframe()
+
+    @df.setter
+    def df(self, df):
+        self.store = YieldStore.from_dataframe(df)
+        self.model = CubicSplineAnalyzer(self.store)
 
     def run(self):
         """
         Run the cubic spline analysis and display the results.
         """
-        # Extract maturities and yields from the DataFrame
+        # Maturities and yields, straight from the store
         maturities = self.model.maturities
-        yields = self.df.iloc[:, 1:].values  # Assuming the first column is the date
-
-        # Calculate the cubic spline for each day (limit to first few days for demonstration)
-        for i in range(min(3, len(yields))):  # Show first 3 days only
-            spline = self.model.calculate_spline(yields[i])
-            
-            # Create smooth curve with more points for plotting
-            smooth_maturities = np.linspace(maturities.min(), maturities.max(), 100)
-            smooth_yields = spline(smooth_maturities)
-            
+        yields = self.store.yields
+
+        # Evaluate the splines of the plotted days in one call (limit to first few days for demonstration)
+        days = min(3, len(yields))  # Show first 3 days only
+        smooth_maturities = np.linspace(maturities.min(), maturities.max(), 100)
+        smooth_curves = self.model.evaluate_surface(smooth_maturities, rows=np.arange(days))
+
+        for i in range(days):
             # Plot the results
-            self.view.plot_yield_curve(maturities, yields[i], smooth_maturities, smooth_yields, self.df.columns[i + 1])
+            self.view.plot_yield_curve(maturities, yields[i], smooth_maturities, smooth_curves[i], pd.Timestamp(self.store.dates[i]))
+
+    def run_surface(self, maturities=None, bc_type='natural'):
+        """
+        Interpolate every day of the history on a maturity grid without plotting.
+
+        The result is a regular (days x maturities) yield matrix, so it can be passed to
+        SpreadMatrix or ButterflyScanner to analyse non-benchmark tenors.
+
+        :param maturities: Maturities in years, defaults to yearly points from 1 to 30 years.
+        :param bc_type: Spline boundary condition.
+        :return: (maturities, surface) with surface of shape (days, len(maturities)).
+        """
+        maturities = np.arange(1.0, 31.0) if maturities is None else np.asarray(maturities, dtype=float)
+        return maturities, self.model.evaluate_surface(maturities, bc_type=bc_type)
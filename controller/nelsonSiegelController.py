@@ -1,123 +1,367 @@
-from csvReader import load_my_data
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from csvReader import YieldStore, get_yield_store
+from instrumentation import Instrumentation, fit_record
 
 from view.nelsonSiegelView import NSSView
+from view.reportRenderer import render_pages
 from models.nelsonSiegelModel import NelsonSiegelModel
+from models.fitCache import FitCache
+from models.fitScheduler import FitScheduler
+
+# Initial parameters for the Svensson model
+INITIAL_PARAMS = [4.5, -1.5, -4.0, 3.0, 0.8, 0.15]
+
+# Define reasonable bounds for NSS parameters
+BOUNDS = [
+    (1.0, 8.0),    # β0 (level): reasonable yield levels
+    (-6.0, 6.0),    # β1 (slope): reasonable slope range
+    (-8.0, 8.0),  # β2 (curvature): reasonable curvature
+    (-6.0, 6.0),  # β3 (second hump): reasonable hump size
+    (0.6, 2.0),     # λ0 (first decay): reasonable decay rate
+    (0.08, 0.25)     # λ1 (second decay): reasonable decay rate
+]
+
+# Error thresholds for efficiency
+GOOD_ERROR_THRESHOLD = 0.05  # Skip intensive optimization if error is below this
+ACCEPTABLE_ERROR_THRESHOLD = 0.15  # Use moderate optimization
+
+PARAM_COLUMNS = ['β0', 'β1', 'β2', 'β3', 'λ0', 'λ1']
+ERROR_COLUMNS = ['Short-term error', 'Mid-term error', 'Long-term error']
+
+# Multi-start search used for the days the local search leaves with a poor fit
+MULTISTART_SETTINGS = {
+    'starts': 64,
+    'grid_starts': 8,
+    'top_k': 4,
+    'max_iter': 200,
+    'time_budget': 0.5,  # seconds per day
+}
+
+# Escalation targets and budgets of the per-day fit scheduler
+SCHEDULER_SETTINGS = {
+    'good_error': GOOD_ERROR_THRESHOLD,
+    'acceptable_error': ACCEPTABLE_ERROR_THRESHOLD,
+    'r_squared_target': 0.90,
+    'gradient_tolerance': 1e-4,
+    'step_iterations': 50,
+    'max_iterations': 1000,
+    'day_budget': 1.0,  # seconds per day beyond the first step
+    'multistart': MULTISTART_SETTINGS,
+}
+
+# Everything besides the bounds that changes a fit, used to key the fit cache
+SOLVER_SETTINGS = {
+    'method': 'L-BFGS-B',
+    'scheduler': SCHEDULER_SETTINGS,
+}
+
+
+def fit_day(daily_yields, initial_params, bounds=BOUNDS, scheduler=None):
+    """
+    Fit one day, resuming the local search and escalating to a multi-start search only as the fit needs.
+
+    :param daily_yields: The 13 market yields for the day.
+    :param initial_params: Starting parameters (the previous day's fit for a warm start).
+    :param bounds: Parameter bounds for L-BFGS-B, used when no scheduler is given.
+    :param scheduler: FitScheduler shared by the days of a run, so its run budget covers all of them.
+    :return: (result, errors, tier) where errors are the [short, mid, long] errors of the final fit
+             and tier is the highest tier used. result['total_nfev'] and result['total_nit'] count every step.
+    """
+    scheduler = scheduler or FitScheduler(bounds, **SCHEDULER_SETTINGS)
+    return scheduler.fit(daily_yields, initial_params)
+
+
+def _fit_range(yields, start, stop, initial_params, bounds, time_budget=None):
+    """
+    Fit rows [start, stop) of a yield matrix as one warm-start chain.
+
+    :param time_budget: Seconds for the escalations of the whole range, or None.
+
+    :return: (start, params, iterations, tiers, exhausted, records) where exhausted flags the fits
+             the time budget cut short and records are the per-fit instrumentation records (without dates).
+    """
+    params = np.zeros((stop - start, 6))
+    iterations = np.zeros(stop - start, dtype=int)
+    exhausted = np.zeros(stop - start, dtype=bool)
+    tiers = []
+    records = []
+    warm_start = not np.array_equal(initial_params, INITIAL_PARAMS)
+    scheduler = FitScheduler(bounds, **dict(SCHEDULER_SETTINGS, run_budget=time_budget))
+    for row in range(start, stop):
+        fit_start = time.perf_counter()
+        result, _, tier = fit_day(yields[row], initial_params, bounds, scheduler)
+        records.append(fit_record(None, result, time.perf_counter() - fit_start, tier, warm_start))
+        initial_params = result.x
+        warm_start = True
+        params[row - start] = result.x
+        iterations[row - start] = result.total_nit
+        exhausted[row - start] = result.budget_exhausted
+        tiers.append(tier)
+    return start, params, iterations, tiers, exhausted, records
+
+
+def _fit_chunk(shm_name, shape, start, stop, initial_params, bounds, time_budget=None):
+    """
+    Worker: fit rows [start, stop) of the shared yield matrix as one warm-start chain.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        yields = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        fitted = _fit_range(yields, start, stop, initial_params, bounds, time_budget)
+        del yields
+    finally:
+        shm.close()
+    return fitted
+
+
+def _split_ranges(missing, params, chunks):
+    """
+    Turn the days that still need fitting into contiguous (start, stop, initial_params) ranges.
+
+    Each run of missing days warm-starts from the cached day before it. Runs are split further
+    so the work spreads over roughly `chunks` ranges; extra pieces start from INITIAL_PARAMS.
+    """
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], missing.astype(int), [0]])))
+    runs = list(zip(edges[::2], edges[1::2]))
+    total = int(missing.sum())
+
+    ranges = []
+    for start, stop in runs:
+        initial_params = params[start - 1] if start > 0 else INITIAL_PARAMS
+        pieces = max(1, round(chunks * (stop - start) / total))
+        cuts = np.linspace(start, stop, pieces + 1).astype(int)
+        for piece, (piece_start, piece_stop) in enumerate(zip(cuts[:-1], cuts[1:])):
+            if piece_stop > piece_start:
+                ranges.append((piece_start, piece_stop, initial_params if piece == 0 else INITIAL_PARAMS))
+    return ranges
+
 
 class NelsonSiegelController:
-    def __init__(self):
-        # Load the data
-        self.df = load_my_data()
-        self.view = NSSView()
+    def __init__(self, renderer=None, instrumentation=None):
+        # Per-fit records and stage timings go to the instrumentation's sinks
+        self.instrumentation = instrumentation or Instrumentation()
+        # Open the shared yield store; its arrays are used in place, so only the pages read are loaded
+        with self.instrumentation.stage('load'):
+            self.store = get_yield_store()
+        self.view = NSSView(renderer)
+        self.fit_cache = FitCache()
+
+    @property
+    def df(self):
+        """
+        DataFrame copy of the store (Date column followed by the tenors), built on demand.
+        """
+        return self.store.to_dataframe()
+
+    @df.setter
+    def df(self, df):
+        self.store = YieldStore.from_dataframe(df)
 
     def extract_yields(self):
-        # Assuming the first column is the date and the rest are yields
-        # each column represents a different tenure 1 Mo, 2 Mo, ..., 30 Yr
-        # We return the yields as a numpy array for further processing
-        if self.df.empty:
-            raise ValueError("DataFrame is empty. Please load data before extracting yields.")
-        return self.df.iloc[:, 1:].values
+        # Each column represents a different tenure 1 Mo, 2 Mo, ..., 30 Yr
+        # We return the store's yield matrix (read-only) for further processing
+        if len(self.store) == 0:
+            raise ValueError("The yield store is empty. Please load data before extracting yields.")
+        return self.store.yields
 
     # Run the model and display the results one day at a time with efficient error checking
-    def run_with_warm_start(self):
-        initial_params = [4.5, -1.5, -4.0, 3.0, 0.8, 0.15]  # Initial parameters for the Svensson model
-
-        # Define reasonable bounds for NSS parameters
-        bounds = [
-            (1.0, 8.0),    # β0 (level): reasonable yield levels
-            (-6.0, 6.0),    # β1 (slope): reasonable slope range  
-            (-8.0, 8.0),  # β2 (curvature): reasonable curvature
-            (-6.0, 6.0),  # β3 (second hump): reasonable hump size
-            (0.6, 2.0),     # λ0 (first decay): reasonable decay rate
-            (0.08, 0.25)     # λ1 (second decay): reasonable decay rate
-        ]
+    def run_with_warm_start(self, time_budget=None):
+        """
+        Fit, print and plot one day at a time, each day warm-started from the previous fit.
+
+        :param time_budget: Seconds for the escalations of the whole run, or None for no limit.
+                            Once it is spent, the remaining days only get their first local step.
+        """
+        initial_params = INITIAL_PARAMS
+        scheduler = FitScheduler(BOUNDS, **dict(SCHEDULER_SETTINGS, run_budget=time_budget))
 
         # Set the bounds for the Nelder-Mead optimization
         self.model = NelsonSiegelModel(self.extract_yields())
-        # Error thresholds for efficiency
-        GOOD_ERROR_THRESHOLD = 0.05  # Skip intensive optimization if error is below this
-        ACCEPTABLE_ERROR_THRESHOLD = 0.15  # Use moderate optimization
-        
+
         # Counters for efficiency tracking
         quick_optimizations = 0
-        moderate_optimizations = 0 
+        moderate_optimizations = 0
         intensive_optimizations = 0
 
         # Process each day's data
-        for day_index in range(len(self.df)):
-            # Extract yields for this specific day (excluding the date column)
-            daily_yields = self.df.iloc[day_index, 1:].values
-            current_date = self.df.iloc[day_index, 0]
-        
-            print(f"Processing day {day_index + 1}/{len(self.df)}: {current_date}")
-            
+        for day_index in range(len(self.store)):
+            # Extract yields for this specific day
+            daily_yields = self.store.yields[day_index]
+            current_date = pd.Timestamp(self.store.dates[day_index])
+
+            print(f"Processing day {day_index + 1}/{len(self.store)}: {current_date}")
+
             # Create model with this day's yields
             self.model = NelsonSiegelModel(daily_yields)
-            
-            # STEP 1: Quick optimization with current parameters (limited iterations)
-            result = self.model.nelder_mead_with_bounds(initial_params, self.model.nelson_siegel_svensson_error_function, bounds, max_iter=50)
-            
-            # Cal
-            nss_curve = self.model.get_nelson_siegel_svensson_curve(result.x)
-            
-            # NSS Model: Check SHORT-TERM error (1M-3Y, indices 0-7)
-            nss_short_term_residuals = daily_yields[:8] - nss_curve[:8]  # 1M through 3Y
-            nss_short_term_error = sum(nss_short_term_residuals ** 2)
-            
-            # NSS Model: Check MID-TERM error (5Y-10Y, indices 8-10)
-            nss_mid_term_residuals = daily_yields[8:11] - nss_curve[8:11]  # 5Y, 7Y, 10Y
-            nss_mid_term_error = sum(nss_mid_term_residuals ** 2)
-            
-            # NSS Model: Check LONG-TERM error (20Y-30Y, indices 11-12)
-            nss_long_term_residuals = daily_yields[11:] - nss_curve[11:]  # 20Y, 30Y
-            nss_long_term_error = sum(nss_long_term_residuals ** 2)
-            
-            print(f"NSS Short-term: {nss_short_term_error:.4f}, NSS Mid-term: {nss_mid_term_error:.4f}, NSS Long-term: {nss_long_term_error:.4f}")
-            
-            # STEP 2: Decide optimization level based on maturity-specific errors
-            # For NSS: Check all three regions (short, mid, long), for NS: check short-term
-            if (nss_short_term_error < GOOD_ERROR_THRESHOLD and 
-                nss_mid_term_error < GOOD_ERROR_THRESHOLD and 
-                nss_long_term_error < GOOD_ERROR_THRESHOLD):
+
+            with self.instrumentation.stage('fit'):
+                fit_start = time.perf_counter()
+                result, errors, tier = fit_day(daily_yields, initial_params, scheduler=scheduler)
+            self.instrumentation.record_fit(current_date, result, time.perf_counter() - fit_start, tier,
+                                            warm_start=day_index > 0)
+            nss_short_term_error, nss_mid_term_error, nss_long_term_error = errors
+
+            print(f"Iterations: {result.total_nit}, R²: {result.r_squared:.4f}, gradient norm: {result.gradient_norm:.2e}"
+                  + (" (time budget exhausted)" if result.budget_exhausted else ""))
+
+            if tier == 'quick':
                 print("Excellent fit - All error regions below threshold")
                 quick_optimizations += 1
-                
-            elif (nss_short_term_error < ACCEPTABLE_ERROR_THRESHOLD and 
-                  nss_mid_term_error < ACCEPTABLE_ERROR_THRESHOLD and 
-                  nss_long_term_error < ACCEPTABLE_ERROR_THRESHOLD):
+
+            elif tier == 'moderate':
                 print("Moderate optimization needed - Some regions need improvement")
-                # Medium optimization (200 iterations)
-                result = self.model.nelder_mead_with_bounds(initial_params, self.model.nelson_siegel_svensson_error_function, bounds, max_iter=200)
                 moderate_optimizations += 1
-                
+
             else:
                 print("Intensive optimization required - Poor fit in one or more regions")
-                # Full optimization (1000 iterations)
-                result = self.model.nelder_mead_with_bounds(initial_params, self.model.nelson_siegel_svensson_error_function, bounds, max_iter=1000)
                 intensive_optimizations += 1
-            
+
             # Update parameters for next iteration (warm start)
             initial_params = result.x
 
-        
+
             print(f"NSS Parameters: {result.x}")
 
             print(f"Final errors - NSS Short-term: {nss_short_term_error:.4f}, NSS Mid-term: {nss_mid_term_error:.4f}, NSS Long-term: {nss_long_term_error:.4f}")
             print(f"Full curve errors - NSS Total: {result.fun:.4f}")
-            
+
             # Get the yield curve using the fitted parameters
             svensson_curve = self.model.get_nelson_siegel_svensson_curve(initial_params)
 
-            current_date = self.df.iloc[day_index, 0]
-            
             # Get the market curve for the current date
-            market_curve = self.df.iloc[day_index, 1:].values
+            market_curve = daily_yields
 
             # Plot the yield curve
-            self.view.plot_yield_curve_proper_scale(market_curve, svensson_curve, current_date, self.model.get_R_squared(market_curve, svensson_curve))
+            with self.instrumentation.stage('render'):
+                self.view.plot_yield_curve_proper_scale(market_curve, svensson_curve, current_date, self.model.get_R_squared(market_curve, svensson_curve))
 
         # Print efficiency summary
-        total_days = len(self.df)
+        total_days = len(self.store)
         print(f"\\EFFICIENCY SUMMARY:")
         print(f"Quick optimizations: {quick_optimizations}/{total_days} ({quick_optimizations/total_days*100:.1f}%)")
         print(f"Moderate optimizations: {moderate_optimizations}/{total_days} ({moderate_optimizations/total_days*100:.1f}%)")
         print(f"Intensive optimizations: {intensive_optimizations}/{total_days} ({intensive_optimizations/total_days*100:.1f}%)")
+        self.instrumentation.flush()
+
+    def run_batch(self, workers=None, chunks=None, use_cache=True, time_budget=None):
+        """
+        Fit the whole history without printing or plotting.
+
+        The dates are split into contiguous chunks, each fitted by one worker process as its
+        own warm-start chain. The yield matrix is placed in shared memory once instead of
+        being pickled per task. workers=1 runs the same chain sequentially in this process.
+        Days already in the fit cache are not refitted.
+
+        :param workers: Number of worker processes, defaults to the CPU count.
+        :param chunks: Number of contiguous date chunks, defaults to the number of workers.
+        :param use_cache: If True, serve unchanged days from self.fit_cache and store new fits in it.
+        :param time_budget: Seconds of wall time for the escalations of the run, or None for no limit.
+                            Each worker's chain gets the whole budget, as the chains run side by side.
+        :return: DataFrame in date order with the fitted parameters, R², segment errors, tier and iterations.
+        """
+        yields = np.ascontiguousarray(self.extract_yields(), dtype=np.float64)
+        dates = self.store.dates
+        num_days = len(yields)
+        workers = workers or os.cpu_count() or 1
+
+        params = np.zeros((num_days, 6))
+        iterations = np.zeros(num_days, dtype=int)
+        tiers = [None] * num_days
+        missing = np.ones(num_days, dtype=bool)
+
+        # Serve unchanged days from the fit cache
+        if use_cache:
+            keys = [FitCache.make_key(date, daily_yields, 'NSS', BOUNDS, SOLVER_SETTINGS)
+                    for date, daily_yields in zip(dates, yields)]
+            for day_index, key in enumerate(keys):
+                entry = self.fit_cache.get(key)
+                if entry is not None:
+                    params[day_index] = entry['params']
+                    iterations[day_index] = entry['iterations']
+                    tiers[day_index] = entry['tier']
+                    missing[day_index] = False
+
+        ranges = _split_ranges(missing, params, 1 if workers == 1 else (chunks or workers)) if missing.any() else []
+
+        with self.instrumentation.stage('fit'):
+            if workers == 1 or len(ranges) <= 1:
+                # Sequential path: one warm-start chain per range in this process, and nothing at all
+                # when every day is cached, so no shared memory or pool is set up for an empty fit
+                fitted = []
+                run_start = time.perf_counter()
+                for start, stop, initial_params in ranges:
+                    remaining = None if time_budget is None else max(0.0, time_budget - (time.perf_counter() - run_start))
+                    fitted.append(_fit_range(yields, start, stop, initial_params, BOUNDS, remaining))
+            else:
+                shm = shared_memory.SharedMemory(create=True, size=yields.nbytes)
+                try:
+                    np.ndarray(yields.shape, dtype=np.float64, buffer=shm.buf)[:] = yields
+                    with ProcessPoolExecutor(max_workers=workers) as executor:
+                        futures = [executor.submit(_fit_chunk, shm.name, yields.shape, start, stop, initial_params, BOUNDS,
+                                                   time_budget)
+                                   for start, stop, initial_params in ranges]
+                        fitted = [future.result() for future in futures]
+                finally:
+                    shm.close()
+                    shm.unlink()
+
+        # Fits cut short by the time budget are reported but not cached, so a later run refits them
+        exhausted = np.zeros(num_days, dtype=bool)
+        for start, chunk_params, chunk_iterations, chunk_tiers, chunk_exhausted, chunk_records in fitted:
+            exhausted[start:start + len(chunk_params)] = chunk_exhausted
+            params[start:start + len(chunk_params)] = chunk_params
+            iterations[start:start + len(chunk_params)] = chunk_iterations
+            tiers[start:start + len(chunk_params)] = chunk_tiers
+            # Worker records come back without dates
+            for day_index, record in enumerate(chunk_records, start):
+                record['date'] = str(np.datetime64(dates[day_index], 'D'))
+                self.instrumentation.emit(record)
+
+        # Score every day in one vectorized pass
+        with self.instrumentation.stage('score'):
+            model = NelsonSiegelModel(yields)
+            curves = model.get_nelson_siegel_svensson_curve(params)
+            r_squared = model.get_R_squared(yields, curves)
+            errors = model.get_segment_errors(yields, curves)
+
+        if use_cache:
+            for day_index in np.flatnonzero(missing & ~exhausted):
+                self.fit_cache.put(keys[day_index], params[day_index], r_squared[day_index],
+                                   iterations[day_index], errors[day_index], tiers[day_index])
+            self.fit_cache.save()
+
+        table = pd.DataFrame(params, columns=PARAM_COLUMNS)
+        table.insert(0, 'Date', dates)
+        table['R²'] = r_squared
+        table[ERROR_COLUMNS] = errors
+        table['Tier'] = tiers
+        table['Iterations'] = iterations
+        self.instrumentation.flush()
+        return table
+
+    def render_report(self, output, fmt='pdf', workers=None):
+        """
+        Fit the whole history and write one NSS page per day without opening any window.
+
+        :param output: PDF file path, or a directory for 'png'/'svg' pages.
+        :param fmt: 'pdf' for one multi-page report, 'png' or 'svg' for one file per day.
+        :param workers: Worker processes for fitting and for PNG/SVG rendering.
+        :return: The fit table from run_batch.
+        """
+        table = self.run_batch(workers=workers)
+        market_curves = self.extract_yields()
+        model = NelsonSiegelModel(market_curves)
+        svensson_curves = model.get_nelson_siegel_svensson_curve(table[PARAM_COLUMNS].values)
+
+        pages = list(zip(market_curves, svensson_curves, table['Date'], table['R²']))
+        with self.instrumentation.stage('render'):
+            render_pages(NSSView, 'plot_yield_curve_proper_scale', pages, output, fmt, workers)
+        self.instrumentation.flush()
+        return table
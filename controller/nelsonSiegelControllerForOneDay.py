@@ -1,27 +1,27 @@
-from csvReader import load_my_data
+from csvReader import get_yield_store
 from view.oneDayView import OneDayView
 from models.nelsonSiegelModel import NelsonSiegelModel
 
 class NelsonSiegelControllerForOneDay:
     def __init__(self):
         # Load the data
-        self.df = load_my_data()
+        self.store = get_yield_store()
         self.view = OneDayView()
         self.params = [4.69270036, 0.72601528, 1.25823072, 0.25633094]
 
     def extract_yields_for_one_day(self):
         ##just use the first row of the dataframe
-        if self.df.empty:
-            raise ValueError("DataFrame is empty. Please load data before extracting yields.")
-        return self.df.iloc[1, 1:].values  # Extract yields from the first row, excluding the date column
+        if len(self.store) == 0:
+            raise ValueError("The yield store is empty. Please load data before extracting yields.")
+        return self.store.yields[1]  # Extract yields from the first row
     
     def extract_yields(self):
         # Assuming the first column is the date and the rest are yields
         # each column represents a different tenure 1 Mo, 2 Mo, ..., 30 Yr
         # We return the yields as a numpy array for further processing
-        if self.df.empty:
-            raise ValueError("DataFrame is empty. Please load data before extracting yields.")
-        return self.df.iloc[:, 1:].values
+        if len(self.store) == 0:
+            raise ValueError("The yield store is empty. Please load data before extracting yields.")
+        return self.store.yields
     
     # Run the model and display the results for one day
     def run(self):
@@ -0,0 +1,386 @@
+import argparse
+import asyncio
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from csvReader import TENORS, get_yield_store
+from instrumentation import Instrumentation
+from models.buttefly import ButterflyScanner
+from models.curveSurface import CurveSurface
+from models.nelsonSiegelModel import NelsonSiegelModel
+from models.spreadMatrix import SpreadMatrix
+from models.spreadMeanCalculator import MeanReversionCalculator
+from controller.nelsonSiegelController import NelsonSiegelController, PARAM_COLUMNS
+
+TENOR_MATURITIES = dict(zip(TENORS, [1/12, 2/12, 3/12, 4/12, 6/12, 1, 2, 3, 5, 7, 10, 20, 30]))
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+CACHE_SIZE = 4096
+
+
+def _to_json(value):
+    """
+    Convert numpy results into plain JSON values: arrays to lists, dates to 'YYYY-MM-DD', NaN to None.
+    """
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    if isinstance(value, np.ndarray):
+        if np.issubdtype(value.dtype, np.datetime64):
+            return [str(date) for date in value.astype('datetime64[D]')]
+        if np.issubdtype(value.dtype, np.floating):
+            return np.where(np.isnan(value), None, value).tolist()
+        return value.tolist()
+    if isinstance(value, np.datetime64):
+        return str(value.astype('datetime64[D]'))
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+class QueryController:
+    """
+    Answers curve, spread, butterfly and z-score queries from resident data.
+
+    The yield store, the fitted NSS parameters of every day and the curve surfaces (NSS, NS
+    and spline) are built once and kept in memory. NSS parameters are fitted lazily on the
+    first query that needs them, through NelsonSiegelController.run_batch and its persistent
+    fit cache, so a day is never fitted twice, not even across restarts.
+    """
+
+    def __init__(self, store=None, instrumentation=None, fit_cache=None, workers=1):
+        """
+        :param store: YieldStore with the TENORS columns, defaults to the process-wide store.
+        :param instrumentation: Instrumentation for the NSS fits.
+        :param fit_cache: FitCache to use instead of the default one.
+        :param workers: Worker processes for the initial NSS fit.
+        """
+        self.store = store or get_yield_store()
+        if self.store.tenors != TENORS:
+            raise ValueError("The query service needs a store with every tenor column.")
+        self.instrumentation = instrumentation or Instrumentation()
+        self.fit_cache = fit_cache
+        self.workers = workers
+        self.maturities = np.array([TENOR_MATURITIES[tenor] for tenor in TENORS])
+
+        self.nss_model = NelsonSiegelModel(self.store.yields[-1])
+        self.calculator = MeanReversionCalculator()
+        self.surfaces = {}
+        self._params = None
+        self._nss_curves = None
+        self._fit_lock = threading.Lock()
+        self._surface_lock = threading.Lock()
+
+        self.handlers = {
+            'curve': self.curve,
+            'spread': self.spread,
+            'butterfly': self.butterfly,
+            'screen': self.screen,
+            'scan': self.scan,
+        }
+
+    def nss_params(self):
+        """
+        The fitted NSS parameters of every day, shape (days, 6), fitted on first use.
+        """
+        with self._fit_lock:
+            if self._params is None:
+                controller = NelsonSiegelController(instrumentation=self.instrumentation)
+                controller.store = self.store
+                if self.fit_cache is not None:
+                    controller.fit_cache = self.fit_cache
+                table = controller.run_batch(workers=self.workers)
+                self._params = table[PARAM_COLUMNS].to_numpy(dtype=float)
+                self._nss_curves = self.nss_model.get_nelson_siegel_svensson_curve(self._params)
+        return self._params
+
+    def nss_curves(self):
+        """
+        The fitted NSS curves of every day on the TENORS maturities, shape (days, 13).
+        """
+        self.nss_params()
+        return self._nss_curves
+
+    def surface(self, model='nss', bc_type='natural'):
+        """
+        The resident CurveSurface of a model ('nss', 'ns' or 'spline'), built on first use.
+        """
+        key = (model, bc_type if model == 'spline' else None)
+        if key not in self.surfaces:
+            if model == 'nss':
+                params = self.nss_params()
+            with self._surface_lock:
+                if key not in self.surfaces:
+                    if model == 'nss':
+                        surface = CurveSurface(self.store.dates, 'nss', params, cache_size=0)
+                    elif model == 'ns':
+                        # Nelson-Siegel curves come from one batched grid fit of the whole history
+                        ns_params, _ = self.nss_model.fit_nelson_siegel_separable(self.store.yields)
+                        surface = CurveSurface(self.store.dates, 'ns', ns_params, cache_size=0)
+                    elif model == 'spline':
+                        surface = CurveSurface(self.store.dates, 'spline', yields=self.store.yields, bc_type=bc_type,
+                                               cache_size=0)
+                    else:
+                        raise ValueError(f"Unknown curve model: {model}")
+                    # Results are cached by the server's LRU, so the surfaces keep no cache of their own
+                    self.surfaces[key] = surface
+        return self.surfaces[key]
+
+    def rows(self, query):
+        """
+        Resolve the days of a query: 'start'/'end' for a date range, 'dates' for a list of
+        dates, or the last stored day if neither is given.
+
+        :return: Integer row indices into the store.
+        """
+        if 'start' in query or 'end' in query:
+            rows = self.store.row_range(query.get('start'), query.get('end'))
+            return np.arange(rows.start, rows.stop)
+        if query.get('dates') is None:
+            return np.array([len(self.store) - 1])
+
+        wanted = np.array(query['dates'], dtype='datetime64[ns]')
+        rows = np.searchsorted(self.store.dates, wanted)
+        found = (rows < len(self.store)) & (self.store.dates[np.minimum(rows, len(self.store) - 1)] == wanted)
+        if not found.all():
+            raise ValueError(f"No curve on {str(wanted[~found][0])[:10]}.")
+        return rows
+
+    def _yields(self, curve):
+        if curve == 'market':
+            return self.store.yields
+        if curve == 'nss':
+            return self.nss_curves()
+        raise ValueError(f"Unknown curve: {curve}")
+
+    def _series(self, series, rows, window):
+        statistics = self.calculator.rolling_statistics(series, (window,), extremes=False)[window]
+        return {'dates': self.store.dates[rows], 'value': series[rows], 'mean': statistics['mean'][rows],
+                'std': statistics['std'][rows], 'z_score': statistics['z_score'][rows]}
+
+    def curve(self, query):
+        """
+        Yields of the fitted curves on any maturities.
+
+        Query fields: 'model' ('nss', 'ns' or 'spline', default 'nss'), 'maturities' in years
+        (default the 13 tenors), 'bc_type' for splines, and the days (see rows()).
+        """
+        rows = self.rows(query)
+        maturities = np.asarray(query.get('maturities', self.maturities), dtype=float)
+        surface = self.surface(query.get('model', 'nss'), query.get('bc_type', 'natural'))
+        return {'dates': self.store.dates[rows], 'maturities': maturities, 'yields': surface.evaluate(maturities, rows=rows)}
+
+    def spread(self, query):
+        """
+        A tenor spread (long - short) with its trailing-window mean, std and z-score.
+
+        Query fields: 'tenors' [short, long] (default 2 Yr, 5 Yr), 'window' (default 60),
+        'curve' ('market' or 'nss') and the days.
+        """
+        short, long = query.get('tenors', ['2 Yr', '5 Yr'])
+        matrix = SpreadMatrix(self._yields(query.get('curve', 'market')), TENORS)
+        result = self._series(matrix.spreads([(short, long)])[:, 0], self.rows(query), query.get('window', 60))
+        result['spread'] = matrix.pair_labels([(short, long)])[0]
+        return result
+
+    def butterfly(self, query):
+        """
+        A butterfly (wing, belly, wing) with its trailing-window mean, std and z-score.
+
+        Query fields: 'tenors' (default 2 Yr, 5 Yr, 10 Yr), 'method' ('fixed', 'maturity', 'duration' or
+        'regression'), 'window' (default 60), 'curve' ('market' or 'nss') and the days.
+        """
+        triple = query.get('tenors', ['2 Yr', '5 Yr', '10 Yr'])
+        scanner = ButterflyScanner(self._yields(query.get('curve', 'market')), TENORS, self.maturities)
+        series = scanner.spreads(query.get('method', 'fixed'), [triple])[:, 0]
+        result = self._series(series, self.rows(query), query.get('window', 60))
+        result['butterfly'] = scanner.triple_labels([triple])[0]
+        return result
+
+    def screen(self, query):
+        """
+        Today's most stretched tenor spreads (SpreadMatrix.rank). Query fields: 'window', 'top', 'curve'.
+        """
+        matrix = SpreadMatrix(self._yields(query.get('curve', 'market')), TENORS)
+        return matrix.rank(query.get('window', 60), top=query.get('top', 10))
+
+    def scan(self, query):
+        """
+        Today's richest and cheapest butterflies (ButterflyScanner.rank). Query fields: 'window',
+        'method', 'top', 'curve'.
+        """
+        scanner = ButterflyScanner(self._yields(query.get('curve', 'market')), TENORS, self.maturities)
+        return scanner.rank(query.get('window', 60), query.get('method', 'fixed'), top=query.get('top', 10))
+
+    def answer(self, query):
+        """
+        Answer one query.
+
+        :param query: dict with a 'type' of 'curve', 'spread', 'butterfly', 'screen' or 'scan'.
+        :return: The result as JSON-ready values.
+        """
+        handler = self.handlers.get(query.get('type'))
+        if handler is None:
+            raise ValueError(f"Unknown query type: {query.get('type')}")
+        return _to_json(handler(query))
+
+
+class QueryServer:
+    """
+    asyncio server for QueryController over TCP or a Unix socket.
+
+    The protocol is one JSON object per line each way. A request may carry an 'id', which is
+    echoed in its response; responses on one connection come back as they complete. A request
+    of type 'batch' carries a list of 'queries' that are answered concurrently and returned in order.
+
+    Results are kept in an LRU keyed by the canonical JSON of the query, and identical queries
+    that arrive while one is being computed wait for that computation instead of repeating it.
+    """
+
+    def __init__(self, controller=None, cache_size=CACHE_SIZE):
+        self.controller = controller or QueryController()
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'coalesced': self.coalesced, 'cached': len(self.cache)}
+
+    async def query(self, request):
+        """
+        Answer one request through the LRU and the in-flight computations.
+
+        :param request: Query dict (without 'id').
+        :return: The result serialised as JSON text.
+        """
+        if request.get('type') == 'batch':
+            results = await asyncio.gather(*(self._query_or_error(query) for query in request.get('queries', [])))
+            return '[' + ','.join(results) + ']'
+        if request.get('type') == 'stats':
+            return json.dumps(self.stats())
+
+        key = json.dumps(request, sort_keys=True)
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        if key in self.pending:
+            self.coalesced += 1
+            return await asyncio.shield(self.pending[key])
+
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        # Computations run on the default thread pool so the event loop keeps serving cache hits
+        future = loop.run_in_executor(None, lambda: json.dumps(self.controller.answer(request)))
+        self.pending[key] = future
+        try:
+            result = await future
+        finally:
+            del self.pending[key]
+
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+    async def _query_or_error(self, query):
+        try:
+            return await self.query(query)
+        except Exception as error:
+            return json.dumps({'error': str(error)})
+
+    async def _respond(self, line, writer):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("A request must be a JSON object.")
+            request_id = request.pop('id', None)
+            response = f'{{"id": {json.dumps(request_id)}, "result": {await self.query(request)}}}'
+        except Exception as error:
+            response = json.dumps({'id': request_id, 'error': str(error)})
+        writer.write(response.encode() + b'\n')
+        await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self._respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        """
+        Start listening on a Unix socket if a path is given, otherwise on host:port.
+
+        :return: The asyncio server.
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle_connection, path=path)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def send_queries(queries, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+    """
+    Send queries over one connection and collect the responses in request order.
+
+    :param queries: List of query dicts.
+    :return: List of response dicts with 'result' or 'error'.
+    """
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for request_id, query in enumerate(queries):
+            writer.write(json.dumps({**query, 'id': request_id}).encode() + b'\n')
+        await writer.drain()
+        responses = [json.loads(await reader.readline()) for _ in queries]
+    finally:
+        writer.close()
+    return sorted(responses, key=lambda response: response['id'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve curve, spread and butterfly queries from resident fits.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--socket', help="Listen on this Unix socket instead of TCP.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes for the initial NSS fit.")
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE)
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = QueryServer(QueryController(workers=args.workers), args.cache_size)
+        # Fit before accepting connections, so the first query does not pay for it
+        await asyncio.get_running_loop().run_in_executor(None, server.controller.nss_params)
+        listener = await server.start(args.host, args.port, args.socket)
+        print(f"Serving {len(server.controller.store)} curves on {args.socket or f'{args.host}:{args.port}'}")
+        async with listener:
+            await listener.serve_forever()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
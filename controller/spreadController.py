@@ -1,23 +1,39 @@
-from csvReader import get_two_year_yields_from_last_3_months, get_five_year_yields_from_last_3_months, load_my_data
+from csvReader import YieldStore, get_yield_store
 from view.spreadView import SpreadView
 from models.spreadMeanCalculator import MeanReversionCalculator
 from models.spreadMeanCalculator import LinearRegressionModel
+from models.spreadMatrix import SpreadMatrix
 
 class SpreadController:
     """
     Controller for managing the spread between two-year and five-year yields.
     """
 
-    def __init__(self):
-        self.view = SpreadView()
+    def __init__(self, renderer=None):
+        self.view = SpreadView(renderer)
         self.model = MeanReversionCalculator()
         self.linear_model = LinearRegressionModel()
-        self.df_2 = get_two_year_yields_from_last_3_months()
-        self.df_5 = get_five_year_yields_from_last_3_months()
-        self.df = load_my_data()
-        self.mean_spread = self.model.find_mean_spread(self.df_2, self.df_5)
-        self.spreads = self.model.calculate_spread(self.df_2, self.df_5)
-        self.std_spread = self.model.calculate_spread_std(self.df_2, self.df_5)
+        # The shared yield store; the 3-month columns are views on it
+        self.store = get_yield_store()
+        window = self.store.last('3M')
+        self.df_2 = window.column('2 Yr')
+        self.df_5 = window.column('5 Yr')
+        # Calculate the spread once and derive every summary statistic from it
+        self.summary = self.model.spread_summary(self.df_2, self.df_5)
+        self.mean_spread = self.summary['mean']
+        self.spreads = self.summary['spreads']
+        self.std_spread = self.summary['std']
+
+    @property
+    def df(self):
+        """
+        DataFrame copy of the store (Date column followed by the tenors), built on demand.
+        """
+        return self.store.to_dataframe()
+
+    @df.setter
+    def df(self, df):
+        self.store = YieldStore.from_dataframe(df)
 
     def run_averages(self):
         """
@@ -26,9 +42,9 @@ class SpreadController:
         two_year_yields = self.df_2
         five_year_yields = self.df_5
 
-        # Calculate the maximum, minimum, and standard deviation of the spreads
-        max_spread = self.model.calculate_spread_max(two_year_yields, five_year_yields)
-        min_spread = self.model.calculate_spread_min(two_year_yields, five_year_yields)
+        # Maximum and minimum of the spreads (already computed with the mean and standard deviation)
+        max_spread = self.summary['max']
+        min_spread = self.summary['min']
 
         # Calculate the linear regression model for the spreads
         linear_model = self.linear_model.fit(two_year_yields, five_year_yields)
@@ -51,3 +67,35 @@ class SpreadController:
         print(f"Data covers {len(self.spreads)} days")
         print(f"Slope: {slope:.4f}, R-squared: {r_squared:.4f}")
         
+
+    def run_rolling(self, windows=(20, 60, 250)):
+        """
+        Rolling 5Y-2Y spread statistics over the full history for several window lengths.
+
+        :param windows: Window lengths in trading days.
+        :return: dict {window: {'mean', 'std', 'min', 'max', 'z_score'}} of arrays aligned with self.store.dates.
+        """
+        spreads = self.model.calculate_spread(self.store.column('2 Yr'), self.store.column('5 Yr'))
+        statistics = self.model.rolling_statistics(spreads, windows)
+
+        print(f"Rolling 5Y-2Y spread z-scores on {str(self.store.dates[-1])[:10]}:")
+        for window, result in statistics.items():
+            print(f"{window}d: mean {result['mean'][-1]:.4f}%, std {result['std'][-1]:.4f}%, z-score {result['z_score'][-1]:.2f}")
+        return statistics
+
+    def run_screen(self, window=60, pairs=None, top=10):
+        """
+        Screen every tenor-pair spread and print the most stretched ones against their trailing window.
+
+        :param window: Window length in trading days for the z-scores.
+        :param pairs: None for all 78 curve spreads, or a list of (short, long) tenor labels.
+        :param top: Number of pairs to print.
+        :return: List of dicts with 'pair', 'spread' and 'z_score', largest |z-score| first.
+        """
+        matrix = SpreadMatrix(self.store.yields, self.store.tenors)
+        ranking = matrix.rank(window, pairs, top)
+
+        print(f"Most stretched spreads ({window}d z-score) on {str(self.store.dates[-1])[:10]}:")
+        for row in ranking:
+            print(f"{row['pair']:>12}: {row['spread']:.4f}% ({row['spread']*100:.1f} bps), z-score {row['z_score']:.2f}")
+        return ranking
@@ -0,0 +1,123 @@
+import time
+
+import numpy as np
+
+from csvReader import TENORS, get_yield_store, tail_csv
+from models.buttefly import Butterfly
+from models.nelsonSiegelModel import NelsonSiegelModel
+from models.spreadMeanCalculator import MeanReversionCalculator, RollingStatistics
+from controller.nelsonSiegelController import BOUNDS, INITIAL_PARAMS, fit_day
+from instrumentation import Instrumentation
+
+TWO_YEAR = TENORS.index('2 Yr')
+FIVE_YEAR = TENORS.index('5 Yr')
+TEN_YEAR = TENORS.index('10 Yr')
+
+
+class StreamingController:
+    """
+    Controller for processing new Treasury curves one trading day at a time.
+
+    Each update warm-starts the NSS fit from the previous day and pushes the new 2Y/5Y spread
+    and 2s5s10s butterfly into fixed-size rolling windows, so the cost per day does not grow
+    with the length of the history.
+    """
+
+    def __init__(self, window=60, instrumentation=None):
+        self.window = window
+        self.instrumentation = instrumentation or Instrumentation()
+        self.butterfly = Butterfly([1/12, 2/12, 3/12, 6/12, 1, 2, 3, 5, 7, 10, 20, 30])
+        self.model = MeanReversionCalculator()
+        self.spread_statistics = RollingStatistics(window)
+        self.butterfly_statistics = RollingStatistics(window)
+        self.params = np.array(INITIAL_PARAMS)
+        self.last_date = None
+
+    def warm_up(self, store=None):
+        """
+        Seed the rolling windows and the warm-start parameters from the stored history.
+
+        :param store: YieldStore to seed from, defaults to the process-wide store.
+        """
+        store = store or get_yield_store()
+        recent = store.yields[-self.window:]
+
+        spreads = self.model.calculate_spread(recent[:, TWO_YEAR], recent[:, FIVE_YEAR])
+        butterflies = self.butterfly.calculate_butterfly_spread(recent[:, TWO_YEAR], recent[:, FIVE_YEAR],
+                                                                recent[:, TEN_YEAR])
+        for spread, butterfly in zip(spreads, butterflies):
+            self.spread_statistics.update(spread)
+            self.butterfly_statistics.update(butterfly)
+
+        # Start the NSS chain from a grid-searched fit of the last stored day
+        nss_model = NelsonSiegelModel(recent[-1])
+        params, _ = nss_model.fit_nelson_siegel_svensson_separable(recent[-1:], BOUNDS, polish=True)
+        self.params = params[0]
+        self.last_date = store.dates[-1]
+
+    def update(self, date, daily_yields):
+        """
+        Process one new curve.
+
+        :param date: Date of the curve.
+        :param daily_yields: The 13 market yields in TENORS order.
+        :return: dict with the NSS fit, the 2Y/5Y spread, the butterflies and their rolling statistics.
+        """
+        daily_yields = np.asarray(daily_yields, dtype=float)
+
+        # Warm-started NSS fit (only this day's 13 yields are involved)
+        with self.instrumentation.stage('fit'):
+            fit_start = time.perf_counter()
+            result, _, tier = fit_day(daily_yields, self.params)
+        self.instrumentation.record_fit(date, result, time.perf_counter() - fit_start, tier)
+        self.params = result.x
+        nss_model = NelsonSiegelModel(daily_yields)
+        nss_curve = nss_model.get_nelson_siegel_svensson_curve(result.x)
+
+        two_year, five_year, ten_year = daily_yields[[TWO_YEAR, FIVE_YEAR, TEN_YEAR]]
+        spread = five_year - two_year
+        market_butterfly = self.butterfly.calculate_butterfly_spread(two_year, five_year, ten_year)
+        nss_butterfly = self.butterfly.calculate_butterfly_spread(nss_curve[TWO_YEAR], nss_curve[FIVE_YEAR],
+                                                                  nss_curve[TEN_YEAR])
+
+        spread_statistics = self.spread_statistics.update(spread)
+        butterfly_statistics = self.butterfly_statistics.update(market_butterfly)
+        self.last_date = date
+
+        return {
+            'date': date,
+            'nss_params': result.x,
+            'r_squared': nss_model.get_R_squared(daily_yields, nss_curve),
+            'tier': tier,
+            'two_year': two_year,
+            'five_year': five_year,
+            'spread': spread,
+            'spread_mean': spread_statistics['mean'],
+            'spread_std': spread_statistics['std'],
+            'spread_z_score': spread_statistics['z_score'],
+            'market_butterfly': market_butterfly,
+            'nss_butterfly': nss_butterfly,
+            'butterfly_mean': butterfly_statistics['mean'],
+            'butterfly_std': butterfly_statistics['std'],
+            'butterfly_z_score': butterfly_statistics['z_score'],
+        }
+
+    def run(self, rows):
+        """
+        Process a stream of (date, yields) rows, e.g. from csvReader.tail_csv or csvReader.iter_queue.
+
+        Rows dated on or before the last processed day are skipped.
+
+        :return: Generator of one result record per new day.
+        """
+        for date, daily_yields in rows:
+            if self.last_date is not None and np.datetime64(date, 'ns') <= np.datetime64(self.last_date, 'ns'):
+                continue
+            yield self.update(date, daily_yields)
+        self.instrumentation.flush()
+
+    def run_csv(self, path, follow=True, poll_interval=1.0):
+        """
+        Tail a CSV file that receives one appended row per trading day.
+        """
+        return self.run(tail_csv(path, follow=follow, poll_interval=poll_interval))
@@ -1,65 +1,611 @@
+import csv
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
 
+DATA_DIR = 'data'
+DATA_PATTERN = '*.csv'
+SNAPSHOT_DIR = '.cache'
+
+# CSV parser: None picks pyarrow when it is installed and the pandas C parser otherwise
+CSV_ENGINE = None
+TREASURY_DATE_FORMAT = '%m/%d/%Y'
+
+# Memory-mapped history layout: raw int64 timestamps, a raw row-major yield matrix and a JSON header
+HISTORY_META = 'history.json'
+HISTORY_TIMESTAMPS = 'timestamps.i8'
+HISTORY_YIELDS = 'yields.bin'
+
+# Tenor columns used by every model, in maturity order
+TENORS = ['1 Mo', '2 Mo', '3 Mo', '4 Mo', '6 Mo', '1 Yr', '2 Yr', '3 Yr', '5 Yr', '7 Yr', '10 Yr', '20 Yr', '30 Yr']
+
+# One store per data directory, shared by every helper and controller in the process
+_stores = {}
+
+
+class YieldStore:
+    """
+    Columnar copy of the Treasury yield history.
+
+    The yields are kept as one contiguous float64 (or float32) matrix (days x tenors) next to a
+    sorted datetime64 date index, so helpers can slice columns and date ranges
+    without going back to pandas. The arrays may be memory-mapped files, in which case
+    only the pages that are actually read are loaded.
+    """
+
+    def __init__(self, dates, yields, tenors, signature=None, contiguous=True):
+        """
+        :param dates: Sorted dates of the rows.
+        :param yields: Yield matrix of shape (dates, tenors).
+        :param tenors: Column labels of the yield matrix.
+        :param signature: Fingerprint of the source data, used to detect changes.
+        :param contiguous: If False, keep strided views of a parent store instead of copying them.
+        """
+        # Read-only views: the store's arrays are frozen without touching the caller's own arrays
+        self.dates = np.asarray(dates, dtype='datetime64[ns]').view()
+        if not (isinstance(yields, np.ndarray) and yields.dtype in (np.float32, np.float64)
+                and (yields.flags['C_CONTIGUOUS'] or not contiguous)):
+            yields = np.ascontiguousarray(yields, dtype=np.float64)
+        if len(self.dates) != len(yields):
+            raise ValueError("Dates and yields must have the same number of rows.")
+        self.yields = yields.view()
+        self.tenors = list(tenors)
+        self.signature = signature
+
+        # The arrays are shared across the whole process, so guard them against mutation
+        self.dates.flags.writeable = False
+        self.yields.flags.writeable = False
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def mask(self):
+        """
+        Boolean matrix of the quoted yields: False where a tenor was not published on that day
+        (e.g. the 4 month bill before October 2022), whose yield is NaN.
+        """
+        return ~np.isnan(self.yields)
+
+    def column(self, tenor):
+        """
+        Return the yields of one tenor as a read-only view.
+
+        :param tenor: Column label, e.g. '2 Yr'.
+        :return: A numpy array of yields for every date in the store.
+        """
+        if tenor not in self.tenors:
+            raise ValueError(f"{tenor} yields not found in the data.")
+        return self.yields[:, self.tenors.index(tenor)]
+
+    def columns(self, tenors, rows=slice(None)):
+        """
+        Return the yields of several tenors.
+
+        Evenly spaced tenors (e.g. a contiguous run) come back as a view; any other
+        selection copies only the requested rows.
+
+        :param tenors: Column labels in the wanted order.
+        :param rows: Row slice to restrict the result to.
+        :return: Array of shape (rows, len(tenors)).
+        """
+        missing = [tenor for tenor in tenors if tenor not in self.tenors]
+        if missing:
+            raise ValueError(f"{missing} yields not found in the data.")
+        indices = [self.tenors.index(tenor) for tenor in tenors]
+        steps = np.diff(indices)
+        if len(indices) == 1 or (steps[0] != 0 and np.all(steps == steps[0])):
+            step = int(steps[0]) if len(indices) > 1 else 1
+            stop = indices[-1] + step if indices[-1] + step >= 0 else None
+            return self.yields[rows, indices[0]:stop:step]
+        return self.yields[rows][:, indices]
+
+    def row_range(self, start=None, end=None):
+        """
+        Rows of the dates in [start, end], found by binary search on the sorted date index.
+
+        :param start: First date to include, or None for the first stored date.
+        :param end: Last date to include, or None for the last stored date.
+        :return: A slice of rows.
+        """
+        first = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, 'ns'), side='left'))
+        stop = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, 'ns'), side='right'))
+        return slice(first, max(first, stop))
+
+    def window(self, start=None, end=None, tenors=None):
+        """
+        The curves dated in [start, end] as a store of views on this one.
+
+        Dates and yields always come back as one aligned store. The yields are a view
+        unless the tenors are unevenly spaced, in which case only the window's rows are copied.
+
+        :param start: First date to include, or None for the first stored date.
+        :param end: Last date to include, or None for the last stored date.
+        :param tenors: Column labels to keep, defaults to every tenor.
+        :return: A YieldStore.
+        """
+        rows = self.row_range(start, end)
+        tenors = self.tenors if tenors is None else list(tenors)
+        yields = self.yields[rows] if tenors == self.tenors else self.columns(tenors, rows)
+        return YieldStore(self.dates[rows], yields, tenors, contiguous=False)
+
+    def last(self, period, tenors=None):
+        """
+        The curves of the trailing period up to the last stored date, e.g. last('3M').
+
+        :param period: '10D', '2W', '3M' or '1Y', or a pandas DateOffset/Timedelta.
+        :param tenors: Column labels to keep, defaults to every tenor.
+        :return: A YieldStore of views, as for window().
+        """
+        if len(self.dates) == 0:
+            return self.window(tenors=tenors)
+        cutoff = pd.Timestamp(self.dates[-1]) - _period_offset(period)
+        return self.window(cutoff, None, tenors)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """
+        Build a store from the DataFrame layout of load_my_data (Date column followed by the tenors).
+        """
+        return cls(df.iloc[:, 0].to_numpy(dtype='datetime64[ns]'), df.iloc[:, 1:].to_numpy(dtype=np.float64),
+                   list(df.columns[1:]))
+
+    def to_dataframe(self):
+        """
+        Build the DataFrame layout returned by load_my_data (Date column followed by the tenors).
+        """
+        df = pd.DataFrame(self.yields.copy(), columns=self.tenors)
+        df.insert(0, 'Date', pd.to_datetime(self.dates))
+        return df
+
+
+def _period_offset(period):
+    """
+    Convert '10D', '2W', '3M' or '1Y' (or an offset) into a pandas offset.
+    """
+    if not isinstance(period, str):
+        return period
+    match = re.fullmatch(r'\s*(\d+)\s*([DWMY])\s*', period.upper())
+    if match is None:
+        raise ValueError(f"Unsupported period: {period}")
+    unit = {'D': 'days', 'W': 'weeks', 'M': 'months', 'Y': 'years'}[match.group(2)]
+    return pd.DateOffset(**{unit: int(match.group(1))})
+
+
+def discover_csv_files(data_dir=None):
+    """
+    Find the yearly Treasury files of a data directory, so adding a year needs no code change.
+
+    :param data_dir: Directory to search, defaults to DATA_DIR.
+    :return: Sorted list of the paths matching DATA_PATTERN.
+    """
+    return sorted(glob.glob(os.path.join(data_dir or DATA_DIR, DATA_PATTERN)))
+
+
+def _source_paths(data_dir):
+    return discover_csv_files(data_dir)
+
+
+def _source_signature(paths):
+    """
+    Cheap fingerprint of the source files (size and modification time).
+    """
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+def _source_hash(paths):
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def canonical_tenor(label):
+    """
+    Map a column label such as '1 Mo', '1 Month', '10 YR' or '30 Years' onto the TENORS naming.
+
+    :return: The canonical label ('1 Mo', '10 Yr', ...), or None if the label is not a tenor.
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*(mo|mos|month|months|yr|yrs|year|years)\s*', label, re.IGNORECASE)
+    if match is None:
+        return None
+    unit = 'Mo' if match.group(2).lower().startswith('mo') else 'Yr'
+    return f"{match.group(1)} {unit}"
+
+
+def _default_engine():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return 'c'
+    return 'pyarrow'
+
+
+def read_yield_csv(path, engine=None):
+    """
+    Parse one Treasury CSV file onto the TENORS grid.
+
+    Only the date and the known tenor columns are read, with explicit dtypes. Tenors the file
+    does not have (the 2 and 4 month bills were added over time) come back as NaN columns, and
+    tenors outside the grid (e.g. '1.5 Month') are skipped.
+
+    :param path: CSV file with a Date column followed by tenor columns.
+    :param engine: pandas CSV engine ('c' or 'pyarrow'), defaults to CSV_ENGINE.
+    :return: (dates, yields): unsorted datetime64[ns] dates and a (days, len(TENORS)) float64 matrix.
+    """
+    with open(path, newline='') as f:
+        header = next(csv.reader(f), [])
+    date_column = next((label for label in header if label.strip().lower() == 'date'), None)
+    if date_column is None:
+        raise ValueError(f"{path} has no Date column.")
+    columns = {label: canonical_tenor(label) for label in header}
+    columns = {label: tenor for label, tenor in columns.items() if tenor in TENORS}
+
+    dtypes = {date_column: str, **{label: np.float64 for label in columns}}
+    df = pd.read_csv(path, usecols=[date_column] + list(columns), dtype=dtypes,
+                     engine=engine or CSV_ENGINE or _default_engine())
+
+    try:
+        dates = pd.to_datetime(df[date_column], format=TREASURY_DATE_FORMAT)
+    except ValueError:
+        dates = pd.to_datetime(df[date_column], format='mixed')
+
+    yields = np.full((len(df), len(TENORS)), np.nan)
+    yields[:, [TENORS.index(tenor) for tenor in columns.values()]] = df[list(columns)].to_numpy(dtype=np.float64, na_value=np.nan)
+    return dates.to_numpy(dtype='datetime64[ns]'), yields
+
+
+def parse_csv_files(paths, workers=None, engine=None):
+    """
+    Parse several Treasury CSV files concurrently into one date-sorted history.
+
+    Files are read in a thread pool (the pandas and pyarrow parsers release the GIL while
+    tokenizing). If files overlap, a date keeps the row of the last file in `paths`, so a
+    re-downloaded year overrides an older copy.
+
+    :param paths: CSV files, e.g. discover_csv_files().
+    :param workers: Threads to use, defaults to one per file up to the CPU count.
+    :param engine: pandas CSV engine, see read_yield_csv.
+    :return: (dates, yields) with unique, sorted dates and NaN for tenors a file did not quote.
+    """
+    if not paths:
+        return np.empty(0, dtype='datetime64[ns]'), np.empty((0, len(TENORS)))
+    workers = workers or min(len(paths), os.cpu_count() or 1)
+    if workers > 1:
+        with ThreadPoolExecutor(workers) as pool:
+            parsed = list(pool.map(lambda path: read_yield_csv(path, engine), paths))
+    else:
+        parsed = [read_yield_csv(path, engine) for path in paths]
+
+    dates = np.concatenate([file_dates for file_dates, _ in parsed])
+    yields = np.concatenate([file_yields for _, file_yields in parsed])
+
+    # Stable sort keeps file order within a date; the last occurrence of each date wins
+    order = np.argsort(dates, kind='stable')
+    dates, yields = dates[order], yields[order]
+    keep = np.append(dates[1:] != dates[:-1], True)
+    return dates[keep], yields[keep]
+
+
+def _snapshot_paths(data_dir):
+    cache_dir = os.path.join(data_dir, SNAPSHOT_DIR)
+    return (cache_dir,
+            os.path.join(cache_dir, 'yield_dates.npy'),
+            os.path.join(cache_dir, 'yield_matrix.npy'),
+            os.path.join(cache_dir, 'yield_meta.json'))
+
+
+def _read_snapshot(data_dir):
+    _, dates_path, matrix_path, meta_path = _snapshot_paths(data_dir)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        # Memory-mapped, so opening the snapshot does not read it
+        dates = np.load(dates_path, mmap_mode='r')
+        yields = np.load(matrix_path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None, None, None
+    return meta, dates, yields
+
+
+def _write_snapshot(data_dir, store, content_hash):
+    cache_dir, dates_path, matrix_path, meta_path = _snapshot_paths(data_dir)
+    meta = {'signature': store.signature, 'hash': content_hash, 'tenors': store.tenors}
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to temporary files first so a concurrent reader never sees half a snapshot
+        for path, array in ((dates_path, store.dates.view('int64')), (matrix_path, store.yields)):
+            with open(path + '.tmp', 'wb') as f:
+                np.save(f, array)
+            os.replace(path + '.tmp', path)
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+    except OSError:
+        # The snapshot is only a speed-up; a read-only data directory still works
+        pass
+
+
+def _build_store(data_dir):
+    paths = _source_paths(data_dir)
+    signature = _source_signature(paths)
+    meta, dates, yields = _read_snapshot(data_dir)
+
+    if meta is not None and meta.get('tenors') == TENORS:
+        if meta.get('signature') == signature:
+            return YieldStore(dates.view('datetime64[ns]'), yields, TENORS, signature)
+
+        # Files were touched but may be unchanged: compare contents before re-parsing
+        content_hash = _source_hash(paths)
+        if meta.get('hash') == content_hash:
+            store = YieldStore(dates.view('datetime64[ns]'), yields, TENORS, signature)
+            _write_snapshot(data_dir, store, content_hash)
+            return store
+
+    dates, yields = parse_csv_files(paths)
+    store = YieldStore(dates, yields, TENORS, signature)
+    _write_snapshot(data_dir, store, _source_hash(paths))
+    return store
+
+
+def _history_paths(path):
+    return (os.path.join(path, HISTORY_META),
+            os.path.join(path, HISTORY_TIMESTAMPS),
+            os.path.join(path, HISTORY_YIELDS))
+
+
+def is_history(path):
+    """
+    True if path is a memory-mapped history directory created by create_history.
+    """
+    return os.path.exists(os.path.join(path, HISTORY_META))
+
+
+def _read_history_meta(path):
+    with open(_history_paths(path)[0]) as f:
+        return json.load(f)
+
+
+def _write_history_meta(path, meta):
+    meta_path = _history_paths(path)[0]
+    with open(meta_path + '.tmp', 'w') as f:
+        json.dump(meta, f)
+    os.replace(meta_path + '.tmp', meta_path)
+
+
+def create_history(path, tenors=TENORS, dtype='float64'):
+    """
+    Create an empty memory-mapped yield history.
+
+    :param path: Directory of the history.
+    :param tenors: Column labels of the yield matrix.
+    :param dtype: 'float64', or 'float32' to halve the size of long intraday histories.
+    """
+    if np.dtype(dtype) not in (np.float32, np.float64):
+        raise ValueError(f"Unsupported yield dtype: {dtype}")
+    os.makedirs(path, exist_ok=True)
+    _, timestamps_path, yields_path = _history_paths(path)
+    for data_path in (timestamps_path, yields_path):
+        open(data_path, 'wb').close()
+    _write_history_meta(path, {'tenors': list(tenors), 'dtype': np.dtype(dtype).name, 'rows': 0, 'last': None})
+
+
+def append_history(path, dates, yields):
+    """
+    Append curves to a memory-mapped history without rewriting it.
+
+    Rows dated on or before the last stored timestamp are skipped, so re-appending an
+    overlapping batch is harmless. The header is replaced last, so readers only ever see
+    complete rows.
+
+    :param path: Directory of the history.
+    :param dates: Timestamps of the new curves, in increasing order.
+    :param yields: Array of shape (len(dates), tenors).
+    :return: Number of rows appended.
+    """
+    meta = _read_history_meta(path)
+    dates = np.asarray(dates, dtype='datetime64[ns]').view('int64')
+    yields = np.asarray(yields, dtype=meta['dtype']).reshape(len(dates), len(meta['tenors']))
+    if np.any(np.diff(dates) <= 0):
+        raise ValueError("History rows must be in strictly increasing date order.")
+
+    if meta['last'] is not None:
+        newer = dates > meta['last']
+        dates, yields = dates[newer], yields[newer]
+    if len(dates) == 0:
+        return 0
+
+    # Drop any bytes from an interrupted append before writing
+    _, timestamps_path, yields_path = _history_paths(path)
+    row_bytes = len(meta['tenors']) * np.dtype(meta['dtype']).itemsize
+    for data_path, size, array in ((timestamps_path, meta['rows'] * 8, dates),
+                                   (yields_path, meta['rows'] * row_bytes, yields)):
+        with open(data_path, 'r+b') as f:
+            f.truncate(size)
+            f.seek(size)
+            f.write(np.ascontiguousarray(array).tobytes())
+
+    meta['rows'] += len(dates)
+    meta['last'] = int(dates[-1])
+    _write_history_meta(path, meta)
+    return len(dates)
+
+
+def build_history(path, data_dir=None, dtype='float64'):
+    """
+    Create or extend a memory-mapped history from the yearly CSV files.
+
+    Only curves newer than the last stored one are appended, so running this after each
+    data update only writes the new days.
+
+    :param path: Directory of the history.
+    :param data_dir: Directory holding the yearly CSV files, defaults to DATA_DIR.
+    :param dtype: Yield dtype used if the history has to be created.
+    :return: Number of rows appended.
+    """
+    if not is_history(path):
+        create_history(path, TENORS, dtype)
+    dates, yields = parse_csv_files(_source_paths(data_dir or DATA_DIR))
+    return append_history(path, dates, yields)
+
+
+def open_history(path):
+    """
+    Open a memory-mapped history as a read-only YieldStore.
+
+    Opening costs the same for any size of history; pages are read from disk only when the
+    rows or tenors that live on them are used.
+
+    :param path: Directory of the history.
+    :return: A YieldStore whose arrays are backed by the history files.
+    """
+    meta = _read_history_meta(path)
+    _, timestamps_path, yields_path = _history_paths(path)
+    rows, tenors = meta['rows'], meta['tenors']
+    if rows == 0:
+        dates = np.zeros(0, dtype='int64')
+        yields = np.zeros((0, len(tenors)), dtype=meta['dtype'])
+    else:
+        dates = np.memmap(timestamps_path, dtype='int64', mode='r', shape=(rows,))
+        yields = np.memmap(yields_path, dtype=meta['dtype'], mode='r', shape=(rows, len(tenors)))
+    return YieldStore(dates.view('datetime64[ns]'), yields, tenors, ['history', rows, meta['last']])
+
+
+def _history_signature(path):
+    meta = _read_history_meta(path)
+    return ['history', meta['rows'], meta['last']]
+
+
+def get_yield_store(data_dir=None, refresh=False):
+    """
+    Return the process-wide yield store for a data directory.
+
+    The CSV files are parsed at most once per change: later calls only stat the
+    source files, and a new process reloads the binary snapshot instead of parsing.
+    If the directory is a memory-mapped history (see create_history) it is opened
+    directly, and reopened whenever rows have been appended.
+
+    :param data_dir: Directory holding the yearly CSV files or a history, defaults to DATA_DIR.
+    :param refresh: If True, ignore the in-memory store and reload it.
+    :return: A YieldStore.
+    """
+    data_dir = data_dir or DATA_DIR
+    history = is_history(data_dir)
+    store = _stores.get(data_dir)
+    if store is not None and not refresh:
+        signature = _history_signature(data_dir) if history else _source_signature(_source_paths(data_dir))
+        if store.signature == signature:
+            return store
+
+    store = open_history(data_dir) if history else _build_store(data_dir)
+    _stores[data_dir] = store
+    return store
+
+
 def load_my_data():
-    df2023 = pd.read_csv('data/2023.csv')
-    df2024 = pd.read_csv('data/2024.csv')
-    df2025 = pd.read_csv('data/2025.csv')
-    df2025 = df2025.drop('1.5 Month', axis=1)
+    return get_yield_store().to_dataframe()
 
-    #combine into 1 dataframe
-    df = pd.concat([df2023, df2024, df2025], ignore_index=True)
 
-    #convert date column to date time
-    df['Date'] = pd.to_datetime(df['Date'])
+def _get_last_3_months(tenor):
+    """
+    Return the yields of one tenor over the last 3 months of the store.
+    """
+    return get_yield_store().last('3M').column(tenor)
+
 
-    #sort based on date time 
-    df = df.sort_values('Date').reset_index(drop=True)
+def get_dates_from_last_3_months():
+    """
+    Extracts the dates matching the get_*_year_yields_from_last_3_months helpers.
+    :return: A numpy array of datetime64 dates.
+    """
+    return get_yield_store().last('3M').dates
 
-    return df
 
 def get_two_year_yields_from_last_3_months():
     """
     Extracts the 2-years yields from the loaded data.
     :return: A numpy array of 2-year yields.
     """
-    df = load_my_data()
-    if '2 Yr' not in df.columns:
-        raise ValueError("2 Year yields not found in the data.")
+    return _get_last_3_months('2 Yr')
 
-    # Get the last 3 months of data
-    last_3_months = df[df['Date'] >= (df['Date'].max() - pd.DateOffset(months=3))]
-    if '2 Yr' not in last_3_months.columns:
-        raise ValueError("2 Year yields not found in the data.")
-    return last_3_months['2 Yr'].values
 
 def get_five_year_yields_from_last_3_months():
     """
     Extracts the 5-year yields from the loaded data.
     :return: A numpy array of 5-year yields.
     """
-    df = load_my_data()
-    if '5 Yr' not in df.columns:
-        raise ValueError("5 Year yields not found in the data.")
+    return _get_last_3_months('5 Yr')
 
-    # Get the last 3 months of data
-    last_3_months = df[df['Date'] >= (df['Date'].max() - pd.DateOffset(months=3))]
-    if '5 Yr' not in last_3_months.columns:
-        raise ValueError("5 Year yields not found in the data.")
-
-    return last_3_months['5 Yr'].values
 
 def get_ten_year_yields_from_last_3_months():
     """
     Extracts the 10-year yields from the loaded data.
     :return: A numpy array of 10-year yields.
     """
-    df = load_my_data()
-    if '10 Yr' not in df.columns:
-        raise ValueError("10 Year yields not found in the data.")
+    return _get_last_3_months('10 Yr')
+
+
+def _parse_yield_row(fields, columns):
+    """
+    Convert one CSV row into (date, yields) using the column positions of TENORS.
+    """
+    date = np.datetime64(pd.Timestamp(fields[0]), 'ns')
+    yields = np.array([float(fields[i]) if fields[i] else np.nan for i in columns])
+    return date, yields
+
+
+def tail_csv(path, follow=True, poll_interval=1.0, from_start=False):
+    """
+    Yield (date, yields) for every row appended to a yield CSV file.
+
+    :param path: CSV file in the Treasury layout (Date column followed by tenor columns).
+    :param follow: If True keep waiting for new rows, otherwise stop at the end of the file.
+    :param poll_interval: Seconds to wait between checks for new rows.
+    :param from_start: If True also yield the rows already in the file.
+    :return: Generator of (datetime64 date, array of the 13 TENORS yields).
+    """
+    with open(path, newline='') as f:
+        header = next(csv.reader([f.readline()]))
+        if any(tenor not in header for tenor in TENORS):
+            raise ValueError(f"{path} is missing some of the tenor columns {TENORS}.")
+        columns = [header.index(tenor) for tenor in TENORS]
+
+        if not from_start:
+            f.seek(0, os.SEEK_END)
 
-    # Get the last 3 months of data
-    last_3_months = df[df['Date'] >= (df['Date'].max() - pd.DateOffset(months=3))]
-    if '10 Yr' not in last_3_months.columns:
-        raise ValueError("10 Year yields not found in the data.")
+        while True:
+            position = f.tell()
+            line = f.readline()
 
-    return last_3_months['10 Yr'].values
\ No newline at end of file
+            # Wait for a complete line so a row being written is never parsed half-way
+            if not line.endswith('\n') and follow:
+                f.seek(position)
+                time.sleep(poll_interval)
+                continue
+            if not line:
+                return
+            if line.strip():
+                yield _parse_yield_row(next(csv.reader([line])), columns)
+
+
+def iter_queue(rows, stop=None):
+    """
+    Yield (date, yields) rows from a queue.Queue until the stop sentinel is received.
+    """
+    while True:
+        row = rows.get()
+        if row is stop:
+            return
+        yield row
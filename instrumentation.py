@@ -0,0 +1,227 @@
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+from collections import defaultdict
+
+import numpy as np
+
+
+def fit_record(date, result, seconds, tier='', warm_start=True, model='NSS'):
+    """
+    Build the record of one curve fit.
+
+    :param date: Date of the curve, or None.
+    :param result: scipy OptimizeResult of the fit. If the fit ran several solver passes, their
+                   combined counts can be given as result['total_nfev'] / result['total_nit'].
+    :param seconds: Wall time of the fit.
+    :param tier: Optimization tier ('quick', 'moderate', 'intensive') or '' if not tiered.
+    :param warm_start: True if the fit started from the previous day's parameters.
+    :param model: Model name, e.g. 'NSS'.
+    :return: A JSON-serialisable dict.
+    """
+    return {
+        'type': 'fit',
+        'date': None if date is None else str(np.datetime64(date, 'D')),
+        'model': model,
+        'seconds': float(seconds),
+        'iterations': int(result.get('total_nit', result.get('nit', 0))),
+        'nfev': int(result.get('total_nfev', result.get('nfev', 0))),
+        'success': bool(result.get('success', False)),
+        'warm_start': bool(warm_start),
+        'tier': tier,
+    }
+
+
+class MemorySink:
+    """
+    Keeps every record in a list, e.g. for tests or notebooks.
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class JsonlSink:
+    """
+    Appends one JSON object per record to a file.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.file = open(path, 'a')
+
+    def emit(self, record):
+        self.file.write(json.dumps(record) + '\n')
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+class PrometheusSink:
+    """
+    Aggregates the records into counters and writes them in the Prometheus text format,
+    for the node_exporter textfile collector. The file is rewritten atomically on flush().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fits = defaultdict(int)  # (model, tier) -> count
+        self.totals = defaultdict(float)  # (metric, model) -> sum
+        self.stage_seconds = defaultdict(float)
+        self.stage_count = defaultdict(int)
+
+    def emit(self, record):
+        if record['type'] == 'fit':
+            model = record['model']
+            self.fits[(model, record['tier'] or 'none')] += 1
+            self.totals[('seconds', model)] += record['seconds']
+            self.totals[('nfev', model)] += record['nfev']
+            self.totals[('iterations', model)] += record['iterations']
+            self.totals[('failures', model)] += not record['success']
+            self.totals[('warm_starts', model)] += record['warm_start']
+        elif record['type'] == 'stage':
+            self.stage_seconds[record['stage']] += record['seconds']
+            self.stage_count[record['stage']] += 1
+
+    def render(self):
+        """
+        :return: The metrics in the Prometheus text exposition format.
+        """
+        lines = ['# HELP curve_fits_total Curve fits by model and optimization tier.',
+                 '# TYPE curve_fits_total counter']
+        lines += [f'curve_fits_total{{model="{model}",tier="{tier}"}} {count}'
+                  for (model, tier), count in sorted(self.fits.items())]
+
+        descriptions = {
+            'seconds': 'Wall time spent fitting curves.',
+            'nfev': 'Objective function evaluations.',
+            'iterations': 'Solver iterations.',
+            'failures': 'Fits whose solver did not report convergence.',
+            'warm_starts': 'Fits started from the previous day\'s parameters.',
+        }
+        for metric, description in descriptions.items():
+            name = f'curve_fit_{metric}_total'
+            lines += [f'# HELP {name} {description}', f'# TYPE {name} counter']
+            lines += [f'{name}{{model="{model}"}} {value:g}'
+                      for (total, model), value in sorted(self.totals.items()) if total == metric]
+
+        lines += ['# HELP stage_seconds_total Wall time per controller stage.',
+                  '# TYPE stage_seconds_total counter']
+        lines += [f'stage_seconds_total{{stage="{stage}"}} {seconds:g}' for stage, seconds in sorted(self.stage_seconds.items())]
+        lines += ['# HELP stage_runs_total Times each controller stage ran.',
+                  '# TYPE stage_runs_total counter']
+        lines += [f'stage_runs_total{{stage="{stage}"}} {count}' for stage, count in sorted(self.stage_count.items())]
+        return '\n'.join(lines) + '\n'
+
+    def flush(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + '.tmp', 'w') as f:
+            f.write(self.render())
+        os.replace(self.path + '.tmp', self.path)
+
+    def close(self):
+        self.flush()
+
+
+class Instrumentation:
+    """
+    Collects per-fit records and per-stage timings and hands them to pluggable sinks.
+
+    Controllers call record_fit() after every curve fit and wrap their work in stage('load'),
+    stage('fit'), stage('regress'), stage('render'), ... With no sinks and profiling off the
+    overhead is a couple of clock reads per call. With profile=True each stage also runs under
+    its own cProfile profiler, accumulated over every time the stage is entered.
+    """
+
+    def __init__(self, sinks=(), profile=False):
+        """
+        :param sinks: Objects with emit(record), flush() and close(), e.g. MemorySink, JsonlSink, PrometheusSink.
+        :param profile: If True, profile each stage with cProfile.
+        """
+        self.sinks = list(sinks)
+        self.profile = profile
+        self.stage_seconds = defaultdict(float)
+        self.profiles = {}
+        self._active_profile = None
+
+    def emit(self, record):
+        for sink in self.sinks:
+            sink.emit(record)
+
+    def record_fit(self, date, result, seconds, tier='', warm_start=True, model='NSS'):
+        """
+        Emit the record of one curve fit (see fit_record).
+        """
+        if self.sinks:
+            self.emit(fit_record(date, result, seconds, tier, warm_start, model))
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Time (and optionally profile) a block of controller work.
+
+        Nested stages are timed separately, but only the outermost one is profiled since
+        Python allows a single active profiler.
+
+        :param name: Stage name, e.g. 'load', 'fit', 'regress' or 'render'.
+        """
+        profiler = None
+        if self.profile and self._active_profile is None:
+            profiler = self.profiles.setdefault(name, cProfile.Profile())
+            self._active_profile = profiler
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                self._active_profile = None
+            self.stage_seconds[name] += elapsed
+            if self.sinks:
+                self.emit({'type': 'stage', 'stage': name, 'seconds': elapsed})
+
+    def profile_report(self, stage, sort='cumulative', limit=20):
+        """
+        :return: The cProfile statistics of a stage as text, or '' if it was not profiled.
+        """
+        if stage not in self.profiles:
+            return ''
+        output = io.StringIO()
+        pstats.Stats(self.profiles[stage], stream=output).sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def dump_profiles(self, directory):
+        """
+        Write one <stage>.prof file per profiled stage, for snakeviz or pstats.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for stage, profiler in self.profiles.items():
+            profiler.dump_stats(os.path.join(directory, f"{stage}.prof"))
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
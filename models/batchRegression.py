@@ -0,0 +1,235 @@
+from collections import deque
+
+import numpy as np
+
+
+def _solve(gram, moments):
+    """
+    Solve a stack of small normal-equation systems, falling back to the pseudo-inverse
+    if any of them is singular (e.g. a constant regressor inside a window).
+    """
+    try:
+        return np.linalg.solve(gram, moments[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        return (np.linalg.pinv(gram) @ moments[..., None])[..., 0]
+
+
+def _result(coefficients, intercepts, residual_ss, total_ss, n, k):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # A constant target gives R² = 1 for a perfect fit and 0 otherwise, as sklearn's score does
+        r_squared = np.where(total_ss > 0, 1.0 - residual_ss / total_ss,
+                             np.where(residual_ss <= 1e-24, 1.0, 0.0))
+        residual_std = np.sqrt(np.maximum(residual_ss, 0.0) / (n - k - 1)) if n > k + 1 else np.full(np.shape(residual_ss), np.nan)
+    return {
+        'coef': coefficients,
+        'intercept': intercepts,
+        'r_squared': r_squared,
+        'residual_std': residual_std,
+    }
+
+
+def ols(X, y):
+    """
+    Ordinary least squares with an intercept for one regression or a whole stack of them.
+
+    Each problem is centred on its own means and solved through its k x k normal equations,
+    so a batch of small regressions costs a few vectorized passes instead of one model object
+    and one fit per regression.
+
+    :param X: Regressors of shape (n,) or (n, k), or (..., n, k) for a batch of regressions.
+    :param y: Targets of shape (n,), or (..., n) for a batch.
+    :return: dict with 'coef' (..., k), 'intercept' (...), 'r_squared' (...) and 'residual_std' (...),
+             the residual standard error with n - k - 1 degrees of freedom.
+    """
+    y = np.asarray(y, dtype=float)
+    n = y.shape[-1]
+    X = np.asarray(X, dtype=float)
+    if X.ndim == y.ndim:
+        X = X[..., None]
+    if X.shape[-2] != n:
+        raise ValueError("Regressors and targets must have the same number of observations.")
+    k = X.shape[-1]
+
+    x_mean = X.mean(axis=-2)
+    y_mean = y.mean(axis=-1)
+    X_centred = X - x_mean[..., None, :]
+    y_centred = y - y_mean[..., None]
+
+    gram = np.einsum('...ik,...il->...kl', X_centred, X_centred)
+    moments = np.einsum('...ik,...i->...k', X_centred, y_centred)
+    coefficients = _solve(gram, moments)
+    intercepts = y_mean - np.einsum('...k,...k->...', coefficients, x_mean)
+
+    residuals = y_centred - np.einsum('...ik,...k->...i', X_centred, coefficients)
+    residual_ss = np.einsum('...i,...i->...', residuals, residuals)
+    total_ss = np.einsum('...i,...i->...', y_centred, y_centred)
+    return _result(coefficients, intercepts, residual_ss, total_ss, n, k)
+
+
+def rolling_ols(X, y, window):
+    """
+    OLS over every trailing window of a time series, e.g. rolling hedge ratios.
+
+    Cross-products are accumulated once with cumulative sums (on data centred by its overall
+    mean, to keep the sums small), so each window's normal equations cost O(k²) regardless of
+    the window length.
+
+    :param X: Regressors of shape (T,) or (T, k).
+    :param y: Targets of shape (T,).
+    :param window: Window length in observations.
+    :return: dict as returned by ols(), with a leading axis of T - window + 1 windows;
+             window i covers observations i .. i + window - 1.
+    """
+    y = np.asarray(y, dtype=float)
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X[:, None]
+    if len(X) != len(y):
+        raise ValueError("Regressors and targets must have the same number of observations.")
+    if window > len(y):
+        raise ValueError("Window is longer than the series.")
+    k = X.shape[1]
+
+    x_centre, y_centre = X.mean(axis=0), y.mean()
+    X, y = X - x_centre, y - y_centre
+
+    def window_sums(values):
+        sums = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+        return sums[window:] - sums[:-window]
+
+    sum_x = window_sums(X)
+    sum_y = window_sums(y)
+    sum_xx = window_sums(X[:, :, None] * X[:, None, :])
+    sum_xy = window_sums(X * y[:, None])
+    sum_yy = window_sums(y * y)
+
+    # Normal equations of the windows, centred on each window's own means
+    x_mean = sum_x / window
+    y_mean = sum_y / window
+    gram = sum_xx - window * x_mean[:, :, None] * x_mean[:, None, :]
+    moments = sum_xy - window * x_mean * y_mean[:, None]
+    total_ss = sum_yy - window * y_mean ** 2
+
+    coefficients = _solve(gram, moments)
+    residual_ss = total_ss - np.einsum('wk,wk->w', coefficients, moments)
+    intercepts = y_mean + y_centre - np.einsum('wk,wk->w', coefficients, x_mean + x_centre)
+    return _result(coefficients, intercepts, np.maximum(residual_ss, 0.0), np.maximum(total_ss, 0.0), window, k)
+
+
+class RecursiveLeastSquares:
+    """
+    OLS with an intercept, updated one observation at a time.
+
+    Each new observation is a rank-one Sherman-Morrison update of the inverse normal matrix, so
+    hedge ratios for every day of a history come from one pass instead of one fit per day. With
+    a window, the oldest observation is removed by the matching rank-one downdate. The solution
+    is recomputed exactly from the stored window once per window length of removals, so rounding
+    from the downdates cannot build up.
+    """
+
+    def __init__(self, n_features, window=None):
+        """
+        :param n_features: Number of regressors (the intercept is added automatically).
+        :param window: None for an expanding window, or the number of most recent observations to fit.
+        """
+        if window is not None and window < n_features + 2:
+            raise ValueError("Window must contain more observations than coefficients.")
+        self.n_features = n_features
+        self.window = window
+        self.rows = deque()
+        self.inverse = None  # (X'X)^-1 of the augmented regressors once enough rows have arrived
+        self.theta = np.zeros(n_features + 1)  # [intercept, coefficients...]
+        self.removals = 0
+
+    @property
+    def ready(self):
+        return self.inverse is not None
+
+    @property
+    def coef(self):
+        return self.theta[1:]
+
+    @property
+    def intercept(self):
+        return self.theta[0]
+
+    def _anchor(self):
+        X = np.array([row for row, _ in self.rows])
+        y = np.array([target for _, target in self.rows])
+        self.inverse = np.linalg.pinv(X.T @ X)
+        self.theta = self.inverse @ (X.T @ y)
+
+    def predict(self, x):
+        """
+        Prediction for regressors x with the current coefficients.
+        """
+        return self.theta[0] + np.dot(self.theta[1:], x)
+
+    def update(self, x, y):
+        """
+        Add one observation, dropping the oldest one once the window is full.
+
+        :param x: The regressors of the new observation.
+        :param y: The target of the new observation.
+        """
+        row = np.concatenate([[1.0], np.asarray(x, dtype=float)])
+        self.rows.append((row, float(y)))
+
+        if self.inverse is None:
+            # Exact start once the system is determined
+            if len(self.rows) >= self.n_features + 2:
+                self._anchor()
+            return
+
+        projected = self.inverse @ row
+        gain = projected / (1.0 + row @ projected)
+        self.theta = self.theta + gain * (y - row @ self.theta)
+        self.inverse = self.inverse - np.outer(gain, projected)
+
+        if self.window is not None and len(self.rows) > self.window:
+            old_row, old_y = self.rows.popleft()
+            self.removals += 1
+            if self.removals % self.window == 0:
+                self._anchor()
+                return
+            projected = self.inverse @ old_row
+            gain = projected / (1.0 - old_row @ projected)
+            self.theta = self.theta - gain * (old_y - old_row @ self.theta)
+            self.inverse = self.inverse + np.outer(gain, projected)
+
+
+def recursive_ols(X, y, window=None):
+    """
+    Daily OLS coefficients over an expanding or rolling window, in one pass with RecursiveLeastSquares.
+
+    Before each update the current coefficients predict the new observation, which gives
+    out-of-sample residuals: day t is judged with coefficients fitted up to day t - 1.
+
+    :param X: Regressors of shape (T,) or (T, k).
+    :param y: Targets of shape (T,).
+    :param window: None for expanding windows, or the rolling window length.
+    :return: dict with 'coef' (T, k) and 'intercept' (T,) fitted up to and including each day,
+             and out-of-sample 'residuals' (T,); NaN until enough observations have arrived.
+    """
+    y = np.asarray(y, dtype=float)
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X[:, None]
+    if len(X) != len(y):
+        raise ValueError("Regressors and targets must have the same number of observations.")
+
+    n, k = X.shape
+    coefficients = np.full((n, k), np.nan)
+    intercepts = np.full(n, np.nan)
+    residuals = np.full(n, np.nan)
+    model = RecursiveLeastSquares(k, window)
+
+    for t in range(n):
+        if model.ready:
+            residuals[t] = y[t] - model.predict(X[t])
+        model.update(X[t], y[t])
+        if model.ready:
+            coefficients[t] = model.coef
+            intercepts[t] = model.intercept
+
+    return {'coef': coefficients, 'intercept': intercepts, 'residuals': residuals}
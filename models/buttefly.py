@@ -1,9 +1,13 @@
 import numpy as np
-from sklearn.linear_model import LinearRegression
+
+from models.batchRegression import ols, recursive_ols
+from models.spreadMeanCalculator import MeanReversionCalculator, RollingStatistics
+
+
 class Butterfly:
     def __init__(self, maturities):
         self.maturities = maturities
-        self.model = LinearRegression()
+        self.regression = None  # Last hedge regression from models.batchRegression.ols
         self.weights = np.array([-1, 2.0, -1])  # Weights for the butterfly spread
 
     def calculate_butterfly_spread(self, y1, y2, y3):
@@ -12,8 +16,8 @@ class Butterfly:
         # 2.0 for the middle maturity, which is a common configuration for butterfly spreads
         
 
-        # Calculate the butterfly spread with dot product using the weights
-        return np.dot(np.array([-1, 2.0, -1]), [y1, y2, y3])
+        # Calculate the butterfly spread directly from the weights (works on scalars and arrays alike)
+        return 2.0 * np.asarray(y2, dtype=float) - y1 - y3
     
     def compare_butterfly_spread(self, butterfly_spread_1, butterfly_spread_2):
         """
@@ -31,23 +35,237 @@ class Butterfly:
         
         :param X: The independent variables (features) matrix of shape (n_samples, n_features).
         :param y: The butterfly spread values (target) of shape (n_samples,).
-        :return: The fitted model.
+        :return: dict with the regression 'coef', 'intercept', 'r_squared' and 'residual_std'.
         """
-        # Ensure X is 2D array for sklearn
+        # Ensure X is a 2D array
         if X.ndim == 1:
             X = X.reshape(1, -1)
         
-        # Ensure y is 1D array for sklearn
+        # Ensure y is a 1D array
         if hasattr(y, 'ndim') and y.ndim > 1:
             y = y.ravel()
         
-        self.model.fit(X, y)
+        self.regression = ols(X, y)
 
         # Return the coefficients of the fitted model
-        beta1, beta2 = self.model.coef_
+        beta1, beta2 = self.regression['coef']
 
         # Update weights based on regression coefficients
         # Keep middle weight as 1.0 for duration neutrality
         self.weights = np.array([beta1, 1.0, beta2])
         
-        return self.model
+        return self.regression
+
+    def rolling_hedge_ratios(self, X, y, window=None, z_window=60):
+        """
+        Daily hedge ratios from recursive least squares instead of one regression over the whole sample.
+
+        Each day's residual uses the coefficients fitted up to the previous day, so the hedged
+        butterfly is out of sample. Its z-score is measured against the trailing residuals.
+
+        :param X: The independent variables (features) matrix of shape (n_samples, n_features).
+        :param y: The butterfly spread values (target) of shape (n_samples,).
+        :param window: None for an expanding window, or the rolling window length in days.
+        :param z_window: Window length in days for the residual z-scores.
+        :return: dict with daily 'coef', 'intercept', out-of-sample 'residuals' and their 'z_scores'.
+        """
+        result = recursive_ols(X, y, window)
+        statistics = RollingStatistics(z_window)
+        z_scores = np.full(len(result['residuals']), np.nan)
+        for t, residual in enumerate(result['residuals']):
+            if not np.isnan(residual):
+                z_score = statistics.update(residual)['z_score']
+                z_scores[t] = np.nan if z_score is None else z_score
+        result['z_scores'] = z_scores
+        return result
+
+
+
+class ButterflyScanner:
+    """
+    Every (wing, belly, wing) butterfly of a yield matrix on every day.
+
+    The yield matrix can hold market yields or fitted curves (e.g. NSS curves for many days).
+    Each triple's weights are scattered into one (tenors x triples) weight matrix, so the
+    butterflies of all triples and all days come from a single matrix product. All weighting
+    schemes are scaled to a belly weight of 2, so they are comparable with the 1:2:1 fly.
+    """
+
+    def __init__(self, yields, tenors, maturities):
+        """
+        :param yields: Yield matrix of shape (days, tenors).
+        :param tenors: Tenor labels in column order, e.g. csvReader.TENORS.
+        :param maturities: Maturities in years of each column.
+        """
+        self.yields = np.asarray(yields, dtype=float)
+        self.tenors = list(tenors)
+        self.maturities = np.asarray(maturities, dtype=float)
+        if self.yields.ndim != 2 or self.yields.shape[1] != len(self.tenors) or len(self.maturities) != len(self.tenors):
+            raise ValueError("Yield matrix must have one column and one maturity per tenor.")
+        self.calculator = MeanReversionCalculator()
+
+    def triple_indices(self, triples=None):
+        """
+        Resolve a triple selection into a (triples, 3) index array of (short wing, belly, long wing).
+
+        :param triples: None for every triple of increasing maturities, or a list of
+                        (wing, belly, wing) tenor labels or column indices.
+        """
+        if triples is None:
+            n = len(self.tenors)
+            grid = np.array(np.meshgrid(np.arange(n), np.arange(n), np.arange(n), indexing='ij')).reshape(3, -1).T
+            return grid[(grid[:, 0] < grid[:, 1]) & (grid[:, 1] < grid[:, 2])]
+
+        return np.array([[self.tenors.index(t) if isinstance(t, str) else int(t) for t in triple]
+                         for triple in triples], dtype=int).reshape(-1, 3)
+
+    def triple_labels(self, triples=None):
+        """
+        Labels such as '2 Yr/5 Yr/10 Yr', in the column order of spreads().
+        """
+        return ['/'.join(self.tenors[k] for k in triple) for triple in self.triple_indices(triples)]
+
+    def durations(self, yields=None):
+        """
+        Modified durations of par bonds with semiannual coupons, priced at each day's yields.
+
+        :param yields: Optional (days, tenors) yield matrix in percent, defaults to self.yields.
+        :return: Array of the same shape, in years.
+        """
+        y = (self.yields if yields is None else np.asarray(yields, dtype=float)) / 100.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            durations = (1.0 - (1.0 + y / 2.0) ** (-2.0 * self.maturities)) / y
+        # At a zero yield the par bond's duration is its maturity
+        return np.where(np.abs(y) < 1e-12, self.maturities, durations)
+
+    def duration_weights(self, triples=None, yields=None):
+        """
+        Day-by-day weights of cash- and DV01-neutral flies.
+
+        The belly notional is 2. The wing notionals add up to -2 (cash neutral) and their DV01s
+        offset the belly's (duration neutral), using the par-bond durations of each day's yields.
+
+        :param yields: Optional (days, tenors) yield matrix, defaults to self.yields.
+        :return: Array of shape (days, triples, 3).
+        """
+        indices = self.triple_indices(triples)
+        d1, d2, d3 = np.moveaxis(self.durations(yields)[:, indices], 2, 0)
+        short_weight = (d3 - d2) / (d3 - d1)
+        return 2.0 * np.stack([-short_weight, np.ones_like(short_weight), short_weight - 1.0], axis=-1)
+
+    def weights(self, method='fixed', triples=None):
+        """
+        Weights of every selected triple.
+
+        'fixed' is the classic -1:2:-1 fly. 'maturity' interpolates the belly linearly between
+        the wings, so the fly is neutral to a parallel shift and to a slope change that is linear
+        in maturity. 'duration' does the same with par-bond durations instead of maturities,
+        which makes the fly cash- and DV01-neutral; as durations move with yields, these
+        weights change every day (see duration_weights). 'regression' hedges the belly with
+        both wings by ordinary least squares over the whole history, as
+        multilinear_regression_hedging does for a single fly.
+
+        :param method: 'fixed', 'maturity', 'duration' or 'regression'.
+        :return: Array of shape (triples, 3) with the belly weight equal to 2,
+                 or (days, triples, 3) for 'duration'.
+        """
+        indices = self.triple_indices(triples)
+        if method == 'duration':
+            return self.duration_weights(triples)
+
+        if method == 'fixed':
+            return np.tile([-1.0, 2.0, -1.0], (len(indices), 1))
+
+        if method == 'maturity':
+            m1, m2, m3 = self.maturities[indices].T
+            short_weight = (m3 - m2) / (m3 - m1)
+            return 2.0 * np.column_stack([-short_weight, np.ones(len(indices)), short_weight - 1.0])
+
+        if method == 'regression':
+            # belly = a + b1 * short wing + b3 * long wing, every triple solved as one batch
+            wings = self.yields[:, indices[:, [0, 2]]].transpose(1, 0, 2)
+            belly = self.yields[:, indices[:, 1]].T
+            coefficients = ols(wings, belly)['coef']
+            return 2.0 * np.column_stack([-coefficients[:, 0], np.ones(len(indices)), -coefficients[:, 1]])
+
+        raise ValueError(f"Unknown butterfly weighting: {method}")
+
+    def weight_matrix(self, method='fixed', triples=None):
+        """
+        Scatter the triple weights into a (tenors, triples) matrix, so spreads are yields @ matrix.
+        Not available for 'duration' weights, which differ from day to day.
+        """
+        if method == 'duration':
+            raise ValueError("Duration weights change every day and have no single weight matrix.")
+        indices = self.triple_indices(triples)
+        matrix = np.zeros((len(self.tenors), len(indices)))
+        columns = np.repeat(np.arange(len(indices)), 3)
+        np.add.at(matrix, (indices.ravel(), columns), self.weights(method, triples).ravel())
+        return matrix
+
+    def spreads(self, method='fixed', triples=None):
+        """
+        Butterfly spreads of every selected triple on every day.
+
+        :return: Array of shape (days, triples).
+        """
+        return self._spreads(self.yields, method, triples)
+
+    def _spreads(self, yields, method, triples):
+        if method == 'duration':
+            indices = self.triple_indices(triples)
+            return np.einsum('dtk,dtk->dt', yields[:, indices], self.duration_weights(triples, yields))
+        return yields @ self.weight_matrix(method, triples)
+
+    def summary(self, method='fixed', triples=None):
+        """
+        Summary statistics of every selected butterfly over the whole history.
+
+        :return: dict of 'labels' and per-triple 'mean', 'std', 'min', 'max' and 'last' arrays.
+        """
+        spreads = self.spreads(method, triples)
+        return {
+            'labels': self.triple_labels(triples),
+            'mean': spreads.mean(axis=0),
+            'std': spreads.std(axis=0),
+            'min': spreads.min(axis=0),
+            'max': spreads.max(axis=0),
+            'last': spreads[-1],
+        }
+
+    def rolling_z_scores(self, window=60, method='fixed', triples=None):
+        """
+        Trailing-window z-score of every selected butterfly on every day.
+
+        :return: Array of shape (days, triples), NaN until the window is full.
+        """
+        statistics = self.calculator.rolling_statistics(self.spreads(method, triples), (window,), extremes=False)
+        return statistics[window]['z_score']
+
+    def rank(self, window=60, method='fixed', triples=None, top=10):
+        """
+        Rank the butterflies by how far today's value is from its trailing window.
+
+        A positive z-score means the belly yields more than usual against the wings (cheap belly),
+        a negative one that it yields less (rich belly).
+
+        :param window: Window length in days for the z-scores.
+        :param method: 'fixed', 'maturity', 'duration' or 'regression' weights.
+        :param triples: None for every triple, or a list of (wing, belly, wing) tenors.
+        :param top: Number of butterflies to return.
+        :return: List of dicts with 'butterfly', 'spread', 'z_score' and 'belly' ('cheap'/'rich').
+        """
+        # Only today's z-score is ranked, so only the last window is needed
+        recent = self._spreads(self.yields[-window:], method, triples)
+        spreads = recent[-1]
+        std = recent.std(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_scores = np.where(std > 0, (spreads - recent.mean(axis=0)) / std, np.nan)
+        if len(recent) < window:
+            z_scores[:] = np.nan
+
+        # NaN z-scores (flat butterflies or a short history) sort last
+        order = np.argsort(-np.nan_to_num(np.abs(z_scores), nan=-1.0), kind='stable')[:top]
+        labels = self.triple_labels(triples)
+        return [{'butterfly': labels[k], 'spread': spreads[k], 'z_score': z_scores[k],
+                 'belly': 'cheap' if z_scores[k] > 0 else 'rich'} for k in order]
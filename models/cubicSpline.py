@@ -1,18 +1,30 @@
 import numpy as np
-import pandas as pd
 from scipy.interpolate import CubicSpline
 
 class CubicSplineAnalyzer:
 
     def __init__(self,df):
+        # The history: a YieldStore, or a DataFrame with a Date column followed by the tenors
         self.df = df
         self.maturities = np.array([
             1/12, 2/12, 3/12, 4/12, 6/12, 1, 2, 3, 5, 7, 10, 20, 30
         ])
+        # Spline coefficients of every day in df, built once per boundary condition
+        self.coefficients = {}
+
+    def _history(self):
+        """
+        Dates and yields of the history, straight from a YieldStore or copied out of a DataFrame.
+        """
+        if hasattr(self.df, 'yields'):
+            return self.df.dates, self.df.yields
+        return self.df['Date'].to_numpy(dtype='datetime64[ns]'), self.df.iloc[:, 1:].to_numpy(dtype=float)
 
     def calculate_spline(self, y, bc_type='natural'):
         """
         Calculate the cubic spline for the given x and y values.
+
+        Missing (NaN) yields are skipped, so the spline runs through the observed maturities only.
         
         :param y: The y values (yields).
         :param bc_type: Boundary condition type:
@@ -22,7 +34,112 @@ class CubicSplineAnalyzer:
         :return: A CubicSpline object representing the spline.
         """
 
+        y = np.asarray(y, dtype=float)
+        observed = ~np.isnan(y)
+        if observed.sum() < 2:
+            raise ValueError("A spline needs at least 2 observed yields.")
+
         # Create a cubic spline with specified boundary conditions
-        spline = CubicSpline(self.maturities, y, bc_type=bc_type)
+        spline = CubicSpline(self.maturities[observed], y[observed], bc_type=bc_type)
+
+        return spline
+
+    def spline_coefficients(self, bc_type='natural', yields=None, mask=None):
+        """
+        Build the cubic splines of many days at once as one coefficient tensor.
+
+        Without yields the days of self.df are used and the coefficients are cached per
+        boundary condition, so the splines are only solved once.
+
+        Each day is splined through its observed tenors only (NaN yields and tenors outside the
+        mask are skipped). Days sharing a pattern of observed tenors are solved together, and
+        their splines are re-expanded on all 12 maturity intervals, so evaluate_surface treats
+        every day alike.
+
+        :param bc_type: Boundary condition, as for calculate_spline.
+        :param yields: Optional (days, 13) yield matrix instead of the days in self.df.
+        :param mask: Optional (days, 13) boolean array, True for the tenors to use.
+        :return: Array of shape (4, 12, days): the cubic coefficients of every maturity interval and day;
+                 NaN for days with fewer than 2 observed tenors.
+        """
+        cached = yields is None and mask is None
+        if cached and bc_type in self.coefficients:
+            return self.coefficients[bc_type]
+
+        data = yields if yields is not None else self._history()[1]
+        data = np.asarray(data, dtype=float)
+        observed = ~np.isnan(data)
+        if mask is not None:
+            observed &= np.asarray(mask, dtype=bool)
+
+        if observed.all():
+            coefficients = CubicSpline(self.maturities, data, axis=1, bc_type=bc_type).c
+        else:
+            coefficients = np.full((4, len(self.maturities) - 1, len(data)), np.nan)
+            patterns, inverse = np.unique(observed, axis=0, return_inverse=True)
+            for pattern_index, pattern in enumerate(patterns):
+                if pattern.sum() < 2:
+                    continue
+                days = np.flatnonzero(inverse.reshape(-1) == pattern_index)
+                spline = CubicSpline(self.maturities[pattern], data[days][:, pattern], axis=1, bc_type=bc_type)
+                coefficients[:, :, days] = self._expand_coefficients(spline, self.maturities[pattern])
+
+        if cached:
+            self.coefficients[bc_type] = coefficients
+        return coefficients
+
+    def _expand_coefficients(self, spline, knots):
+        """
+        Re-express a spline built on a subset of the maturities on every maturity interval.
+
+        Each interval's cubic is the piece of the reduced spline that covers it (the end pieces
+        extrapolate), re-centred on the interval's left maturity from its value and derivatives there.
+        """
+        left = self.maturities[:-1]
+        piece = np.clip(np.searchsorted(knots, left, side='right') - 1, 0, len(knots) - 2)
+        dx = (left - knots[piece])[:, None]
+        c = spline.c[:, piece]  # (4, 12, days)
+        return np.stack([c[0],
+                         3 * c[0] * dx + c[1],
+                         (3 * c[0] * dx + 2 * c[1]) * dx + c[2],
+                         ((c[0] * dx + c[1]) * dx + c[2]) * dx + c[3]])
+
+    def evaluate_surface(self, maturities, rows=None, dates=None, bc_type='natural', yields=None, mask=None):
+        """
+        Evaluate the splines of many days on any maturity grid in one vectorized call.
+
+        Outside the benchmark maturities the end polynomials are extrapolated, as CubicSpline does.
+
+        :param maturities: Maturities in years to evaluate.
+        :param rows: Optional day indices (or boolean mask) to evaluate, defaults to every day.
+        :param dates: Optional dates to evaluate instead of rows; each must be a date in self.df.
+        :param bc_type: Boundary condition, as for calculate_spline.
+        :param yields: Optional (days, 13) yield matrix instead of the days in self.df.
+        :param mask: Optional (days, 13) boolean array of the tenors to spline through, see spline_coefficients.
+        :return: Array of shape (days, len(maturities)).
+        """
+        coefficients = self.spline_coefficients(bc_type, yields, mask)
+        if dates is not None:
+            all_dates = self._history()[0]
+            wanted = np.asarray(dates, dtype='datetime64[ns]')
+            rows = np.searchsorted(all_dates, wanted)
+            if np.any(rows >= len(all_dates)) or np.any(all_dates[np.minimum(rows, len(all_dates) - 1)] != wanted):
+                raise ValueError("Dates not found in the data.")
+        if rows is not None:
+            coefficients = coefficients[:, :, rows]
+        return self.evaluate_coefficients(coefficients, maturities)
+
+    def evaluate_coefficients(self, coefficients, maturities):
+        """
+        Evaluate a (4, 12, days) coefficient tensor from spline_coefficients on a maturity grid.
+
+        :return: Array of shape (days, len(maturities)).
+        """
+        grid = np.atleast_1d(np.asarray(maturities, dtype=float))
+        interval = np.clip(np.searchsorted(self.maturities, grid, side='right') - 1, 0, len(self.maturities) - 2)
+        dx = (grid - self.maturities[interval])[:, None]
+        c = coefficients[:, interval]  # (4, grid, days)
 
-        return spline
\ No newline at end of file
+        # Horner's scheme for every grid point and day at once
+        values = ((c[0] * dx + c[1]) * dx + c[2]) * dx + c[3]
+        return values.T
@@ -0,0 +1,126 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from models.cubicSpline import CubicSplineAnalyzer
+from models.nelsonSiegelModel import NelsonSiegelModel
+
+PARAM_COUNTS = {'nss': 6, 'ns': 4}
+
+
+class CurveSurface:
+    """
+    Yield surfaces (dates x maturities) from a table of fitted curves.
+
+    One object holds every day's curve, as NSS or NS parameters or as spline coefficients,
+    and evaluate() returns the yields of any set of dates on any maturities in one vectorized
+    call. Recently requested surfaces are kept in an LRU, so hot grids (e.g. the monthly grid
+    used by every pricing run) are computed once.
+    """
+
+    def __init__(self, dates, model='nss', params=None, yields=None, mask=None, bc_type='natural', cache_size=16):
+        """
+        :param dates: Sorted dates of the curves.
+        :param model: 'nss', 'ns' or 'spline'.
+        :param params: (days, 6) NSS or (days, 4) NS parameters, for the parametric models.
+        :param yields: (days, 13) market yields, for 'spline'; NaN tenors are skipped.
+        :param mask: Optional (days, 13) boolean array of the tenors to spline through.
+        :param bc_type: Spline boundary condition.
+        :param cache_size: Number of surfaces kept in the LRU, 0 to disable it.
+        """
+        self.dates = np.asarray(dates, dtype='datetime64[ns]')
+        self.model = model
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+
+        if model in PARAM_COUNTS:
+            if params is None:
+                raise ValueError(f"The {model.upper()} surface needs a parameter table.")
+            self.params = np.atleast_2d(np.asarray(params, dtype=float))
+            if self.params.shape[1] != PARAM_COUNTS[model]:
+                raise ValueError(f"{model.upper()} parameters must have {PARAM_COUNTS[model]} columns.")
+            self.curves = NelsonSiegelModel(None)
+            size = len(self.params)
+        elif model == 'spline':
+            if yields is None:
+                raise ValueError("The spline surface needs the market yields.")
+            self.curves = CubicSplineAnalyzer(None)
+            self.coefficients = self.curves.spline_coefficients(bc_type, np.atleast_2d(yields), mask)
+            size = self.coefficients.shape[2]
+        else:
+            raise ValueError(f"Unknown curve model: {model}")
+
+        if size != len(self.dates):
+            raise ValueError("There must be one curve per date.")
+
+    @classmethod
+    def from_table(cls, table, model='nss', **kwargs):
+        """
+        Build a parametric surface from a fit table with a 'Date' column, e.g. NelsonSiegelController.run_batch().
+
+        :param table: DataFrame with 'Date' and the parameter columns in order (β0, β1, β2, [β3], λ0, [λ1]).
+        """
+        columns = [column for column in table.columns if column[0] in 'βλ']
+        return cls(table['Date'].to_numpy(), model, params=table[columns].to_numpy(dtype=float), **kwargs)
+
+    def rows(self, dates):
+        """
+        Row indices of dates, which must all be curve dates.
+        """
+        wanted = np.atleast_1d(np.asarray(dates, dtype='datetime64[ns]'))
+        rows = np.searchsorted(self.dates, wanted)
+        found = (rows < len(self.dates)) & (self.dates[np.minimum(rows, len(self.dates) - 1)] == wanted)
+        if not found.all():
+            raise ValueError(f"No curve on {str(wanted[~found][0])[:10]}.")
+        return rows
+
+    def _evaluate(self, maturities, rows):
+        if self.model == 'nss':
+            params = self.params if rows is None else self.params[rows]
+            return self.curves.nelson_siegel_svensson_batch(params, maturities)
+        if self.model == 'ns':
+            params = self.params if rows is None else self.params[rows]
+            return self.curves.nelson_siegel_batch(params, maturities)
+
+        coefficients = self.coefficients if rows is None else self.coefficients[:, :, rows]
+        return self.curves.evaluate_coefficients(coefficients, maturities)
+
+    def evaluate(self, maturities, dates=None, rows=None):
+        """
+        Yields of the selected days on a maturity grid.
+
+        :param maturities: Maturities in years, e.g. np.arange(1, 241) / 12 for monthly tenors to 20 years.
+        :param dates: Dates to evaluate; each must be a curve date.
+        :param rows: Row indices to evaluate instead of dates. Every day if both are None.
+        :return: Read-only array of shape (days, len(maturities)).
+        """
+        maturities = np.atleast_1d(np.asarray(maturities, dtype=float))
+        if dates is not None:
+            rows = self.rows(dates)
+        elif rows is not None:
+            rows = np.asarray(rows)
+            if rows.dtype == bool:
+                rows = np.flatnonzero(rows)
+
+        if self.cache_size <= 0:
+            return self._evaluate(maturities, rows)
+
+        key = (maturities.tobytes(), None if rows is None else rows.astype(np.int64).tobytes())
+        surface = self.cache.get(key)
+        if surface is not None:
+            self.cache.move_to_end(key)
+            return surface
+
+        surface = self._evaluate(maturities, rows)
+        # Cached surfaces are shared between callers, so guard them against mutation
+        surface.flags.writeable = False
+        self.cache[key] = surface
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return surface
+
+    def evaluate_at(self, date, maturities):
+        """
+        One day's curve on a maturity grid, shape (len(maturities),).
+        """
+        return self.evaluate(maturities, dates=[date])[0]
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+
+class FitCache:
+    """
+    Persistent cache of daily curve fits.
+
+    Entries are keyed by (date, hash of that day's yields, model type, bounds, solver settings),
+    so editing one day's data or changing the bounds only invalidates the affected entries.
+    Fits are stored column by column in a single .npz file and served through an in-memory LRU.
+    """
+
+    def __init__(self, path=os.path.join('data', '.cache', 'nss_fits.npz'), max_memory_entries=4096):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.memory = OrderedDict()
+        self.pending = {}
+        self._disk_index = None
+        self._disk_columns = None
+
+    @staticmethod
+    def make_key(date, daily_yields, model_type, bounds, solver_settings):
+        """
+        Build the cache key for one day's fit.
+
+        :param date: Date of the curve (anything numpy can convert to datetime64).
+        :param daily_yields: The day's market yields.
+        :param model_type: Model name, e.g. 'NSS' or 'NS'.
+        :param bounds: Parameter bounds used by the solver.
+        :param solver_settings: JSON-serialisable dict of solver options (iteration limits, thresholds, ...).
+        :return: A string key.
+        """
+        day = str(np.datetime64(date, 'D'))
+        yields_hash = hashlib.sha1(np.ascontiguousarray(daily_yields, dtype=np.float64).tobytes()).hexdigest()[:16]
+        settings = json.dumps([[list(b) for b in bounds], solver_settings], sort_keys=True, default=str)
+        settings_hash = hashlib.sha1(settings.encode()).hexdigest()[:16]
+        return f"{day}|{yields_hash}|{model_type}|{settings_hash}"
+
+    def _load_disk(self):
+        if self._disk_index is not None:
+            return
+        self._disk_index = {}
+        self._disk_columns = None
+        try:
+            with np.load(self.path) as data:
+                self._disk_columns = {name: data[name] for name in data.files}
+        except (OSError, ValueError):
+            return
+        self._disk_index = {key: row for row, key in enumerate(self._disk_columns['keys'])}
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        Return the cached fit for a key, or None.
+
+        :return: dict with 'params', 'r_squared', 'iterations', 'errors' and 'tier'.
+        """
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+        if key in self.pending:
+            return self.pending[key]
+
+        self._load_disk()
+        row = self._disk_index.get(key)
+        if row is None:
+            return None
+        columns = self._disk_columns
+        entry = {
+            'params': columns['params'][row],
+            'r_squared': float(columns['r_squared'][row]),
+            'iterations': int(columns['iterations'][row]),
+            'errors': columns['errors'][row],
+            'tier': str(columns['tiers'][row]),
+        }
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key, params, r_squared, iterations, errors, tier=''):
+        """
+        Add a fit to the cache. Call save() to persist it.
+        """
+        entry = {
+            'params': np.asarray(params, dtype=np.float64),
+            'r_squared': float(r_squared),
+            'iterations': int(iterations),
+            'errors': np.asarray(errors, dtype=np.float64),
+            'tier': tier,
+        }
+        self.pending[key] = entry
+        self._remember(key, entry)
+
+    def save(self):
+        """
+        Merge the pending fits into the on-disk file.
+        """
+        if not self.pending:
+            return
+        self._load_disk()
+
+        # Start from the existing rows, overwriting any that were refitted
+        rows = {}
+        if self._disk_columns is not None:
+            columns = self._disk_columns
+            for key, row in self._disk_index.items():
+                if key not in self.pending:
+                    rows[key] = (columns['params'][row], columns['r_squared'][row], columns['iterations'][row],
+                                 columns['errors'][row], columns['tiers'][row])
+        for key, entry in self.pending.items():
+            rows[key] = (entry['params'], entry['r_squared'], entry['iterations'], entry['errors'], entry['tier'])
+
+        keys = list(rows)
+        values = list(zip(*rows.values()))
+        columns = {
+            'keys': np.array(keys),
+            'params': np.array(values[0], dtype=np.float64).reshape(len(keys), -1),
+            'r_squared': np.array(values[1], dtype=np.float64),
+            'iterations': np.array(values[2], dtype=np.int64),
+            'errors': np.array(values[3], dtype=np.float64).reshape(len(keys), -1),
+            'tiers': np.array(values[4], dtype=str),
+        }
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.tmp', 'wb') as f:
+            np.savez(f, **columns)
+        os.replace(self.path + '.tmp', self.path)
+
+        self._disk_columns = columns
+        self._disk_index = {key: row for row, key in enumerate(keys)}
+        self.pending = {}
@@ -0,0 +1,146 @@
+import time
+
+import numpy as np
+
+from models.nelsonSiegelModel import NelsonSiegelModel
+
+
+class FitScheduler:
+    """
+    Adaptive NSS fit of one day at a time, escalating only as far as the fit needs.
+
+    Every day starts with a short L-BFGS-B step from the warm start. If the fit is not yet good
+    enough, the local search resumes from where the previous step stopped, in further short
+    steps, until the fit meets its targets or the solver is stationary. Only a day that is
+    stationary and still poor escalates to the multi-start search. The escalation is driven by
+    the projected gradient norm, R² and the segment-error targets, not by fixed iteration caps,
+    and the work beyond the first step is limited by a per-day and a per-run time budget.
+    """
+
+    def __init__(self, bounds, good_error=0.05, acceptable_error=0.15, r_squared_target=0.90,
+                 gradient_tolerance=1e-4, step_iterations=50, max_iterations=1000,
+                 day_budget=1.0, run_budget=None, multistart=None):
+        """
+        :param bounds: NSS parameter bounds.
+        :param good_error: A day whose segment errors are all below this (and meets the R² target) is done.
+        :param acceptable_error: A stationary day with every segment error below this is not escalated further.
+        :param r_squared_target: Minimum R² of a good or acceptable fit.
+        :param gradient_tolerance: Projected gradient norm below which the local search is stationary.
+        :param step_iterations: L-BFGS-B iterations per step.
+        :param max_iterations: Safety limit on the local iterations of one day.
+        :param day_budget: Seconds per day beyond the first step, or None.
+        :param run_budget: Seconds for every day fitted by this scheduler, or None. Once it is spent,
+                           days only get their first step.
+        :param multistart: Keyword arguments of fit_nelson_siegel_svensson_multistart for the last tier.
+        """
+        self.bounds = bounds
+        self.lower, self.upper = np.array(bounds, dtype=float).T
+        self.good_error = good_error
+        self.acceptable_error = acceptable_error
+        self.r_squared_target = r_squared_target
+        self.gradient_tolerance = gradient_tolerance
+        self.step_iterations = step_iterations
+        self.max_iterations = max_iterations
+        self.day_budget = day_budget
+        self.run_budget = run_budget
+        self.multistart = dict(multistart or {})
+        self.spent = 0.0
+
+    def projected_gradient_norm(self, model, params):
+        """
+        Norm of the objective gradient, ignoring components that push a parameter out of its bounds.
+        """
+        gradient = model.nelson_siegel_svensson_error_gradient(params)
+        blocked = ((params <= self.lower) & (gradient > 0)) | ((params >= self.upper) & (gradient < 0))
+        return float(np.linalg.norm(np.where(blocked, 0.0, gradient)))
+
+    def quality(self, model, params):
+        """
+        :return: (segment errors, R²) of the curve of params against the model's observed yields.
+        """
+        curve = model.get_nelson_siegel_svensson_curve(params)
+        return (model.get_segment_errors(model.observed_yields, curve),
+                float(model.get_R_squared(model.observed_yields, curve)))
+
+    def _deadline(self, start):
+        budgets = [budget for budget in (self.day_budget,
+                                         None if self.run_budget is None else self.run_budget - self.spent)
+                   if budget is not None]
+        return start + min(budgets) if budgets else None
+
+    def fit(self, daily_yields, initial_params):
+        """
+        Fit one day.
+
+        :param daily_yields: The 13 market yields of the day.
+        :param initial_params: Warm-start parameters.
+        :return: (result, errors, tier): the OptimizeResult of the final fit with total_nfev,
+                 total_nit, r_squared, gradient_norm and budget_exhausted (True if the time budget
+                 cut the fit short of its targets); the segment errors of
+                 the final parameters; and the highest tier used ('quick', 'moderate' or 'intensive').
+        """
+        start = time.perf_counter()
+        deadline = self._deadline(start)
+        model = NelsonSiegelModel(np.asarray(daily_yields, dtype=float))
+        error_function = model.nelson_siegel_svensson_error_function
+
+        def out_of_time():
+            return deadline is not None and time.perf_counter() >= deadline
+
+        def stop_at_deadline(intermediate_result):
+            if out_of_time():
+                raise StopIteration
+
+        tier = 'quick'
+        params = np.asarray(initial_params, dtype=float)
+        total_nfev = total_nit = 0
+        # True once the budget, rather than a convergence criterion, ends the fit
+        truncated = False
+        while True:
+            # The first step always runs in full; resumed steps stop at the deadline
+            result = model.nelder_mead_with_bounds(params, error_function, self.bounds, max_iter=self.step_iterations,
+                                                   callback=stop_at_deadline if total_nit else None)
+            total_nfev += result.nfev
+            total_nit += result.nit
+            params = result.x
+            errors, r_squared = self.quality(model, params)
+            if not np.isfinite(result.fun):
+                # A broken local fit goes straight to the multi-start search
+                break
+            if np.all(errors < self.good_error) and r_squared >= self.r_squared_target:
+                break
+            stationary = result.nit < self.step_iterations or \
+                self.projected_gradient_norm(model, params) <= self.gradient_tolerance
+            if stationary or total_nit >= self.max_iterations:
+                break
+            if out_of_time():
+                truncated = True
+                break
+            tier = 'moderate'
+
+        acceptable = np.isfinite(result.fun) and np.all(errors < self.acceptable_error) \
+            and r_squared >= self.r_squared_target
+        if not acceptable and out_of_time():
+            truncated = True
+        elif not acceptable:
+            tier = 'intensive'
+            settings = dict(self.multistart)
+            if deadline is not None:
+                remaining = deadline - time.perf_counter()
+                settings['time_budget'] = min(settings.get('time_budget', remaining), remaining)
+            search = model.fit_nelson_siegel_svensson_multistart(params if np.isfinite(params).all() else None,
+                                                                 self.bounds, **settings)
+            total_nfev += search.total_nfev
+            total_nit += search.total_nit
+            truncated = truncated or search.timed_out
+            if not np.isfinite(result.fun) or search.fun < result.fun:
+                result = search
+                errors, r_squared = self.quality(model, result.x)
+
+        result['total_nfev'] = total_nfev
+        result['total_nit'] = total_nit
+        result['r_squared'] = r_squared
+        result['gradient_norm'] = self.projected_gradient_norm(model, result.x)
+        result['budget_exhausted'] = truncated
+        self.spent += time.perf_counter() - start
+        return result, errors, tier
@@ -1,8 +1,56 @@
+import time
+
 import numpy as np
-from scipy.optimize import minimize
+from scipy.optimize import minimize, least_squares, OptimizeResult
+from scipy.stats import qmc
+
+from models.nssKernels import JIT_AVAILABLE, nss_curve, nss_error, nss_error_and_gradient
+
+
+def _polish_start(observed_yields, weights, params, bounds, max_iter, deadline=None):
+    """
+    Worker: polish one multi-start candidate with bounded L-BFGS-B, stopping at the deadline.
+
+    :param deadline: time.time() after which the solver stops at its next iteration, or None.
+    :return: OptimizeResult with x, fun, nfev, nit and success.
+    """
+    model = NelsonSiegelModel(observed_yields)
+    model.nss_weights = weights
+
+    def stop_at_deadline(intermediate_result):
+        if time.time() > deadline:
+            raise StopIteration
+
+    result = model.nelder_mead_with_bounds(params, model.nelson_siegel_svensson_error_function, bounds,
+                                           max_iter=max_iter, callback=None if deadline is None else stop_at_deadline)
+    # Only the plain fields, so the result pickles cheaply back from a worker process
+    return OptimizeResult(x=result.x, fun=float(result.fun), nfev=result.nfev, nit=result.nit, success=result.success)
+
+
+class _StopFit(Exception):
+    """
+    Ends a bounded fit from inside minimize when its callback raised StopIteration.
+    """
+
 
 class NelsonSiegelModel:
     tenures = 13 
+
+    # Define reasonable bounds for NSS parameters
+    # Adjusted bounds to fix 10Y overestimation issue
+    nss_bounds = [
+        (1.0, 8.0),    # β0 (level): reasonable yield levels
+        (-6.0, 6.0),    # β1 (slope): reasonable slope range  
+        (-8.0, 8.0),  # β2 (curvature): reasonable curvature
+        (-6.0, 6.0),  # β3 (second hump): reasonable hump size
+        (0.8, 3.5),    # λ0 (first decay): expanded range to fix 10Y bias
+        (0.05, 0.4)    # λ1 (second decay): expanded range for better fitting
+    ]
+    # Nelson-Siegel bounds: the NSS level, slope, curvature and first decay
+    ns_bounds = nss_bounds[:3] + nss_bounds[4:5]
+    # Single-day NSS curves, errors and gradients use the Numba kernels when Numba is installed
+    use_jit = JIT_AVAILABLE
+
     def __init__(self, observed_yields):
         self.observed_yields = observed_yields
         self.maturities = np.array([
@@ -10,6 +58,10 @@ class NelsonSiegelModel:
         ])
         self.fitted_params = None
 
+        # Weight vector to emphasize 10Y fitting (index 10) in the NSS error function
+        self.nss_weights = np.ones(len(self.maturities))
+        self.nss_weights[10] = 2.0  # Double weight for 10Y to reduce bias
+
     #nelson siegel: calculates the yield curve using the nelson siegel formula
     def nelson_siegel(self, β0: float, β1: float, β2: float, λ, t):
         x = np.exp(-t/λ)
@@ -22,35 +74,209 @@ class NelsonSiegelModel:
         term_3 = β3 * (1 - np.exp(-t/λ1)) / (t/λ1) - np.exp(-t/λ1)
         return self.nelson_siegel(β0, β1, β2, λ0, t) + term_3
     
+    #nelson siegel batch: evaluates the nelson siegel curve for many parameter sets and maturities in one array operation
+    def nelson_siegel_batch(self, params, maturities=None):
+        """
+        Evaluate the Nelson-Siegel curve for a batch of parameter sets.
+
+        :param params: Array of shape (N, 4) with rows [β0, β1, β2, λ], or a single (4,) vector.
+        :param maturities: Maturities in years, defaults to the 13 Treasury tenures.
+        :return: Array of shape (N, M) with one fitted curve per parameter set.
+        """
+        params = np.asarray(params, dtype=float).reshape(-1, 4)
+        t = self.maturities if maturities is None else np.asarray(maturities, dtype=float)
+
+        # Each parameter becomes an (N, 1) column that broadcasts against the (M,) maturities
+        β0, β1, β2, λ = params.T[:, :, None]
+        τ = t/λ
+        x = np.exp(-τ)
+        term_1 = (1 - x) / τ
+        return β0 + β1 * term_1 + β2 * (term_1 - x)
+
+    #nelson siegel svensson batch: same as above with the additional svensson hump term
+    def nelson_siegel_svensson_batch(self, params, maturities=None):
+        """
+        Evaluate the Nelson-Siegel-Svensson curve for a batch of parameter sets.
+
+        :param params: Array of shape (N, 6) with rows [β0, β1, β2, β3, λ0, λ1], or a single (6,) vector.
+        :param maturities: Maturities in years, defaults to the 13 Treasury tenures.
+        :return: Array of shape (N, M) with one fitted curve per parameter set.
+        """
+        params = np.asarray(params, dtype=float).reshape(-1, 6)
+        t = self.maturities if maturities is None else np.asarray(maturities, dtype=float)
+
+        # Each parameter becomes an (N, 1) column that broadcasts against the (M,) maturities
+        β0, β1, β2, β3, λ0, λ1 = params.T[:, :, None]
+        τ0 = t/λ0
+        τ1 = t/λ1
+        x0 = np.exp(-τ0)
+        x1 = np.exp(-τ1)
+        term_1 = (1 - x0) / τ0
+        # Same hump term as nelson_siegel_svansson
+        term_3 = β3 * (1 - x1) / τ1 - x1
+        return β0 + β1 * term_1 + β2 * (term_1 - x0) + term_3
+
     #error function: calculates the error between the predicted value and the actual yields for all tenures in 1 day
     def nelson_siegel_error_function(self, params):
-        # Unpack parameters
-        β0, β1, β2, λ = params
-
-        predicted_yields = np.array([self.nelson_siegel(β0, β1, β2, λ, t) for t in self.maturities]) 
+        predicted_yields = self.nelson_siegel_batch(params)[0]
 
         #Calculate the residuals
         ## residuals: difference between the actual yields and the predicted yields
+        ## (zero for missing tenors, so they do not count)
 
-        residual = self.observed_yields - predicted_yields
+        residual = self._residuals(predicted_yields)
 
         # Calculate and return the margin of error (sum of squared residuals)
         return np.sum(residual ** 2)
     
     def nelson_siegel_svensson_error_function(self, params):
-        # Unpack parameters
-        β0, β1, β2, β3, λ0, λ1 = params
+        if self.use_jit:
+            return nss_error(np.asarray(params, dtype=float), self.maturities, *self._weighted_observations())
 
-        predicted_yields = np.array([self.nelson_siegel_svansson(β0, β1, β2, β3, λ0, λ1, t) for t in self.maturities])
+        predicted_yields = self.nelson_siegel_svensson_batch(params)[0]
 
-        residual = self.observed_yields - predicted_yields
-        
-        # Add weight vector to emphasize 10Y fitting (index 10)
-        weights = np.ones(len(residual))
-        weights[10] = 2.0  # Double weight for 10Y to reduce bias
+        residual = self._residuals(predicted_yields)
         
         # Weighted sum of squared residuals
-        return np.sum(weights * residual ** 2)
+        return np.sum(self.nss_weights * residual ** 2)
+
+    def nelson_siegel_svensson_batch_error(self, params, observed_yields, mask=None):
+        """
+        Weighted NSS error for many days at once.
+
+        :param params: Array of shape (N, 6), one parameter set per day.
+        :param observed_yields: Array of shape (N, 13) of market yields; NaN marks a missing tenor.
+        :param mask: Optional (N, 13) boolean array, True for the tenors to score.
+        :return: Array of shape (N,) with the weighted sum of squared residuals per day over the observed tenors.
+        """
+        residual = np.asarray(observed_yields, dtype=float) - self.nelson_siegel_svensson_batch(params)
+        return np.sum(self.nss_weights * np.where(self._observed(observed_yields, mask), residual, 0.0) ** 2, axis=-1)
+
+    def nelson_siegel_batch_error(self, params, observed_yields, mask=None):
+        """
+        Nelson-Siegel error for many days at once, as nelson_siegel_svensson_batch_error without weights.
+        """
+        residual = np.asarray(observed_yields, dtype=float) - self.nelson_siegel_batch(params)
+        return np.sum(np.where(self._observed(observed_yields, mask), residual, 0.0) ** 2, axis=-1)
+
+    @staticmethod
+    def _observed(observed_yields, mask=None):
+        """
+        Boolean array of the tenors to fit: not NaN, and inside the mask if one is given.
+        """
+        observed = ~np.isnan(np.asarray(observed_yields, dtype=float))
+        return observed if mask is None else observed & np.asarray(mask, dtype=bool)
+
+    #jacobians: closed-form derivatives of the fitted curve with respect to each parameter
+    def nelson_siegel_jacobian(self, params, maturities=None):
+        """
+        Derivatives of the Nelson-Siegel curve with respect to [β0, β1, β2, λ].
+
+        :param params: Parameter vector [β0, β1, β2, λ].
+        :param maturities: Maturities in years, defaults to the 13 Treasury tenures.
+        :return: Array of shape (M, 4), column j is d(yield)/d(params[j]).
+        """
+        β0, β1, β2, λ = np.asarray(params, dtype=float)
+        t = self.maturities if maturities is None else np.asarray(maturities, dtype=float)
+
+        τ = t/λ
+        x = np.exp(-τ)
+        term_1 = (1 - x) / τ
+        term_2 = term_1 - x
+        # d(term_1)/dλ = term_2/λ and d(x)/dλ = x*τ/λ
+        d_term_1 = term_2 / λ
+        d_term_2 = d_term_1 - x * τ / λ
+        return np.column_stack([np.ones_like(t), term_1, term_2, β1 * d_term_1 + β2 * d_term_2])
+
+    def nelson_siegel_svensson_jacobian(self, params, maturities=None):
+        """
+        Derivatives of the Nelson-Siegel-Svensson curve with respect to [β0, β1, β2, β3, λ0, λ1].
+
+        :param params: Parameter vector [β0, β1, β2, β3, λ0, λ1].
+        :param maturities: Maturities in years, defaults to the 13 Treasury tenures.
+        :return: Array of shape (M, 6), column j is d(yield)/d(params[j]).
+        """
+        β0, β1, β2, β3, λ0, λ1 = np.asarray(params, dtype=float)
+        t = self.maturities if maturities is None else np.asarray(maturities, dtype=float)
+
+        ns_jacobian = self.nelson_siegel_jacobian([β0, β1, β2, λ0], t)
+
+        # Hump term as implemented in nelson_siegel_svansson: β3 * (1 - x1)/τ1 - x1
+        τ1 = t/λ1
+        x1 = np.exp(-τ1)
+        hump = (1 - x1) / τ1
+        d_hump = β3 * (hump - x1) / λ1 - x1 * τ1 / λ1
+        return np.column_stack([ns_jacobian[:, :3], hump, ns_jacobian[:, 3], d_hump])
+
+    def _residuals(self, predicted_yields):
+        # Missing (NaN) tenors get a zero residual, the same as a zero weight
+        observed_yields = np.asarray(self.observed_yields, dtype=float).reshape(-1)
+        return np.where(np.isnan(observed_yields), 0.0, observed_yields - np.reshape(predicted_yields, -1))
+
+    def _weighted_observations(self):
+        """
+        The day's yields and NSS weights for the kernels, with missing tenors filled and weighted zero.
+        A (1, 13) row, as ButterflyController passes, is flattened like in _residuals.
+        """
+        observed_yields = np.asarray(self.observed_yields, dtype=float).reshape(-1)
+        observed = ~np.isnan(observed_yields)
+        if observed.all():
+            return observed_yields, self.nss_weights
+        return np.where(observed, observed_yields, 0.0), self.nss_weights * observed
+
+    def nelson_siegel_error_gradient(self, params):
+        """
+        Gradient of nelson_siegel_error_function with respect to [β0, β1, β2, λ].
+        """
+        residual = self._residuals(self.nelson_siegel_batch(params)[0])
+        return -2.0 * residual @ self.nelson_siegel_jacobian(params)
+
+    def nelson_siegel_svensson_error_gradient(self, params):
+        """
+        Gradient of nelson_siegel_svensson_error_function with respect to [β0, β1, β2, β3, λ0, λ1].
+        """
+        return self.nelson_siegel_svensson_error_and_gradient(params)[1]
+
+    def nelson_siegel_svensson_error_and_gradient(self, params):
+        """
+        nelson_siegel_svensson_error_function and its gradient from one evaluation of the curve,
+        for optimizers called with jac=True.
+
+        :return: (error, gradient of shape (6,)).
+        """
+        if self.use_jit:
+            gradient = np.empty(6)
+            error = nss_error_and_gradient(np.asarray(params, dtype=float), self.maturities,
+                                           *self._weighted_observations(), gradient)
+            return error, gradient
+
+        residual = self._residuals(self.nelson_siegel_svensson_batch(params)[0])
+        return (np.sum(self.nss_weights * residual ** 2),
+                -2.0 * (self.nss_weights * residual) @ self.nelson_siegel_svensson_jacobian(params))
+
+    def nelson_siegel_svensson_residuals(self, params):
+        """
+        Weighted residuals whose sum of squares equals nelson_siegel_svensson_error_function.
+        Intended for least-squares solvers.
+        """
+        residual = self._residuals(self.nelson_siegel_svensson_batch(params)[0])
+        return np.sqrt(self.nss_weights) * residual
+
+    def nelson_siegel_svensson_residual_jacobian(self, params):
+        """
+        Jacobian of nelson_siegel_svensson_residuals, shape (13, 6).
+        """
+        return -np.sqrt(self._weighted_observations()[1])[:, None] * self.nelson_siegel_svensson_jacobian(params)
+
+    def _gradient_for(self, error_function):
+        """
+        Return the analytic gradient matching one of the model's error functions, or None.
+        """
+        if error_function == self.nelson_siegel_svensson_error_function:
+            return self.nelson_siegel_svensson_error_gradient
+        if error_function == self.nelson_siegel_error_function:
+            return self.nelson_siegel_error_gradient
+        return None
 
     #nelder mead: creates a simplex shape using the predicted value from the nelson siegel 
     #and calibrates it until it fits the curve
@@ -67,34 +293,77 @@ class NelsonSiegelModel:
                          options={'maxiter': max_iter, 'xatol': 1e-6})
         return result
     
-    def nelder_mead_with_bounds(self, params, error_function, bounds, max_iter=100):
+    def nelder_mead_with_bounds(self, params, error_function, bounds, max_iter=100, jac=None, callback=None):
         """
         Bounded optimization using L-BFGS-B method with parameter bounds
         This prevents parameters from exploding to unreasonable values
+
+        The analytic gradient is used automatically for the model's own error functions;
+        pass jac='2-point' to force finite differences. The callback receives an OptimizeResult
+        with x and nit after every iteration and may raise StopIteration to end the fit early;
+        the result then holds the last iterate, with success False.
+        """
+        if jac is None and error_function == self.nelson_siegel_svensson_error_function:
+            # One pass gives the error and its gradient
+            error_function, jac = self.nelson_siegel_svensson_error_and_gradient, True
+        elif jac is None:
+            jac = self._gradient_for(error_function)
+        if callback is None:
+            return minimize(error_function, x0=params, method='L-BFGS-B', jac=jac,
+                            bounds=bounds, options={'maxiter': max_iter})
+
+        # SciPy before 1.11 passes callbacks only xk and does not stop on StopIteration,
+        # so the early stop is handled here the same way on every version
+        state = {'x': np.asarray(params, dtype=float), 'nit': 0, 'nfev': 0}
+
+        def counted(x):
+            state['nfev'] += 1
+            return error_function(x)
+
+        def step(xk):
+            state['x'], state['nit'] = np.array(xk), state['nit'] + 1
+            try:
+                callback(OptimizeResult(x=state['x'], nit=state['nit']))
+            except StopIteration:
+                raise _StopFit
+
+        try:
+            return minimize(counted, x0=params, method='L-BFGS-B', jac=jac,
+                            bounds=bounds, options={'maxiter': max_iter}, callback=step)
+        except _StopFit:
+            fun = counted(state['x'])
+            return OptimizeResult(x=state['x'], fun=fun[0] if jac is True else fun, nit=state['nit'],
+                                  nfev=state['nfev'], success=False, status=99,
+                                  message="The callback raised StopIteration.")
+
+    def least_squares_with_bounds(self, params, bounds, max_iter=100):
         """
-        result = minimize(error_function, x0=params, method='L-BFGS-B',
-                         bounds=bounds, options={'maxiter': max_iter})
+        Bounded NSS fit with a trust-region least-squares solver and the analytic residual Jacobian.
+        The returned result's fun is the weighted sum of squared residuals, as with the minimize helpers.
+        """
+        lower, upper = zip(*bounds)
+        result = least_squares(self.nelson_siegel_svensson_residuals, x0=params,
+                               jac=self.nelson_siegel_svensson_residual_jacobian,
+                               bounds=(lower, upper), method='trf', max_nfev=max_iter)
+        # least_squares reports the residual vector in fun; expose the objective value instead
+        result.residuals = result.fun
+        result.fun = float(np.sum(result.residuals ** 2))
         return result
     
 
     def get_nelson_siegel_curve(self, fitted_params):
         # Get the yield curve using the fitted parameters
-        β0, β1, β2, λ = fitted_params
-        maturities = np.array([
-            1/12, 2/12, 3/12, 4/12, 6/12, 1, 2, 3, 5, 7, 10, 20, 30
-        ])  # Tenures in years
-        
-        # Vectorized calculation for all maturities
-        return np.array([self.nelson_siegel(β0, β1, β2, λ, t) for t in maturities])
+        # A (N, 4) parameter table returns one curve per row
+        curves = self.nelson_siegel_batch(fitted_params)
+        return curves[0] if np.ndim(fitted_params) == 1 else curves
 
     def get_nelson_siegel_svensson_curve(self, fitted_params):
         # Get the yield curve using the fitted parameters
-        β0, β1, β2, β3, λ0, λ1 = fitted_params
-        maturities = np.array([
-            1/12, 2/12, 3/12, 4/12, 6/12, 1, 2, 3, 5, 7, 10, 20, 30
-        ])
-        # Vectorized calculation for all maturities
-        return np.array([self.nelson_siegel_svansson(β0, β1, β2, β3, λ0, λ1, t) for t in maturities])
+        # A (N, 6) parameter table returns one curve per row
+        if self.use_jit and np.ndim(fitted_params) == 1:
+            return nss_curve(np.asarray(fitted_params, dtype=float), self.maturities, np.empty(len(self.maturities)))
+        curves = self.nelson_siegel_svensson_batch(fitted_params)
+        return curves[0] if np.ndim(fitted_params) == 1 else curves
 
     def set_bounds(self, bounds_1, bounds_2):
         """
@@ -130,41 +399,334 @@ class NelsonSiegelModel:
         
         return True, []
     
+    def get_segment_errors(self, observed_yields, predicted_yields):
+        """
+        Sum of squared residuals by maturity segment, over the observed tenors.
+
+        :param observed_yields: Actual yields from the market, (13,) or (N, 13); NaN marks a missing tenor.
+        :param predicted_yields: Yields predicted by the model, same shape as observed_yields.
+        :return: Array [short, mid, long] (or (N, 3)) for 1M-3Y, 5Y-10Y and 20Y-30Y.
+        """
+        observed_yields = np.asarray(observed_yields, dtype=float)
+        squared = (observed_yields - np.asarray(predicted_yields, dtype=float)) ** 2
+        squared = np.where(np.isnan(observed_yields), 0.0, squared)
+        return np.stack([squared[..., :8].sum(axis=-1),     # 1M through 3Y
+                         squared[..., 8:11].sum(axis=-1),   # 5Y, 7Y, 10Y
+                         squared[..., 11:].sum(axis=-1)],   # 20Y, 30Y
+                        axis=-1)
+
     def get_R_squared(self, observed_yields, predicted_yields):
         """
         Calculate the R-squared value for the model fit.
-        :param observed_yields: Actual yields from the market.
-        :param predicted_yields: Yields predicted by the model.
-        :return: R-squared value.
-        """
-        #error function output: SSR = sum((observed - predicted)^2)
-        SSR = np.sum((observed_yields - predicted_yields) ** 2)
-        # Total sum of squares: TSS = sum((observed - mean(observed))^2)
-        TSS = np.sum((observed_yields - np.mean(observed_yields)) ** 2)
-        
-        return 1 - (SSR / TSS) if TSS != 0 else 0
+        :param observed_yields: Actual yields from the market, (M,) or (N, M).
+        :param predicted_yields: Yields predicted by the model, same shape as observed_yields.
+        :return: R-squared value, or an array of N values for 2-D inputs.
+        """
+        observed_yields = np.asarray(observed_yields, dtype=float)
+        predicted_yields = np.asarray(predicted_yields, dtype=float)
+
+        # 2-D inputs are treated as one curve per row and return one R² per day
+        # Missing (NaN) tenors are left out of both sums
+        if np.isnan(observed_yields).any():
+            observed = ~np.isnan(observed_yields)
+            count = np.maximum(observed.sum(axis=-1, keepdims=True), 1)
+            mean = np.where(observed, observed_yields, 0.0).sum(axis=-1, keepdims=True) / count
+            SSR = np.sum(np.where(observed, observed_yields - predicted_yields, 0.0) ** 2, axis=-1)
+            TSS = np.sum(np.where(observed, observed_yields - mean, 0.0) ** 2, axis=-1)
+        else:
+            #error function output: SSR = sum((observed - predicted)^2)
+            SSR = np.sum((observed_yields - predicted_yields) ** 2, axis=-1)
+            # Total sum of squares: TSS = sum((observed - mean(observed))^2)
+            TSS = np.sum((observed_yields - np.mean(observed_yields, axis=-1, keepdims=True)) ** 2, axis=-1)
+
+        if np.ndim(TSS) == 0:
+            return 1 - (SSR / TSS) if TSS != 0 else 0
+        return np.where(TSS != 0, 1 - SSR / np.where(TSS != 0, TSS, 1), 0.0)
     
-    def fit_nelson_siegel_svensson(self, use_warm_start=True):
+    def nelson_siegel_svensson_loadings(self, λ0, λ1, maturities=None):
+        """
+        Factor loadings of the NSS curve for fixed decays.
+
+        For fixed λ0 and λ1 the curve is linear in the betas:
+        yield = loadings @ [β0, β1, β2, β3] + offset
+
+        :param λ0: Array of first decay values, shape (G,).
+        :param λ1: Array of second decay values, shape (G,).
+        :param maturities: Maturities in years, defaults to the 13 Treasury tenures.
+        :return: (loadings, offset) with shapes (G, M, 4) and (G, M).
+        """
+        t = self.maturities if maturities is None else np.asarray(maturities, dtype=float)
+        τ0 = t / np.asarray(λ0, dtype=float)[:, None]
+        τ1 = t / np.asarray(λ1, dtype=float)[:, None]
+        x0 = np.exp(-τ0)
+        x1 = np.exp(-τ1)
+        term_1 = (1 - x0) / τ0
+        hump = (1 - x1) / τ1
+        loadings = np.stack([np.ones_like(term_1), term_1, term_1 - x0, hump], axis=-1)
+        # The hump term of nelson_siegel_svansson subtracts x1 outside the β3 product
+        return loadings, -x1
+
+    def nelson_siegel_loadings(self, λ, maturities=None):
+        """
+        Factor loadings of the Nelson-Siegel curve for fixed decays: yield = loadings @ [β0, β1, β2].
+
+        :param λ: Array of decay values, shape (G,).
+        :param maturities: Maturities in years, defaults to the 13 Treasury tenures.
+        :return: (loadings, offset) with shapes (G, M, 3) and (G, M); the offset is zero.
+        """
+        t = self.maturities if maturities is None else np.asarray(maturities, dtype=float)
+        τ = t / np.asarray(λ, dtype=float)[:, None]
+        x = np.exp(-τ)
+        term_1 = (1 - x) / τ
+        return np.stack([np.ones_like(term_1), term_1, term_1 - x], axis=-1), np.zeros_like(term_1)
+
+    def _separable_fit(self, X, offset, Y, observed, w, lower, upper, chunk_size, candidates=1):
+        """
+        Solve the betas of every day on every decay grid point and keep each day's best point.
+
+        Days are grouped by their pattern of observed tenors. Each pattern gets its own weighted
+        normal equations (missing tenors have zero weight), and its days are solved together in
+        one batched pass, so a mixed-coverage history costs one pass per pattern, not per day.
+
+        :param X: Loadings of shape (G, M, K) and offset of shape (G, M), from a *_loadings method.
+        :param Y: Yields of shape (T, M), with zeros where a tenor is not observed.
+        :param observed: Boolean array of shape (T, M).
+        :param w: Tenor weights of shape (M,).
+        :param candidates: Number of grid points to keep per day, best first.
+        :return: (best, betas): the grid point index (T,) and its betas (T, K) per day; NaN betas for days without quotes.
+                 With candidates > 1 the shapes are (T, candidates) and (T, candidates, K).
+        """
+        if observed.all():
+            patterns, inverse = observed[:1], np.zeros(len(Y), dtype=int)
+        else:
+            patterns, inverse = np.unique(observed, axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+
+        best = np.zeros((len(Y), candidates), dtype=int)
+        betas = np.full((len(Y), candidates, X.shape[-1]), np.nan)
+        for pattern_index, pattern in enumerate(patterns):
+            pattern_days = np.flatnonzero(inverse == pattern_index)
+            if not pattern.any():
+                continue
+            w_pattern = w * pattern
+
+            # Precompute the normal-equation inverse of every grid point once per pattern
+            XW = X * w_pattern[:, None]                           # (G, M, K)
+            A_inv = np.linalg.pinv(np.einsum('gmk,gml->gkl', XW, X))
+            XW_offset = np.einsum('gmk,gm->gk', XW, offset)       # (G, K)
+            offset_W_offset = np.einsum('gm,gm->g', offset * w_pattern, offset)
+
+            for start in range(0, len(pattern_days), chunk_size):
+                days = pattern_days[start:start + chunk_size]
+                Yc = Y[days]
+
+                # Target z = y - offset, so X^T W z = X^T W y - X^T W offset
+                b = np.einsum('gmk,tm->gtk', XW, Yc) - XW_offset[:, None, :]
+                β = np.einsum('gkl,gtl->gtk', A_inv, b)
+
+                # Weighted SSE = z^T W z - b^T β, without materialising the (G, T, M) residuals
+                z_W_z = (np.sum(w_pattern * Yc ** 2, axis=1)[None, :]
+                         - 2 * np.einsum('gm,tm->gt', offset * w_pattern, Yc) + offset_W_offset[:, None])
+                sse = z_W_z - np.einsum('gtk,gtk->gt', b, β)
+
+                # Prefer grid points whose betas are inside the bounds
+                feasible = np.all((β >= lower) & (β <= upper), axis=-1)
+                sse = np.where(feasible, sse, sse + np.where(feasible.any(axis=0), np.inf, 0.0))
+                if candidates == 1:
+                    order = np.argmin(sse, axis=0)[None, :]
+                else:
+                    order = np.argpartition(sse, candidates - 1, axis=0)[:candidates]
+                    order = np.take_along_axis(order, np.argsort(np.take_along_axis(sse, order, axis=0), axis=0), axis=0)
+                best[days] = order.T
+                betas[days] = np.clip(β[order, np.arange(len(days))], lower, upper).transpose(1, 0, 2)
+
+        if candidates == 1:
+            return best[:, 0], betas[:, 0]
+        return best, betas
+
+    def fit_nelson_siegel_svensson_separable(self, observed_yields=None, bounds=None, grid_size=(30, 30),
+                                             polish=False, max_iter=100, chunk_size=2048, mask=None):
+        """
+        Fit the NSS model to many days at once by variable projection.
+
+        The betas are solved by weighted least squares for every (λ0, λ1) grid point and every
+        day in one batched normal-equation pass; each day keeps the grid point with the lowest
+        error whose betas respect the bounds. The winners can optionally be polished with a
+        bounded L-BFGS-B step. Each day is fitted on its observed tenors only: NaN yields,
+        and tenors outside the mask, get zero weight.
+
+        :param observed_yields: Array of shape (T, 13), defaults to the model's observed yields.
+        :param bounds: Parameter bounds, defaults to nss_bounds.
+        :param grid_size: Number of grid points for λ0 and λ1 inside their bounds.
+        :param polish: If True, refine each day's winner with nelder_mead_with_bounds.
+        :param max_iter: Iteration limit for the polishing step.
+        :param chunk_size: Number of days solved together, limits peak memory on long histories.
+        :param mask: Optional (T, 13) boolean array, True for the tenors to fit.
+        :return: (params, errors) with shapes (T, 6) in fit_nelson_siegel_svensson's layout and (T,).
+        """
+        bounds = self.nss_bounds if bounds is None else bounds
+        if observed_yields is None:
+            observed_yields = self.observed_yields
+        Y = np.atleast_2d(np.asarray(observed_yields, dtype=float))
+        observed = self._observed(Y, None if mask is None else np.atleast_2d(mask))
+        Y_filled = np.where(observed, Y, 0.0)
+
+        λ0_grid, λ1_grid = np.meshgrid(np.linspace(*bounds[4], grid_size[0]),
+                                       np.linspace(*bounds[5], grid_size[1]), indexing='ij')
+        λ0_grid, λ1_grid = λ0_grid.ravel(), λ1_grid.ravel()
+        X, offset = self.nelson_siegel_svensson_loadings(λ0_grid, λ1_grid)
+
+        lower = np.array([b[0] for b in bounds[:4]])
+        upper = np.array([b[1] for b in bounds[:4]])
+        best, betas = self._separable_fit(X, offset, Y_filled, observed, self.nss_weights, lower, upper, chunk_size)
+
+        params = np.column_stack([betas, λ0_grid[best], λ1_grid[best]])
+        params[np.isnan(betas[:, 0]), 4:] = np.nan
+
+        if polish:
+            observed_yields, weights = self.observed_yields, self.nss_weights
+            for day_index, daily_yields in enumerate(Y_filled):
+                if not observed[day_index].any():
+                    continue
+                # Missing tenors get zero weight, so the error function and its gradient ignore them
+                self.observed_yields = daily_yields
+                self.nss_weights = weights * observed[day_index]
+                result = self.nelder_mead_with_bounds(params[day_index],
+                                                      self.nelson_siegel_svensson_error_function,
+                                                      bounds, max_iter=max_iter)
+                params[day_index] = result.x
+            self.observed_yields, self.nss_weights = observed_yields, weights
+
+        return params, self.nelson_siegel_svensson_batch_error(params, Y, observed)
+
+    def fit_nelson_siegel_separable(self, observed_yields=None, bounds=None, grid_size=60, chunk_size=2048, mask=None):
+        """
+        Fit the Nelson-Siegel model to many days at once by variable projection over a λ grid,
+        on each day's observed tenors, as fit_nelson_siegel_svensson_separable.
+
+        :param observed_yields: Array of shape (T, 13), defaults to the model's observed yields.
+        :param bounds: Parameter bounds, defaults to ns_bounds.
+        :param grid_size: Number of grid points for λ inside its bounds.
+        :param chunk_size: Number of days solved together.
+        :param mask: Optional (T, 13) boolean array, True for the tenors to fit.
+        :return: (params, errors) with shapes (T, 4) as [β0, β1, β2, λ] and (T,).
+        """
+        bounds = self.ns_bounds if bounds is None else bounds
+        if observed_yields is None:
+            observed_yields = self.observed_yields
+        Y = np.atleast_2d(np.asarray(observed_yields, dtype=float))
+        observed = self._observed(Y, None if mask is None else np.atleast_2d(mask))
+
+        λ_grid = np.linspace(*bounds[3], grid_size)
+        X, offset = self.nelson_siegel_loadings(λ_grid)
+
+        lower = np.array([b[0] for b in bounds[:3]])
+        upper = np.array([b[1] for b in bounds[:3]])
+        best, betas = self._separable_fit(X, offset, np.where(observed, Y, 0.0), observed,
+                                          np.ones(len(self.maturities)), lower, upper, chunk_size)
+
+        params = np.column_stack([betas, λ_grid[best]])
+        params[np.isnan(betas[:, 0]), 3] = np.nan
+        return params, self.nelson_siegel_batch_error(params, Y, observed)
+
+    def fit_nelson_siegel_svensson_multistart(self, previous_params=None, bounds=None, starts=64, grid_starts=8,
+                                              top_k=4, max_iter=200, time_budget=None, executor=None, seed=0):
+        """
+        Global NSS fit of the observed yields from many starting points, for days where a local
+        fit gets stuck.
+
+        The starts are a Latin hypercube over the bounds, the previous day's parameters and the
+        best points of the (λ0, λ1) grid of the separable fit. All of them are scored in one
+        vectorized objective call and only the top_k are polished with L-BFGS-B, in parallel
+        if an executor is given. Polishing stops at the time budget, so a hard day costs
+        bounded wall time.
+
+        :param previous_params: Optional warm-start parameters, e.g. the previous day's fit.
+        :param bounds: Parameter bounds, defaults to nss_bounds.
+        :param starts: Number of Latin hypercube starts.
+        :param grid_starts: Number of λ-grid starts.
+        :param top_k: Number of best starts to polish.
+        :param max_iter: Iteration limit per polish.
+        :param time_budget: Seconds for the whole fit, or None for no limit.
+        :param executor: Optional executor, e.g. a ProcessPoolExecutor shared by every hard day of
+                         a run, that polishes the starts in parallel. None polishes in this process.
+        :param seed: Seed of the Latin hypercube.
+        :return: OptimizeResult of the best polished start, with total_nfev/total_nit over every start,
+                 'starts', 'polished' and 'timed_out'.
+        """
+        deadline = None if time_budget is None else time.time() + time_budget
+        bounds = self.nss_bounds if bounds is None else bounds
+        lower, upper = np.array(bounds, dtype=float).T
+        observed = self._observed(self.observed_yields)
+        y = np.where(observed, np.asarray(self.observed_yields, dtype=float), 0.0)
+        weights = self.nss_weights * observed
+
+        candidates = [qmc.scale(qmc.LatinHypercube(d=6, seed=seed).random(starts), lower, upper)]
+        if previous_params is not None:
+            candidates.append(np.clip(np.asarray(previous_params, dtype=float), lower, upper)[None])
+        if grid_starts:
+            λ0_grid, λ1_grid = np.meshgrid(np.linspace(*bounds[4], 30), np.linspace(*bounds[5], 30), indexing='ij')
+            λ0_grid, λ1_grid = λ0_grid.ravel(), λ1_grid.ravel()
+            X, offset = self.nelson_siegel_svensson_loadings(λ0_grid, λ1_grid)
+            best, betas = self._separable_fit(X, offset, y[None], observed[None], self.nss_weights,
+                                              lower[:4], upper[:4], 1, candidates=grid_starts)
+            candidates.append(np.column_stack([betas[0], λ0_grid[best[0]], λ1_grid[best[0]]]))
+        candidates = np.vstack(candidates)
+        candidates = candidates[~np.isnan(candidates).any(axis=1)]
+
+        # Score every start at once and polish only the most promising ones
+        errors = self.nelson_siegel_svensson_batch_error(candidates, np.broadcast_to(y, (len(candidates), len(y))),
+                                                         np.broadcast_to(observed, (len(candidates), len(y))))
+        order = np.argsort(errors)[:top_k]
+
+        if executor is not None:
+            futures = [executor.submit(_polish_start, y, weights, candidates[i], bounds, max_iter, deadline)
+                       for i in order]
+            polished = [future.result() for future in futures]
+        else:
+            polished = []
+            for i in order:
+                # The best start is always polished; the others only while time is left
+                if polished and deadline is not None and time.time() > deadline:
+                    break
+                polished.append(_polish_start(y, weights, candidates[i], bounds, max_iter, deadline))
+
+        result = min(polished, key=lambda fit: fit.fun)
+        result['total_nfev'] = len(candidates) + sum(fit.nfev for fit in polished)
+        result['total_nit'] = sum(fit.nit for fit in polished)
+        result['starts'] = len(candidates)
+        result['polished'] = len(polished)
+        result['timed_out'] = deadline is not None and time.time() > deadline
+        self.fitted_params = result.x
+        return result
+
+    def fit_nelson_siegel_svensson(self, use_warm_start=True, use_jacobian=True, method='L-BFGS-B'):
         """
         Fit the Nelson-Siegel-Svensson model to the observed yields.
         
         Args:
             use_warm_start (bool): If True and fitted_params exist, use them as starting point
+            use_jacobian (bool): If True use the analytic gradient, otherwise finite differences
+            method (str): 'L-BFGS-B' for a local fit, or 'separable' for a λ-grid search
+                with variable projection followed by a bounded polish (no warm start needed)
         
         Returns:
             scipy.optimize.OptimizeResult: The optimization result containing the fitted parameters
         """
-            
-        # Define reasonable bounds for NSS parameters
-        # Adjusted bounds to fix 10Y overestimation issue
-        bounds = [
-            (1.0, 8.0),    # β0 (level): reasonable yield levels
-            (-6.0, 6.0),    # β1 (slope): reasonable slope range  
-            (-8.0, 8.0),  # β2 (curvature): reasonable curvature
-            (-6.0, 6.0),  # β3 (second hump): reasonable hump size
-            (0.8, 3.5),    # λ0 (first decay): expanded range to fix 10Y bias
-            (0.05, 0.4)    # λ1 (second decay): expanded range for better fitting
-        ]
+        bounds = self.nss_bounds
+
+        if method == 'separable':
+            params, errors = self.fit_nelson_siegel_svensson_separable(self.observed_yields, bounds)
+            if not np.isfinite(params[0]).all():
+                return OptimizeResult(x=params[0], fun=errors[0], success=False, status=-1, nit=0, nfev=0,
+                                      message='No observed tenors to fit')
+            # The polish from the grid winner is the returned result, so both methods report the
+            # same fields (nit, nfev, message, ...)
+            result = self.nelder_mead_with_bounds(params[0], self.nelson_siegel_svensson_error_function,
+                                                  bounds, max_iter=1000,
+                                                  jac=None if use_jacobian else '2-point')
+            self.fitted_params = result.x
+            return result
         
         # Determine starting parameters based on warm start preference
         if use_warm_start and self.fitted_params is not None and len(self.fitted_params) == 6:
@@ -185,7 +747,8 @@ class NelsonSiegelModel:
         # Perform optimization
         result = self.nelder_mead_with_bounds(initial_params,
                                               self.nelson_siegel_svensson_error_function,
-                                              bounds, max_iter=1000)
+                                              bounds, max_iter=1000,
+                                              jac=None if use_jacobian else '2-point')
 
         # Store the fitted parameters for next warm start
         self.fitted_params = result.x
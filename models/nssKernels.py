@@ -0,0 +1,101 @@
+import math
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# True when the kernels are compiled by Numba. Without Numba they stay plain Python loops, and
+# NelsonSiegelModel keeps its vectorized NumPy path instead of calling them.
+JIT_AVAILABLE = numba is not None
+
+
+def _jit(function):
+    return numba.njit(cache=True)(function) if JIT_AVAILABLE else function
+
+
+# The kernels evaluate one curve on its own maturities with scalar loops, so a single-day
+# objective inside the optimizer costs no temporary arrays. The hump term matches
+# NelsonSiegelModel.nelson_siegel_svansson: β3 * (1 - x1)/τ1 - x1.
+
+@_jit
+def nss_curve(params, maturities, out):
+    """
+    Nelson-Siegel-Svensson yields of one parameter vector.
+
+    :param params: Float array [β0, β1, β2, β3, λ0, λ1].
+    :param maturities: Float array of maturities in years.
+    :param out: Float array of len(maturities) that receives the yields.
+    :return: out
+    """
+    β0, β1, β2, β3, λ0, λ1 = params[0], params[1], params[2], params[3], params[4], params[5]
+    for i in range(maturities.shape[0]):
+        τ0 = maturities[i] / λ0
+        τ1 = maturities[i] / λ1
+        x0 = math.exp(-τ0)
+        x1 = math.exp(-τ1)
+        term_1 = (1.0 - x0) / τ0
+        out[i] = β0 + β1 * term_1 + β2 * (term_1 - x0) + β3 * (1.0 - x1) / τ1 - x1
+    return out
+
+
+@_jit
+def nss_error(params, maturities, observed_yields, weights):
+    """
+    Weighted sum of squared residuals, as NelsonSiegelModel.nelson_siegel_svensson_error_function.
+    """
+    β0, β1, β2, β3, λ0, λ1 = params[0], params[1], params[2], params[3], params[4], params[5]
+    total = 0.0
+    for i in range(maturities.shape[0]):
+        τ0 = maturities[i] / λ0
+        τ1 = maturities[i] / λ1
+        x0 = math.exp(-τ0)
+        x1 = math.exp(-τ1)
+        term_1 = (1.0 - x0) / τ0
+        residual = observed_yields[i] - (β0 + β1 * term_1 + β2 * (term_1 - x0) + β3 * (1.0 - x1) / τ1 - x1)
+        total += weights[i] * residual * residual
+    return total
+
+
+@_jit
+def nss_error_and_gradient(params, maturities, observed_yields, weights, gradient):
+    """
+    Weighted error and its gradient with respect to [β0, β1, β2, β3, λ0, λ1] in one pass.
+
+    :param gradient: Float array of length 6 that receives the gradient.
+    :return: The weighted sum of squared residuals.
+    """
+    β0, β1, β2, β3, λ0, λ1 = params[0], params[1], params[2], params[3], params[4], params[5]
+    for j in range(6):
+        gradient[j] = 0.0
+    total = 0.0
+    for i in range(maturities.shape[0]):
+        τ0 = maturities[i] / λ0
+        τ1 = maturities[i] / λ1
+        x0 = math.exp(-τ0)
+        x1 = math.exp(-τ1)
+        term_1 = (1.0 - x0) / τ0
+        term_2 = term_1 - x0
+        hump = (1.0 - x1) / τ1
+        residual = observed_yields[i] - (β0 + β1 * term_1 + β2 * term_2 + β3 * hump - x1)
+        weighted = weights[i] * residual
+        total += weighted * residual
+
+        # d(error)/d(param) = -2 * w * residual * d(yield)/d(param), as nelson_siegel_svensson_jacobian
+        scale = -2.0 * weighted
+        d_term_1 = term_2 / λ0
+        d_term_2 = d_term_1 - x0 * τ0 / λ0
+        gradient[0] += scale
+        gradient[1] += scale * term_1
+        gradient[2] += scale * term_2
+        gradient[3] += scale * hump
+        gradient[4] += scale * (β1 * d_term_1 + β2 * d_term_2)
+        gradient[5] += scale * (β3 * (hump - x1) / λ1 - x1 * τ1 / λ1)
+    return total
+
+
+def python_kernel(kernel):
+    """
+    The plain Python loop behind a kernel, whether or not it is compiled, e.g. for equivalence tests.
+    """
+    return getattr(kernel, 'py_func', kernel)
@@ -0,0 +1,128 @@
+import numpy as np
+
+from models.spreadMeanCalculator import MeanReversionCalculator
+
+
+class SpreadMatrix:
+    """
+    Every tenor-pair spread of a yield matrix, computed with broadcasting instead of one
+    getter per tenor.
+
+    Pairs are (short, long) tenor indices with short < long, and the spread is long - short,
+    as for the 5Y-2Y spread. With 13 tenors there are 78 curve spreads. Only the selected pair
+    columns are ever materialised; cube() builds the full days x tenors x tenors array when
+    it is really needed.
+    """
+
+    def __init__(self, yields, tenors):
+        """
+        :param yields: Yield matrix of shape (days, tenors).
+        :param tenors: Tenor labels in column order, e.g. csvReader.TENORS.
+        """
+        self.yields = np.asarray(yields, dtype=float)
+        self.tenors = list(tenors)
+        if self.yields.ndim != 2 or self.yields.shape[1] != len(self.tenors):
+            raise ValueError("Yield matrix must have one column per tenor.")
+        self.calculator = MeanReversionCalculator()
+
+    def pair_indices(self, pairs=None):
+        """
+        Resolve a pair selection into index arrays.
+
+        :param pairs: None for all pairs, or a list of (short, long) tenor labels or column indices.
+        :return: (short, long) integer arrays of the same length.
+        """
+        if pairs is None:
+            return np.triu_indices(len(self.tenors), k=1)
+
+        short, long = [], []
+        for first, second in pairs:
+            first = self.tenors.index(first) if isinstance(first, str) else int(first)
+            second = self.tenors.index(second) if isinstance(second, str) else int(second)
+            short.append(first)
+            long.append(second)
+        return np.array(short, dtype=int), np.array(long, dtype=int)
+
+    def pair_labels(self, pairs=None):
+        """
+        Labels such as '5 Yr-2 Yr', in the column order of spreads().
+        """
+        short, long = self.pair_indices(pairs)
+        return [f"{self.tenors[j]}-{self.tenors[i]}" for i, j in zip(short, long)]
+
+    def cube(self):
+        """
+        Full spread cube: cube[t, i, j] = yield of tenor j - yield of tenor i on day t.
+
+        :return: Array of shape (days, tenors, tenors).
+        """
+        return self.yields[:, None, :] - self.yields[:, :, None]
+
+    def spreads(self, pairs=None):
+        """
+        Spreads of the selected pairs for every day.
+
+        :param pairs: None for all pairs, or a list of (short, long) tenors.
+        :return: Array of shape (days, pairs).
+        """
+        short, long = self.pair_indices(pairs)
+        return self.yields[:, long] - self.yields[:, short]
+
+    def summary(self, pairs=None):
+        """
+        Summary statistics of every selected spread over the whole history.
+
+        :return: dict of 'labels' and per-pair 'mean', 'std', 'min', 'max' and 'last' arrays.
+        """
+        spreads = self.spreads(pairs)
+        return {
+            'labels': self.pair_labels(pairs),
+            'mean': spreads.mean(axis=0),
+            'std': spreads.std(axis=0),
+            'min': spreads.min(axis=0),
+            'max': spreads.max(axis=0),
+            'last': spreads[-1],
+        }
+
+    def rolling_statistics(self, windows=(20, 60, 250), pairs=None):
+        """
+        Trailing-window statistics of every selected spread, all pairs in one pass per window.
+
+        :return: dict {window: {'mean', 'std', 'min', 'max', 'z_score'}} of (days, pairs) arrays.
+        """
+        return self.calculator.rolling_statistics(self.spreads(pairs), windows)
+
+    def rolling_z_scores(self, window=60, pairs=None):
+        """
+        Trailing-window z-score of every selected spread on every day.
+
+        Only the mean and standard deviation are needed, so the min/max windows are skipped.
+
+        :return: Array of shape (days, pairs), NaN until the window is full.
+        """
+        statistics = self.calculator.rolling_statistics(self.spreads(pairs), (window,), extremes=False)
+        return statistics[window]['z_score']
+
+    def rank(self, window=60, pairs=None, top=10):
+        """
+        Rank the spreads by how stretched they are today against their trailing window.
+
+        :param window: Window length in days for the z-scores.
+        :param pairs: None for all pairs, or a list of (short, long) tenors.
+        :param top: Number of pairs to return.
+        :return: List of dicts with 'pair', 'spread' and 'z_score', largest |z-score| first.
+        """
+        # Only today's z-score is ranked, so only the last window of each spread is needed
+        short, long = self.pair_indices(pairs)
+        recent = self.yields[-window:, long] - self.yields[-window:, short]
+        spreads = recent[-1]
+        std = recent.std(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_scores = np.where(std > 0, (spreads - recent.mean(axis=0)) / std, np.nan)
+        if len(recent) < window:
+            z_scores[:] = np.nan
+
+        # NaN z-scores (flat spreads or a short history) sort last
+        order = np.argsort(-np.nan_to_num(np.abs(z_scores), nan=-1.0), kind='stable')[:top]
+        labels = self.pair_labels(pairs)
+        return [{'pair': labels[k], 'spread': spreads[k], 'z_score': z_scores[k]} for k in order]
@@ -1,5 +1,37 @@
+from collections import deque
+
 import numpy as np
-from sklearn.linear_model import LinearRegression
+
+from models.batchRegression import ols
+
+
+def _compensated_prefix_sums(values):
+    """
+    Prefix sums along the first axis with their rounding errors carried separately.
+
+    Each step of the cumulative sum is split into its rounded result and the exact error of that
+    addition (Knuth's TwoSum), so every prefix sum is sums + corrections to about twice the working
+    precision. A window sum taken as a difference of two prefix sums then keeps the accuracy of the
+    window itself, however long the series and however large its running total.
+
+    :param values: Array of shape (n, ...).
+    :return: (sums, corrections), arrays of shape (n + 1, ...) starting with zeros.
+    """
+    zeros = np.zeros((1,) + values.shape[1:])
+    sums = np.concatenate([zeros, np.cumsum(values, axis=0)])
+    previous = sums[:-1]
+    added = sums[1:] - previous
+    errors = (previous - (sums[1:] - added)) + (values - added)
+    return sums, np.concatenate([zeros, np.cumsum(errors, axis=0)])
+
+
+def _window_sums(prefix_sums, window):
+    """
+    Sums of every trailing window of a _compensated_prefix_sums pair.
+    """
+    sums, corrections = prefix_sums
+    return (sums[window:] - sums[:-window]) + (corrections[window:] - corrections[:-window])
+
 
 class MeanReversionCalculator:
 
@@ -64,6 +96,67 @@ class MeanReversionCalculator:
         spreads = self.calculate_spread(two_year_yields, five_year_yields)
         return np.std(spreads)
 
+    def spread_summary(self, two_year_yields, five_year_yields):
+        """
+        Calculate the spread once and return all of its summary statistics.
+
+        :param two_year_yields: A numpy array of 2-year yields.
+        :param five_year_yields: A numpy array of 5-year yields.
+        :return: dict with the 'spreads' array and their 'mean', 'std', 'min' and 'max'.
+        """
+        spreads = self.calculate_spread(two_year_yields, five_year_yields)
+        return {'spreads': spreads, 'mean': np.mean(spreads), 'std': np.std(spreads),
+                'min': np.min(spreads), 'max': np.max(spreads)}
+
+    def rolling_statistics(self, values, windows=(20, 60, 250), extremes=True):
+        """
+        Trailing-window mean, standard deviation, min, max and z-score for every day and every window.
+
+        Means and variances come from compensated cumulative sums of the values centred on their
+        overall mean, so a window's statistics stay accurate on long series with a large level or
+        a drift; min and max use a strided view of the windows. Days before a window is full are NaN.
+
+        :param values: A numpy array of observations (e.g. daily spreads), or a (days, series) matrix
+                       to compute the statistics of every column at once.
+        :param windows: Window lengths in days.
+        :param extremes: Also compute the window min and max; skip them when only z-scores are needed.
+        :return: dict {window: {'mean', 'std', 'min', 'max', 'z_score'}} of arrays aligned with values.
+        """
+        values = np.asarray(values, dtype=float)
+        n = len(values)
+        centre = values.mean(axis=0) if n else np.zeros(values.shape[1:])
+        centred = values - centre
+        sums = _compensated_prefix_sums(centred)
+        squares = _compensated_prefix_sums(centred ** 2)
+
+        names = ('mean', 'std', 'min', 'max', 'z_score') if extremes else ('mean', 'std', 'z_score')
+        statistics = {}
+        for window in windows:
+            result = {name: np.full(values.shape, np.nan) for name in names}
+            if window <= n:
+                window_mean = _window_sums(sums, window) / window
+                variance = np.maximum(_window_sums(squares, window) / window - window_mean ** 2, 0.0)
+                std = np.sqrt(variance)
+
+                result['mean'][window - 1:] = window_mean + centre
+                result['std'][window - 1:] = std
+                if extremes:
+                    windows_view = np.lib.stride_tricks.sliding_window_view(values, window, axis=0)
+                    result['min'][window - 1:] = windows_view.min(axis=-1)
+                    result['max'][window - 1:] = windows_view.max(axis=-1)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    result['z_score'][window - 1:] = np.where(std > 0, (centred[window - 1:] - window_mean) / std, np.nan)
+            statistics[window] = result
+        return statistics
+
+    def online_statistics(self, windows=(20, 60, 250)):
+        """
+        Create one O(1)-per-tick RollingStatistics accumulator per window length.
+
+        :return: dict {window: RollingStatistics}.
+        """
+        return {window: RollingStatistics(window) for window in windows}
+
     def calculate_z_scores(self, current_spread, mean_spread, std_spread, slope, r_squared):
         """
         Only calculate if slope is minimal and R-squared is less than 0.1.
@@ -82,9 +175,111 @@ class MeanReversionCalculator:
             return (current_spread - mean_spread) / std_spread
         return None
 
+class RollingStatistics:
+    """
+    Mean, standard deviation, min/max and z-score over a sliding window, updated in O(1) per value.
+
+    Uses Welford's update when a value enters the window and the reverse update when the
+    oldest value leaves it, so the cost does not grow with the length of the history. Min and
+    max come from monotonic deques. The running moments are recomputed exactly once per window
+    length of removals, so rounding from the reverse updates cannot build up over long streams.
+    """
+
+    def __init__(self, window):
+        if window < 2:
+            raise ValueError("Window must contain at least 2 values.")
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+        self.count = 0  # Number of values ever added, used to index the min/max deques
+        self.removals = 0
+        self.min_candidates = deque()  # (index, value) with increasing values
+        self.max_candidates = deque()  # (index, value) with decreasing values
+
+    def __len__(self):
+        return len(self.values)
+
+    def _add(self, value):
+        self.values.append(value)
+        delta = value - self.mean
+        self.mean += delta / len(self.values)
+        self.m2 += delta * (value - self.mean)
+
+        # Values that can never be the min/max again are dropped from the back
+        while self.min_candidates and self.min_candidates[-1][1] >= value:
+            self.min_candidates.pop()
+        while self.max_candidates and self.max_candidates[-1][1] <= value:
+            self.max_candidates.pop()
+        self.min_candidates.append((self.count, value))
+        self.max_candidates.append((self.count, value))
+        self.count += 1
+
+    def _remove(self):
+        value = self.values.popleft()
+        oldest = self.count - len(self.values) - 1
+        if self.min_candidates[0][0] == oldest:
+            self.min_candidates.popleft()
+        if self.max_candidates[0][0] == oldest:
+            self.max_candidates.popleft()
+
+        if not self.values:
+            self.mean = self.m2 = 0.0
+            return
+        delta = value - self.mean
+        self.mean -= delta / len(self.values)
+        self.m2 -= delta * (value - self.mean)
+
+        # Re-anchor the moments once per window, amortised O(1)
+        self.removals += 1
+        if self.removals % self.window == 0:
+            values = np.fromiter(self.values, dtype=float, count=len(self.values))
+            self.mean = float(values.mean())
+            self.m2 = float(np.sum((values - self.mean) ** 2))
+
+    @property
+    def std(self):
+        """
+        Population standard deviation of the window, matching np.std.
+        """
+        if not self.values:
+            return float('nan')
+        return float(np.sqrt(max(self.m2, 0.0) / len(self.values)))
+
+    @property
+    def min(self):
+        return self.min_candidates[0][1] if self.min_candidates else float('nan')
+
+    @property
+    def max(self):
+        return self.max_candidates[0][1] if self.max_candidates else float('nan')
+
+    def z_score(self, value):
+        """
+        Z-score of a value against the current window, or None if the window has no spread yet.
+        """
+        std = self.std
+        if len(self.values) < 2 or std == 0:
+            return None
+        return (value - self.mean) / std
+
+    def update(self, value):
+        """
+        Add a value to the window, dropping the oldest one once the window is full.
+
+        :param value: The new observation.
+        :return: dict with the window 'mean', 'std', 'min', 'max' and the 'z_score' of the new value.
+        """
+        self._add(float(value))
+        if len(self.values) > self.window:
+            self._remove()
+        return {'mean': self.mean, 'std': self.std, 'min': self.min, 'max': self.max,
+                'z_score': self.z_score(value)}
+
+
 class LinearRegressionModel:
     def __init__(self):
-        self.model = LinearRegression()
+        self.result = None  # Last regression from models.batchRegression.ols
 
     def linear_regression(self, x, y):
         """
@@ -93,11 +288,10 @@ class LinearRegressionModel:
         if len(x) != len(y):
             raise ValueError("Input arrays must have the same length.")
         
-        x = x.reshape(-1, 1)
-        # Fit the linear regression model
-        self.model.fit(x, y)
+        # Fit the linear regression in closed form
+        self.result = ols(np.asarray(x, dtype=float).reshape(-1, 1), y)
         # Return the slope, intercept, and R-squared value
-        return self.model.coef_[0], self.model.intercept_, self.model.score(x, y)
+        return self.result['coef'][0], self.result['intercept'], self.result['r_squared']
     
     def fit(self, yield_1, yield_2):
         """
@@ -0,0 +1,73 @@
+import numpy as np
+
+from models.nelsonSiegelModel import NelsonSiegelModel
+
+# Long-run mean of the NSS parameters (about the average 2023-2025 fit) and daily volatilities
+# chosen so daily yield changes are a few basis points, as in the bundled data
+LONG_RUN_PARAMS = np.array([4.5, 0.5, -2.5, 0.7, 2.3, 0.2])
+DAILY_VOLATILITY = np.array([0.04, 0.05, 0.08, 0.08, 0.02, 0.005])
+
+
+class SyntheticCurveGenerator:
+    """
+    Generates Treasury-like yield histories of any length from a simulated NSS parameter path.
+
+    Each NSS parameter follows a mean-reverting AR(1) process around LONG_RUN_PARAMS and is kept
+    inside the model bounds. The yields are the NSS curves of those parameters plus measurement
+    noise, quoted to two decimals like the Treasury files. With several snapshots per day the
+    daily shocks are split evenly between the snapshots, so intraday curves move less than daily ones.
+    """
+
+    def __init__(self, seed=0, noise=0.01, half_life=250):
+        """
+        :param seed: Seed of the random generator, so runs are reproducible.
+        :param noise: Standard deviation of the measurement noise in percent.
+        :param half_life: Half-life in days of a parameter shock.
+        """
+        self.rng = np.random.default_rng(seed)
+        self.noise = noise
+        self.persistence = 0.5 ** (1.0 / half_life)
+        self.model = NelsonSiegelModel(np.zeros(13))
+
+    def generate_params(self, count, snapshots_per_day=1):
+        """
+        Simulate the parameter path.
+
+        :param count: Number of curves.
+        :param snapshots_per_day: Curves per trading day; shocks are scaled by 1/sqrt(snapshots_per_day).
+        :return: Array of shape (count, 6).
+        """
+        persistence = self.persistence ** (1.0 / snapshots_per_day)
+        volatility = DAILY_VOLATILITY / np.sqrt(snapshots_per_day)
+        lower, upper = np.array(self.model.nss_bounds).T
+
+        shocks = self.rng.standard_normal((count, 6)) * volatility
+        params = np.empty((count, 6))
+        current = LONG_RUN_PARAMS.copy()
+        for row in range(count):
+            current = np.clip(LONG_RUN_PARAMS + persistence * (current - LONG_RUN_PARAMS) + shocks[row], lower, upper)
+            params[row] = current
+        return params
+
+    def generate(self, days=636, snapshots_per_day=1, start='1975-01-02'):
+        """
+        Generate a yield history.
+
+        :param days: Number of trading days (636 matches the bundled data, 12,600 is about 50 years).
+        :param snapshots_per_day: 1 for daily closes, more for evenly spaced intraday snapshots
+                                  between 9:00 and 17:00.
+        :param start: First trading day.
+        :return: (timestamps, yields, params): datetime64[ns] array, (curves, 13) yields and the true parameters.
+        """
+        trading_days = np.busday_offset(np.datetime64(start, 'D'), np.arange(days), roll='forward')
+        if snapshots_per_day > 1:
+            offsets = np.linspace(9 * 3600, 17 * 3600, snapshots_per_day).astype('timedelta64[s]')
+            timestamps = (trading_days[:, None].astype('datetime64[s]') + offsets).ravel()
+        else:
+            timestamps = trading_days
+        timestamps = timestamps.astype('datetime64[ns]')
+
+        params = self.generate_params(len(timestamps), snapshots_per_day)
+        curves = self.model.get_nelson_siegel_svensson_curve(params)
+        yields = np.round(curves + self.rng.standard_normal(curves.shape) * self.noise, 2)
+        return timestamps, yields, params
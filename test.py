@@ -1,11 +1,17 @@
+import asyncio
 import unittest
 from numpy.testing import assert_almost_equal
 import pandas as pd
 import numpy as np
 from scipy.optimize import minimize
+from scipy.interpolate import CubicSpline
 from models.buttefly import Butterfly
 
 from models.nelsonSiegelModel import NelsonSiegelModel
+import os
+import shutil
+import tempfile
+import csvReader
 
 # Test the csv files
 class TestCsvReader(unittest.TestCase):
@@ -46,6 +52,178 @@ class TestCsvReader(unittest.TestCase):
         self.assertEqual(first_value, pd.Timestamp('2023-01-03 00:00:00'))
         self.assertEqual(last_value, pd.Timestamp('2025-07-18 00:00:00'))
 
+# Test the cached yield store behind load_my_data
+class TestYieldStore(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        for path in csvReader.discover_csv_files('data'):
+            shutil.copy(path, self.data_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir)
+
+    def test_store_matches_csv(self):
+        store = csvReader.get_yield_store(self.data_dir)
+        df = csvReader.load_my_data()
+        self.assertEqual(store.yields.shape, (636, 13))
+        self.assertTrue(store.yields.flags['C_CONTIGUOUS'])
+        assert_almost_equal(store.yields, df.iloc[:, 1:].values)
+        self.assertTrue((store.dates == df['Date'].values).all())
+
+    def test_caller_arrays_stay_writeable(self):
+        dates = np.array(['2024-01-02', '2024-01-03'], dtype='datetime64[ns]')
+        yields = np.ones((2, 13))
+        store = csvReader.YieldStore(dates, yields, csvReader.TENORS)
+        self.assertTrue(yields.flags.writeable and dates.flags.writeable)
+        self.assertFalse(store.yields.flags.writeable or store.dates.flags.writeable)
+        self.assertTrue(np.shares_memory(store.yields, yields))
+
+    def test_store_is_shared(self):
+        store = csvReader.get_yield_store(self.data_dir)
+        self.assertIs(csvReader.get_yield_store(self.data_dir), store)
+
+    def test_snapshot_reused_and_invalidated(self):
+        store = csvReader.get_yield_store(self.data_dir)
+        self.assertTrue(os.path.exists(os.path.join(self.data_dir, csvReader.SNAPSHOT_DIR, 'yield_matrix.npy')))
+
+        # A fresh load must come from the snapshot and match the parsed data
+        reloaded = csvReader.get_yield_store(self.data_dir, refresh=True)
+        assert_almost_equal(reloaded.yields, store.yields)
+
+        # Editing a source file invalidates the snapshot
+        path = os.path.join(self.data_dir, '2025.csv')
+        with open(path) as f:
+            lines = f.readlines()
+        lines[1] = lines[1].replace('4.35', '9.99', 1)
+        with open(path, 'w') as f:
+            f.writelines(lines)
+        updated = csvReader.get_yield_store(self.data_dir)
+        self.assertEqual(updated.yields[-1, 0], 9.99)
+
+    def test_last_3_months_helpers(self):
+        dates = csvReader.get_dates_from_last_3_months()
+        self.assertEqual(len(dates), len(csvReader.get_two_year_yields_from_last_3_months()))
+        self.assertEqual(len(dates), len(csvReader.get_ten_year_yields_from_last_3_months()))
+
+class TestCsvIngestion(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        csvReader._stores.pop(self.data_dir, None)
+        shutil.rmtree(self.data_dir)
+
+    def write(self, name, text):
+        with open(os.path.join(self.data_dir, name), 'w') as f:
+            f.write(text)
+
+    def test_tenor_grids_are_reconciled(self):
+        # An old layout without the 2 and 4 month bills, with long column names and a blank quote
+        self.write('2017.csv', 'Date,1 Month,3 Month,6 Month,1 Year,2 Year,3 Year,5 Year,7 Year,10 Year,20 Year,30 Year\n'
+                               '12/29/2017,1.28,1.39,1.53,1.76,1.89,1.98,2.20,2.33,2.40,,2.74\n'
+                               '12/28/2017,1.32,1.39,1.54,1.76,1.92,1.99,2.22,2.35,2.43,2.60,2.77\n')
+        # A newer layout with the 1.5 month bill, repeating 12/29/2017 with a corrected 10 year
+        self.write('2018.csv', 'Date,"1 Mo","1.5 Month","2 Mo","3 Mo","4 Mo","6 Mo","1 Yr","2 Yr","3 Yr","5 Yr","7 Yr","10 Yr","20 Yr","30 Yr"\n'
+                               '01/02/2018,1.29,1.40,1.40,1.44,1.50,1.61,1.83,1.92,2.01,2.25,2.38,2.46,2.64,2.81\n'
+                               '12/29/2017,1.28,1.40,1.40,1.39,1.45,1.53,1.76,1.89,1.98,2.20,2.33,2.41,2.58,2.74\n')
+        for workers in (1, 2):
+            dates, yields = csvReader.parse_csv_files(csvReader.discover_csv_files(self.data_dir), workers)
+            self.assertEqual([str(date)[:10] for date in dates], ['2017-12-28', '2017-12-29', '2018-01-02'])
+            self.assertEqual(yields.shape, (3, 13))
+            self.assertTrue(np.isnan(yields[0, csvReader.TENORS.index('4 Mo')]))
+            self.assertEqual(yields[1, csvReader.TENORS.index('10 Yr')], 2.41)
+            self.assertEqual(yields[2, csvReader.TENORS.index('2 Mo')], 1.40)
+
+        store = csvReader.get_yield_store(self.data_dir)
+        self.assertEqual(store.mask.sum(), 3 * 13 - 2)
+        self.assertEqual(csvReader.canonical_tenor('30 YEARS'), '30 Yr')
+        self.assertIsNone(csvReader.canonical_tenor('Date'))
+
+    def test_new_file_is_discovered(self):
+        for path in csvReader.discover_csv_files('data'):
+            shutil.copy(path, self.data_dir)
+        self.assertEqual(len(csvReader.get_yield_store(self.data_dir)), 636)
+        self.write('2026.csv', 'Date,"1 Mo","2 Mo","3 Mo","4 Mo","6 Mo","1 Yr","2 Yr","3 Yr","5 Yr","7 Yr","10 Yr","20 Yr","30 Yr"\n'
+                               '01/02/2026,4.35,4.39,4.40,4.42,4.30,4.08,3.88,3.84,3.96,4.18,4.44,4.99,5.00\n')
+        store = csvReader.get_yield_store(self.data_dir)
+        self.assertEqual(len(store), 637)
+        self.assertEqual(str(store.dates[-1])[:10], '2026-01-02')
+
+
+class TestYieldWindows(unittest.TestCase):
+    def setUp(self):
+        self.store = csvReader.get_yield_store()
+        df = csvReader.load_my_data()
+        self.mask = df['Date'] >= df['Date'].max() - pd.DateOffset(months=3)
+        self.df = df
+
+    def test_last_matches_boolean_mask(self):
+        window = self.store.last('3M')
+        self.assertTrue((window.dates == self.df['Date'].values[self.mask]).all())
+        assert_almost_equal(window.column('5 Yr'), self.df['5 Yr'].values[self.mask])
+        self.assertTrue(np.shares_memory(window.yields, self.store.yields))
+        self.assertEqual(len(window.dates), len(window.yields))
+        self.assertEqual(len(self.store.last('2W')), len(self.store.window('2025-07-04', None)))
+
+    def test_window_tenors_and_bounds(self):
+        window = self.store.window('2024-01-01', '2024-12-31', ['2 Yr', '5 Yr', '10 Yr'])
+        self.assertEqual(window.tenors, ['2 Yr', '5 Yr', '10 Yr'])
+        self.assertEqual(window.yields.shape, (250, 3))
+        self.assertTrue(np.shares_memory(window.yields, self.store.yields))
+        self.assertEqual(str(window.dates[0])[:10], '2024-01-02')
+        self.assertEqual(len(self.store.window('2030-01-01', None)), 0)
+        with self.assertRaises(ValueError):
+            self.store.last('3Q')
+
+    def test_butterfly_controller_days_are_aligned(self):
+        from controller.butterflySpreadController import ButterflyController
+        controller = ButterflyController()
+        self.assertTrue((controller.full_curve_dates == controller.dates).all())
+        assert_almost_equal(controller.full_curve_data[:, csvReader.TENORS.index('5 Yr')], controller.df5)
+
+
+class TestYieldHistory(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'history')
+
+    def tearDown(self):
+        csvReader._stores.pop(self.path, None)
+        shutil.rmtree(self.directory)
+
+    def test_incremental_build_and_memory_map(self):
+        store = csvReader.get_yield_store()
+        csvReader.create_history(self.path)
+        self.assertEqual(csvReader.append_history(self.path, store.dates[:400], store.yields[:400]), 400)
+        # Overlapping rows are skipped, only the new days are written
+        self.assertEqual(csvReader.build_history(self.path), 236)
+        self.assertEqual(csvReader.build_history(self.path), 0)
+
+        history = csvReader.get_yield_store(self.path)
+        self.assertIsInstance(history.yields, np.memmap)
+        assert_almost_equal(history.yields, store.yields)
+        self.assertTrue((history.dates == store.dates).all())
+
+        rows = history.row_range('2024-01-01', '2024-12-31')
+        self.assertEqual(rows.stop - rows.start, 250)
+        self.assertTrue(np.shares_memory(history.columns(['2 Yr', '5 Yr', '10 Yr'], rows), history.yields))
+        assert_almost_equal(history.columns(['10 Yr', '1 Mo'], rows), store.yields[rows][:, [10, 0]])
+
+        with self.assertRaises(ValueError):
+            csvReader.append_history(self.path, store.dates[::-1][:2], store.yields[:2])
+
+    def test_float32_history_is_reopened_after_append(self):
+        from models.syntheticCurves import SyntheticCurveGenerator
+        dates, yields, _ = SyntheticCurveGenerator().generate(days=5, snapshots_per_day=4)
+        csvReader.create_history(self.path, dtype='float32')
+        csvReader.append_history(self.path, dates[:8], yields[:8])
+        self.assertEqual(len(csvReader.get_yield_store(self.path)), 8)
+
+        csvReader.append_history(self.path, dates[8:], yields[8:])
+        history = csvReader.get_yield_store(self.path)
+        self.assertEqual(history.yields.dtype, np.float32)
+        assert_almost_equal(history.yields, yields.astype(np.float32))
+
 class TestCurveBuilding(unittest.TestCase):
     t = np.array([
         1/12, 2/12, 3/12, 4/12, 6/12, 1, 2, 3, 5, 7, 10, 20, 30
@@ -89,6 +267,62 @@ class TestCurveBuilding(unittest.TestCase):
         mock_yield = self.mock_nelson_siegel + β3 * (1 - np.exp(-self.t/λ1)) / (self.t/λ1) - np.exp(-self.t/λ1)
         assert_almost_equal(expected_yield, mock_yield)
 
+    def test_nelson_siegel_svensson_batch(self):
+        # Each row of the batch kernel must match the scalar NSS formula
+        params = np.array([[self.β0, self.β1, self.β2, 0.25633094, self.λ, 0.5],
+                           [4.5, -1.2, -2.5, 1.5, 1.2, 0.12]])
+        curves = self.model.nelson_siegel_svensson_batch(params)
+        self.assertEqual(curves.shape, (2, 13))
+        for row, p in zip(curves, params):
+            assert_almost_equal(row, self.model.nelson_siegel_svansson(*p, self.t))
+
+        # Arbitrary maturities and a batch error/R² across days
+        dense = self.model.nelson_siegel_svensson_batch(params, np.linspace(0.5, 30, 50))
+        self.assertEqual(dense.shape, (2, 50))
+        errors = self.model.nelson_siegel_svensson_batch_error(params, np.tile(self.observed_yields, (2, 1)))
+        assert_almost_equal(errors[1], self.model.nelson_siegel_svensson_error_function(params[1]))
+        self.assertEqual(self.model.get_R_squared(np.tile(self.observed_yields, (2, 1)), curves).shape, (2,))
+
+    def test_nelson_siegel_svensson_gradient(self):
+        # The analytic gradient must match central finite differences of the weighted error
+        params = np.array([4.5, -1.5, -4.0, 3.0, 0.8, 0.15])
+        step = 1e-6
+        numeric = [(self.model.nelson_siegel_svensson_error_function(params + step * e) -
+                    self.model.nelson_siegel_svensson_error_function(params - step * e)) / (2 * step)
+                   for e in np.eye(6)]
+        assert_almost_equal(self.model.nelson_siegel_svensson_error_gradient(params), numeric, decimal=4)
+
+        ns_params = np.array([4.5, -1.5, -4.0, 0.8])
+        numeric = [(self.model.nelson_siegel_error_function(ns_params + step * e) -
+                    self.model.nelson_siegel_error_function(ns_params - step * e)) / (2 * step)
+                   for e in np.eye(4)]
+        assert_almost_equal(self.model.nelson_siegel_error_gradient(ns_params), numeric, decimal=4)
+
+        # Residual Jacobian is consistent with the objective gradient
+        residuals = self.model.nelson_siegel_svensson_residuals(params)
+        assert_almost_equal(2 * residuals @ self.model.nelson_siegel_svensson_residual_jacobian(params),
+                            self.model.nelson_siegel_svensson_error_gradient(params))
+
+    def test_separable_fit(self):
+        # The λ-grid fit returns the usual [β0, β1, β2, β3, λ0, λ1] layout within the bounds
+        yields = csvReader.get_yield_store().yields[:20]
+        params, errors = self.model.fit_nelson_siegel_svensson_separable(yields)
+        self.assertEqual(params.shape, (20, 6))
+        for column, (lower, upper) in enumerate(self.model.nss_bounds):
+            self.assertTrue(np.all((params[:, column] >= lower) & (params[:, column] <= upper)))
+        assert_almost_equal(errors, self.model.nelson_siegel_svensson_batch_error(params, yields))
+
+        # It should be about as good as a cold-started L-BFGS-B fit
+        daily_model = NelsonSiegelModel(yields[0])
+        result = daily_model.fit_nelson_siegel_svensson(use_warm_start=False)
+        self.assertLess(errors[0], result.fun + 0.01)
+
+        # Both methods report the same result fields
+        separable = NelsonSiegelModel(yields[0]).fit_nelson_siegel_svensson(method='separable')
+        for field in ('x', 'fun', 'success', 'nit', 'nfev', 'message'):
+            self.assertIn(field, separable)
+        self.assertLess(separable.fun, result.fun + 0.01)
+
     def test_nelson_siegel_svensson_error_function(self):
         # Test the error function for the Nelson-Siegel Svensson model
         β3 = 0.25633094
@@ -117,6 +351,739 @@ class TestCurveBuilding(unittest.TestCase):
     #     yield_curve = self.model.get_yield_curve(fitted_params)
     #     assert_almost_equal(yield_curve, self.mock_nelson_siegel)
 
+class TestMultiStart(unittest.TestCase):
+    def test_multistart_is_never_worse_and_respects_the_budget(self):
+        rng = np.random.default_rng(1)
+        model = NelsonSiegelModel(None)
+        lower, upper = np.array(model.nss_bounds).T
+        # A stale warm start in a corner of the bounds, where a single local fit can get stuck
+        start = upper - 1e-3
+        improved = 0
+        for _ in range(12):
+            model.observed_yields = model.get_nelson_siegel_svensson_curve(rng.uniform(lower, upper)) + rng.normal(0, 0.01, 13)
+            local = model.nelder_mead_with_bounds(start, model.nelson_siegel_svensson_error_function, model.nss_bounds, max_iter=1000)
+            result = model.fit_nelson_siegel_svensson_multistart(start)
+            self.assertLessEqual(result.fun, local.fun + 1e-4)
+            improved += result.fun < local.fun - 1e-2
+            self.assertEqual(result.starts, 64 + 1 + 8)
+            self.assertTrue(np.all((result.x >= lower - 1e-9) & (result.x <= upper + 1e-9)))
+        self.assertGreater(improved, 0)
+
+        # With no time left only the best start is polished, and it stops after one iteration
+        result = model.fit_nelson_siegel_svensson_multistart(start, time_budget=0.0)
+        self.assertEqual(result.polished, 1)
+        self.assertTrue(result.timed_out)
+        self.assertLessEqual(result.nit, 1)
+        self.assertFalse(result.success)
+        assert_almost_equal(result.fun, model.nelson_siegel_svensson_error_function(result.x))
+
+    def test_executor_polishing_matches_in_process(self):
+        from concurrent.futures import ProcessPoolExecutor
+        model = NelsonSiegelModel(csvReader.get_yield_store().yields[0])
+        start = np.array(model.nss_bounds)[:, 1] - 1e-3
+        expected = model.fit_nelson_siegel_svensson_multistart(start, starts=16, top_k=3)
+        # One pool serves several days
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            for _ in range(2):
+                result = model.fit_nelson_siegel_svensson_multistart(start, starts=16, top_k=3, executor=executor)
+                self.assertEqual(result.polished, 3)
+                assert_almost_equal(result.x, expected.x)
+                self.assertEqual(result.total_nfev, expected.total_nfev)
+
+
+class TestFitScheduler(unittest.TestCase):
+    def setUp(self):
+        from models.fitScheduler import FitScheduler
+        self.FitScheduler = FitScheduler
+        self.model = NelsonSiegelModel(None)
+        lower, upper = np.array(self.model.nss_bounds).T
+        self.start = upper - 1e-3
+        self.yields = self.model.get_nelson_siegel_svensson_curve([4.0, -1.0, 2.0, -1.0, 1.2, 0.12])
+
+    def test_resumes_from_the_previous_step_and_reports_final_errors(self):
+        model = NelsonSiegelModel(self.yields)
+        first = model.nelder_mead_with_bounds(self.start, model.nelson_siegel_svensson_error_function,
+                                              self.model.nss_bounds, max_iter=10)
+        scheduler = self.FitScheduler(self.model.nss_bounds, step_iterations=10, day_budget=None)
+        result, errors, tier = scheduler.fit(self.yields, self.start)
+        self.assertNotEqual(tier, 'quick')
+        self.assertGreater(result.total_nit, 10)
+        self.assertLess(result.fun, first.fun)
+        assert_almost_equal(errors, model.get_segment_errors(self.yields, model.get_nelson_siegel_svensson_curve(result.x)))
+        self.assertGreaterEqual(result.r_squared, 0.9)
+
+    def test_spent_run_budget_leaves_only_the_first_step(self):
+        scheduler = self.FitScheduler(self.model.nss_bounds, good_error=0.0, step_iterations=10, run_budget=0.0)
+        result, errors, tier = scheduler.fit(self.yields, self.start)
+        self.assertEqual(tier, 'quick')
+        self.assertTrue(result.budget_exhausted)
+        self.assertLessEqual(result.total_nit, 10)
+
+    def test_nan_local_fit_goes_to_the_search(self):
+        from unittest import mock
+        from scipy.optimize import OptimizeResult
+        local = NelsonSiegelModel.nelder_mead_with_bounds
+        broken = OptimizeResult(x=self.start, fun=np.nan, nfev=1, nit=self.FitScheduler(self.model.nss_bounds).step_iterations)
+        calls = []
+
+        def first_step_fails(model, *args, **kwargs):
+            calls.append(args)
+            return broken if len(calls) == 1 else local(model, *args, **kwargs)
+
+        scheduler = self.FitScheduler(self.model.nss_bounds, day_budget=None, multistart={'starts': 8, 'grid_starts': 2, 'top_k': 1})
+        with mock.patch.object(NelsonSiegelModel, 'nelder_mead_with_bounds', first_step_fails):
+            result, errors, tier = scheduler.fit(self.yields, self.start)
+        self.assertEqual(tier, 'intensive')
+        # Only the failed step ran locally, then the search's polish
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(np.isfinite(result.fun))
+        self.assertTrue(np.isfinite(errors).all())
+
+
+class TestNssKernels(unittest.TestCase):
+    def setUp(self):
+        from models import nssKernels
+        self.kernels = nssKernels
+        rng = np.random.default_rng(3)
+        self.model = NelsonSiegelModel(csvReader.get_yield_store().yields[0])
+        self.model.use_jit = False
+        lower, upper = np.array(self.model.nss_bounds).T
+        self.params = rng.uniform(lower, upper, (20, 6))
+
+    def _check_kernels(self, curve, error, error_and_gradient):
+        maturities, weights = self.model.maturities, self.model.nss_weights * (np.arange(13) != 4)
+        self.model.nss_weights = weights
+        observed = np.asarray(self.model.observed_yields, dtype=float)
+        gradient = np.empty(6)
+        for params in self.params:
+            np.testing.assert_allclose(curve(params, maturities, np.empty(13)),
+                                       self.model.get_nelson_siegel_svensson_curve(params), rtol=1e-13)
+            expected_error, expected_gradient = self.model.nelson_siegel_svensson_error_and_gradient(params)
+            np.testing.assert_allclose(error(params, maturities, observed, weights), expected_error, rtol=1e-12)
+            np.testing.assert_allclose(error_and_gradient(params, maturities, observed, weights, gradient),
+                                       expected_error, rtol=1e-12)
+            np.testing.assert_allclose(gradient, expected_gradient, rtol=1e-10, atol=1e-12)
+
+    def test_python_loops_match_numpy(self):
+        python = self.kernels.python_kernel
+        self._check_kernels(python(self.kernels.nss_curve), python(self.kernels.nss_error),
+                            python(self.kernels.nss_error_and_gradient))
+
+    def test_fused_numpy_path_matches_separate_functions(self):
+        for params in self.params:
+            error, gradient = self.model.nelson_siegel_svensson_error_and_gradient(params)
+            self.assertEqual(error, self.model.nelson_siegel_svensson_error_function(params))
+            assert_almost_equal(gradient, self.model.nelson_siegel_svensson_jacobian(params).T
+                                @ (-2.0 * self.model.nss_weights * (self.model.observed_yields - self.model.get_nelson_siegel_svensson_curve(params))))
+
+    def test_kernels_accept_a_2d_row(self):
+        # ButterflyController builds models from a (1, 13) row; the kernels (compiled or not) must flatten it
+        row = NelsonSiegelModel([self.model.observed_yields])
+        row.use_jit = True
+        for params in self.params[:3]:
+            assert_almost_equal(row.nelson_siegel_svensson_error_function(params),
+                                self.model.nelson_siegel_svensson_error_function(params))
+            assert_almost_equal(row.nelson_siegel_svensson_error_gradient(params),
+                                self.model.nelson_siegel_svensson_error_gradient(params))
+            assert_almost_equal(row.get_nelson_siegel_svensson_curve(params),
+                                self.model.get_nelson_siegel_svensson_curve(params))
+
+    @unittest.skipUnless(NelsonSiegelModel.use_jit, "Numba is not installed")
+    def test_compiled_kernels_match_numpy(self):
+        jit_model = NelsonSiegelModel(self.model.observed_yields)
+        jit_model.use_jit = True
+        start = self.params[0]
+        expected = self.model.nelder_mead_with_bounds(start, self.model.nelson_siegel_svensson_error_function, self.model.nss_bounds)
+        result = jit_model.nelder_mead_with_bounds(start, jit_model.nelson_siegel_svensson_error_function, jit_model.nss_bounds)
+        # The kernels match the NumPy path to rounding (checked below), but loop and pairwise/BLAS
+        # summation round differently, so L-BFGS-B can stop at a slightly different point of a flat
+        # valley. Both stop once an iteration improves the objective by less than ftol (2.2e-9 for an
+        # objective below 1), so the objectives agree to a few ftol and the curves to well under 0.01 bp.
+        np.testing.assert_allclose(result.fun, expected.fun, rtol=0, atol=1e-8)
+        np.testing.assert_allclose(jit_model.get_nelson_siegel_svensson_curve(result.x),
+                                   self.model.get_nelson_siegel_svensson_curve(expected.x), rtol=0, atol=1e-4)
+        self._check_kernels(self.kernels.nss_curve, self.kernels.nss_error, self.kernels.nss_error_and_gradient)
+
+
+class TestNelsonSiegelBatch(unittest.TestCase):
+    def setUp(self):
+        from controller.nelsonSiegelController import NelsonSiegelController
+        self.controller = NelsonSiegelController()
+        self.controller.df = self.controller.df.iloc[:30]
+
+    def test_parallel_matches_sequential(self):
+        sequential = self.controller.run_batch(workers=1, use_cache=False)
+        parallel = self.controller.run_batch(workers=2, chunks=3, use_cache=False)
+        self.assertEqual(len(parallel), 30)
+        self.assertTrue((parallel['Date'].values == self.controller.df['Date'].values).all())
+        assert_almost_equal(parallel['R²'].values, sequential['R²'].values, decimal=2)
+
+    def test_controllers_use_the_store_in_place(self):
+        from controller.spreadController import SpreadController
+        from controller.cubicSplineController import CubicSplineController
+        store = csvReader.get_yield_store()
+        controller = type(self.controller)()
+        self.assertIs(controller.store, store)
+        self.assertTrue(np.shares_memory(controller.extract_yields(), store.yields))
+        self.assertTrue(np.shares_memory(SpreadController().df_2, store.yields))
+        self.assertIs(CubicSplineController().model.df, store)
+        # Assigning a DataFrame still works, e.g. to fit a subset of the days
+        self.assertEqual(len(self.controller.store), 30)
+
+    def test_missing_tenors_are_skipped(self):
+        full = self.controller.run_batch(workers=1, use_cache=False)
+        df = self.controller.df
+        df.loc[:9, '4 Mo'] = np.nan
+        self.controller.df = df
+        mixed = self.controller.run_batch(workers=1, use_cache=False)
+        self.assertTrue(np.isfinite(mixed.iloc[:, 1:7].values).all())
+        self.assertTrue(np.isfinite(mixed['R²'].values).all())
+        self.assertTrue((mixed['R²'].values[:10] > 0.9).all())
+        # Dropping one bill barely moves the fit
+        assert_almost_equal(mixed['R²'].values, full['R²'].values, decimal=1)
+
+        # The single-day objective and gradient ignore the missing tenor, as a zero weight does
+        model = NelsonSiegelModel(self.controller.df.iloc[0, 1:].to_numpy(dtype=float))
+        weighted = NelsonSiegelModel(np.nan_to_num(model.observed_yields))
+        weighted.nss_weights = weighted.nss_weights * ~np.isnan(model.observed_yields)
+        params = mixed.iloc[0, 1:7].to_numpy(dtype=float)
+        assert_almost_equal(model.nelson_siegel_svensson_error_function(params),
+                            weighted.nelson_siegel_svensson_error_function(params))
+        assert_almost_equal(model.nelson_siegel_svensson_error_gradient(params),
+                            weighted.nelson_siegel_svensson_error_gradient(params))
+
+class TestFitCache(unittest.TestCase):
+    def setUp(self):
+        from models.fitCache import FitCache
+        self.FitCache = FitCache
+        self.cache_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.cache_dir, 'fits.npz')
+        self.yields = csvReader.get_yield_store().yields[0]
+        self.bounds = NelsonSiegelModel.nss_bounds
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_round_trip(self):
+        key = self.FitCache.make_key('2023-01-03', self.yields, 'NSS', self.bounds, {'max_iter': 1000})
+        cache = self.FitCache(self.path)
+        cache.put(key, np.arange(6.0), 0.95, 12, [0.1, 0.2, 0.3], 'quick')
+        cache.save()
+
+        entry = self.FitCache(self.path).get(key)
+        assert_almost_equal(entry['params'], np.arange(6.0))
+        self.assertEqual(entry['iterations'], 12)
+        self.assertEqual(entry['tier'], 'quick')
+
+    def test_key_invalidation(self):
+        key = self.FitCache.make_key('2023-01-03', self.yields, 'NSS', self.bounds, {'max_iter': 1000})
+        self.assertEqual(key, self.FitCache.make_key('2023-01-03', self.yields.copy(), 'NSS', self.bounds, {'max_iter': 1000}))
+        self.assertNotEqual(key, self.FitCache.make_key('2023-01-03', self.yields + 0.01, 'NSS', self.bounds, {'max_iter': 1000}))
+        self.assertNotEqual(key, self.FitCache.make_key('2023-01-03', self.yields, 'NSS', self.bounds[:5] + [(0.1, 0.5)], {'max_iter': 1000}))
+        self.assertNotEqual(key, self.FitCache.make_key('2023-01-03', self.yields, 'NSS', self.bounds, {'max_iter': 50}))
+
+    def test_controller_fits_only_new_days(self):
+        from controller.nelsonSiegelController import NelsonSiegelController
+        controller = NelsonSiegelController()
+        controller.fit_cache = self.FitCache(self.path)
+        full = controller.df.iloc[:12]
+        controller.df = full.iloc[:10]
+        controller.run_batch(workers=1)
+
+        # Only the two appended days are fitted, the rest come from the file
+        import controller.nelsonSiegelController as nss_module
+        from unittest import mock
+        controller.df = full
+        controller.fit_cache = self.FitCache(self.path)
+        with mock.patch.object(nss_module, 'fit_day', wraps=nss_module.fit_day) as fit_day:
+            table = controller.run_batch(workers=1)
+        self.assertEqual(fit_day.call_count, 2)
+        self.assertEqual(len(table), 12)
+        self.assertTrue(np.all(table['R²'] > 0.5))
+
+    def test_budget_exhausted_fits_are_not_cached(self):
+        import controller.nelsonSiegelController as nss_module
+        from unittest import mock
+        controller = nss_module.NelsonSiegelController()
+        controller.fit_cache = self.FitCache(self.path)
+        controller.df = controller.df.iloc[:4]
+        fit_day, calls = nss_module.fit_day, []
+
+        def second_day_runs_out_of_time(*args, **kwargs):
+            result, errors, tier = fit_day(*args, **kwargs)
+            calls.append(result)
+            result['budget_exhausted'] = len(calls) == 2
+            return result, errors, tier
+
+        with mock.patch.object(nss_module, 'fit_day', second_day_runs_out_of_time):
+            controller.run_batch(workers=1)
+
+        # Only the truncated day is refitted by the next run
+        controller.fit_cache = self.FitCache(self.path)
+        with mock.patch.object(nss_module, 'fit_day', wraps=nss_module.fit_day) as fit_day:
+            controller.run_batch(workers=1)
+        self.assertEqual(fit_day.call_count, 1)
+
+    def test_fully_cached_run_starts_no_workers(self):
+        import controller.nelsonSiegelController as nss_module
+        from unittest import mock
+        controller = nss_module.NelsonSiegelController()
+        controller.fit_cache = self.FitCache(self.path)
+        controller.df = controller.df.iloc[:4]
+        first = controller.run_batch(workers=1)
+        with mock.patch.object(nss_module, 'ProcessPoolExecutor') as pool, \
+                mock.patch.object(nss_module.shared_memory, 'SharedMemory') as shm:
+            cached = controller.run_batch(workers=2)
+        pool.assert_not_called()
+        shm.assert_not_called()
+        assert_almost_equal(cached['R²'].values, first['R²'].values)
+
+class TestReportRenderer(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.market = np.linspace(4.0, 5.0, 13)
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_pdf_report_reuses_figure(self):
+        from view.nelsonSiegelView import NSSView
+        from view.reportRenderer import ReportRenderer
+        path = os.path.join(self.output_dir, 'nss.pdf')
+        with ReportRenderer(path, 'pdf') as renderer:
+            view = NSSView(renderer)
+            view.plot_yield_curve_proper_scale(self.market, self.market + 0.01, '2024-01-02', 0.95)
+            first_figure = renderer.figures['nss_curve'][0]
+            view.plot_yield_curve_proper_scale(self.market, self.market - 0.01, '2024-01-03', 0.97)
+            self.assertIs(renderer.figures['nss_curve'][0], first_figure)
+            self.assertEqual(renderer.page_count, 2)
+        self.assertGreater(os.path.getsize(path), 0)
+
+    def test_png_pages(self):
+        from view.nelsonSiegelView import NSSView
+        from view.reportRenderer import render_pages
+        pages = [(self.market, self.market + 0.01, f'2024-01-0{day}', 0.95) for day in (2, 3)]
+        self.assertEqual(render_pages(NSSView, 'plot_yield_curve_proper_scale', pages, self.output_dir, 'png', workers=1), 2)
+        self.assertEqual(sorted(os.listdir(self.output_dir)), ['nss_curve_2024-01-02.png', 'nss_curve_2024-01-03.png'])
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.store = csvReader.get_yield_store()
+        self.history = csvReader.YieldStore(self.store.dates[:-5], self.store.yields[:-5], self.store.tenors)
+
+    def test_updates_match_batch_statistics(self):
+        from controller.streamingController import StreamingController
+        controller = StreamingController(window=20)
+        controller.warm_up(self.history)
+        rows = list(zip(self.store.dates[-6:], self.store.yields[-6:]))
+        records = list(controller.run(rows))
+
+        # The first row is already in the warm-up history and is skipped
+        self.assertEqual(len(records), 5)
+        spreads = self.store.column('5 Yr') - self.store.column('2 Yr')
+        window = spreads[-20:]
+        self.assertAlmostEqual(records[-1]['spread_mean'], np.mean(window))
+        self.assertAlmostEqual(records[-1]['spread_z_score'], (window[-1] - np.mean(window)) / np.std(window))
+        self.assertGreater(records[-1]['r_squared'], 0.8)
+
+    def test_tail_csv(self):
+        rows = list(csvReader.tail_csv('data/2025.csv', follow=False, from_start=True))
+        self.assertEqual(len(rows), 136)
+        self.assertEqual(rows[0][0], np.datetime64('2025-07-18'))
+        assert_almost_equal(rows[0][1], self.store.yields[-1])
+
+class TestRollingStatistics(unittest.TestCase):
+    def setUp(self):
+        from models.spreadMeanCalculator import MeanReversionCalculator
+        self.calculator = MeanReversionCalculator()
+        store = csvReader.get_yield_store()
+        self.spreads = store.column('5 Yr') - store.column('2 Yr')
+
+    def test_online_matches_batch(self):
+        batch = self.calculator.rolling_statistics(self.spreads, windows=(20, 60))
+        online = self.calculator.online_statistics(windows=(20, 60))
+        records = {window: [accumulator.update(spread) for spread in self.spreads] for window, accumulator in online.items()}
+
+        for window in (20, 60):
+            for day in (window - 1, 300, len(self.spreads) - 1):
+                values = self.spreads[day - window + 1:day + 1]
+                record = records[window][day]
+                self.assertAlmostEqual(record['mean'], np.mean(values))
+                self.assertAlmostEqual(record['std'], np.std(values))
+                self.assertEqual(record['min'], np.min(values))
+                self.assertEqual(record['max'], np.max(values))
+                self.assertAlmostEqual(batch[window]['mean'][day], np.mean(values))
+                self.assertAlmostEqual(batch[window]['std'][day], np.std(values))
+                self.assertEqual(batch[window]['max'][day], np.max(values))
+                self.assertAlmostEqual(batch[window]['z_score'][day], record['z_score'])
+            self.assertTrue(np.isnan(batch[window]['mean'][window - 2]))
+
+    def test_long_series_with_a_large_level(self):
+        # A drifting series far from zero, where plain cumulative sums lose the small window variances
+        rng = np.random.default_rng(0)
+        n = 200_000
+        values = 1e6 + np.linspace(0, 1e4, n) + 0.5 * np.cumsum(rng.normal(size=n)) + rng.normal(0, 0.01, n)
+        statistics = self.calculator.rolling_statistics(values, windows=(20, 250), extremes=False)
+        for window in (20, 250):
+            days = np.arange(window - 1, n, 4999)
+            windows = [values[day - window + 1:day + 1] for day in days]
+            assert_almost_equal(statistics[window]['mean'][days] / np.mean(windows, axis=1), 1.0, decimal=12)
+            assert_almost_equal(statistics[window]['std'][days] / np.std(windows, axis=1), 1.0, decimal=6)
+
+    def test_spread_summary(self):
+        two_year = csvReader.get_two_year_yields_from_last_3_months()
+        five_year = csvReader.get_five_year_yields_from_last_3_months()
+        summary = self.calculator.spread_summary(two_year, five_year)
+        self.assertAlmostEqual(summary['mean'], self.calculator.find_mean_spread(two_year, five_year))
+        self.assertAlmostEqual(summary['std'], self.calculator.calculate_spread_std(two_year, five_year))
+        self.assertAlmostEqual(summary['max'], self.calculator.calculate_spread_max(two_year, five_year))
+
+class TestSpreadMatrix(unittest.TestCase):
+    def setUp(self):
+        from models.spreadMatrix import SpreadMatrix
+        self.store = csvReader.get_yield_store()
+        self.matrix = SpreadMatrix(self.store.yields, csvReader.TENORS)
+
+    def test_spreads_match_cube(self):
+        spreads = self.matrix.spreads()
+        self.assertEqual(spreads.shape, (len(self.store), 78))
+        cube = self.matrix.cube()
+        short, long = self.matrix.pair_indices()
+        np.testing.assert_allclose(cube[:, short, long], spreads)
+
+        two_five = self.matrix.spreads([('2 Yr', '5 Yr')])[:, 0]
+        np.testing.assert_allclose(two_five, self.store.column('5 Yr') - self.store.column('2 Yr'))
+        self.assertEqual(self.matrix.pair_labels([('2 Yr', '5 Yr')]), ['5 Yr-2 Yr'])
+
+    def test_rank_matches_rolling_z_scores(self):
+        z_scores = self.matrix.rolling_z_scores(60)
+        ranking = self.matrix.rank(60, top=5)
+        self.assertEqual(len(ranking), 5)
+        labels = self.matrix.pair_labels()
+        for row in ranking:
+            self.assertAlmostEqual(row['z_score'], z_scores[-1, labels.index(row['pair'])])
+        self.assertAlmostEqual(abs(ranking[0]['z_score']), np.nanmax(np.abs(z_scores[-1])))
+
+class TestButterflyScanner(unittest.TestCase):
+    def setUp(self):
+        from models.buttefly import ButterflyScanner
+        self.store = csvReader.get_yield_store()
+        self.maturities = [1/12, 2/12, 3/12, 4/12, 6/12, 1, 2, 3, 5, 7, 10, 20, 30]
+        self.scanner = ButterflyScanner(self.store.yields, csvReader.TENORS, self.maturities)
+
+    def test_fixed_weights_match_single_butterfly(self):
+        spreads = self.scanner.spreads()
+        self.assertEqual(spreads.shape, (len(self.store), 286))
+        column = self.scanner.triple_labels().index('2 Yr/5 Yr/10 Yr')
+        expected = Butterfly(self.maturities).calculate_butterfly_spread(
+            self.store.column('2 Yr'), self.store.column('5 Yr'), self.store.column('10 Yr'))
+        np.testing.assert_allclose(spreads[:, column], expected)
+
+    def test_maturity_weights_are_slope_neutral(self):
+        from models.buttefly import ButterflyScanner
+        linear_curves = 1.5 + 0.1 * np.outer(np.arange(5), self.maturities)
+        scanner = ButterflyScanner(linear_curves, csvReader.TENORS, self.maturities)
+        np.testing.assert_allclose(scanner.spreads('maturity'), 0.0, atol=1e-12)
+
+    def test_duration_weights_are_dv01_neutral(self):
+        triples = [('2 Yr', '5 Yr', '10 Yr'), ('1 Mo', '3 Yr', '30 Yr')]
+        weights = self.scanner.weights('duration', triples)
+        self.assertEqual(weights.shape, (len(self.store), 2, 3))
+        indices = self.scanner.triple_indices(triples)
+        durations = self.scanner.durations()[:, indices]
+        np.testing.assert_allclose((weights * durations).sum(axis=-1), 0.0, atol=1e-12)
+        np.testing.assert_allclose(weights.sum(axis=-1), 0.0, atol=1e-12)
+        # A 10 year par bond at 4% has a modified duration of about 8.2 years
+        assert_almost_equal(self.scanner.durations(np.full((1, 13), 4.0))[0, 10], 8.18, decimal=2)
+
+        spreads = self.scanner.spreads('duration', triples)
+        expected = (self.store.yields[:, indices] * weights).sum(axis=-1)
+        np.testing.assert_allclose(spreads, expected)
+        ranking = self.scanner.rank(60, 'duration', triples, top=2)
+        self.assertEqual(len(ranking), 2)
+        with self.assertRaises(ValueError):
+            self.scanner.weight_matrix('duration', triples)
+
+    def test_regression_weights(self):
+        triple = [('2 Yr', '5 Yr', '10 Yr')]
+        weights = self.scanner.weights('regression', triple)[0]
+        design = np.column_stack([np.ones(len(self.store)), self.store.column('2 Yr'), self.store.column('10 Yr')])
+        coefficients = np.linalg.lstsq(design, self.store.column('5 Yr'), rcond=None)[0]
+        assert_almost_equal(weights, [-2 * coefficients[1], 2.0, -2 * coefficients[2]])
+
+        ranking = self.scanner.rank(60, 'regression', top=3)
+        self.assertEqual(len(ranking), 3)
+        self.assertIn(ranking[0]['belly'], ('cheap', 'rich'))
+
+class TestBatchRegression(unittest.TestCase):
+    def setUp(self):
+        store = csvReader.get_yield_store()
+        self.x = store.yields[:, [6, 10]]
+        self.y = store.column('5 Yr')
+
+    def test_ols_matches_lstsq(self):
+        from models.batchRegression import ols
+        result = ols(self.x, self.y)
+        design = np.column_stack([np.ones(len(self.y)), self.x])
+        coefficients, residual_ss = np.linalg.lstsq(design, self.y, rcond=None)[:2]
+        assert_almost_equal(result['intercept'], coefficients[0])
+        assert_almost_equal(result['coef'], coefficients[1:])
+        assert_almost_equal(result['r_squared'], 1 - residual_ss[0] / np.sum((self.y - self.y.mean()) ** 2))
+        assert_almost_equal(result['residual_std'], np.sqrt(residual_ss[0] / (len(self.y) - 3)))
+
+        hedge = Butterfly([]).multilinear_regression_hedging(self.x, self.y)
+        assert_almost_equal(hedge['coef'], coefficients[1:])
+
+    def test_rolling_matches_batch(self):
+        from models.batchRegression import ols, rolling_ols
+        rolling = rolling_ols(self.x, self.y, 60)
+        self.assertEqual(rolling['coef'].shape, (len(self.y) - 59, 2))
+        windows_x = np.lib.stride_tricks.sliding_window_view(self.x, 60, axis=0).transpose(0, 2, 1)
+        windows_y = np.lib.stride_tricks.sliding_window_view(self.y, 60)
+        batch = ols(windows_x, windows_y)
+        for name in ('coef', 'intercept', 'r_squared', 'residual_std'):
+            assert_almost_equal(rolling[name], batch[name], decimal=8)
+
+    def test_recursive_matches_refits(self):
+        from models.batchRegression import ols, recursive_ols, rolling_ols
+        rolling = recursive_ols(self.x, self.y, window=60)
+        assert_almost_equal(rolling['coef'][59:], rolling_ols(self.x, self.y, 60)['coef'], decimal=8)
+
+        expanding = recursive_ols(self.x, self.y)
+        for day in (10, 300, len(self.y) - 1):
+            assert_almost_equal(expanding['coef'][day], ols(self.x[:day + 1], self.y[:day + 1])['coef'], decimal=8)
+            # Out-of-sample residual uses the previous day's coefficients
+            previous = ols(self.x[:day], self.y[:day])
+            assert_almost_equal(expanding['residuals'][day],
+                                self.y[day] - previous['intercept'] - self.x[day] @ previous['coef'], decimal=8)
+        self.assertTrue(np.isnan(expanding['residuals'][:4]).all())
+
+        hedge = Butterfly([]).rolling_hedge_ratios(self.x, self.y, window=60)
+        self.assertEqual(hedge['z_scores'].shape, self.y.shape)
+        self.assertFalse(np.isnan(hedge['z_scores'][-1]))
+
+class TestSyntheticCurves(unittest.TestCase):
+    def test_generate(self):
+        from models.syntheticCurves import SyntheticCurveGenerator
+        dates, yields, params = SyntheticCurveGenerator(seed=1).generate(days=30)
+        self.assertEqual(yields.shape, (30, 13))
+        self.assertTrue(np.all(np.diff(dates) > np.timedelta64(0)))
+        self.assertTrue(np.is_busday(dates.astype('datetime64[D]')).all())
+        for column, (lower, upper) in enumerate(NelsonSiegelModel(yields[0]).nss_bounds):
+            self.assertTrue(np.all((params[:, column] >= lower) & (params[:, column] <= upper)))
+
+        dates, yields, _ = SyntheticCurveGenerator(seed=1).generate(days=2, snapshots_per_day=4)
+        self.assertEqual(len(dates), 8)
+        self.assertEqual(len(np.unique(dates.astype('datetime64[D]'))), 2)
+
+    def test_benchmark_compare(self):
+        import benchmark
+        results = benchmark.run_suite('intraday', ['spread_statistics'])
+        record = results['spread_statistics']
+        self.assertEqual(record['curves'], 21 * 78)
+        slower = {'spread_statistics': dict(record, seconds=record['seconds'] * 2)}
+        self.assertEqual(benchmark.compare(results, slower), [])
+        self.assertEqual([r[:2] for r in benchmark.compare(slower, results)], [('spread_statistics', 'seconds')])
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_batch_records(self):
+        from instrumentation import Instrumentation, JsonlSink, MemorySink, PrometheusSink
+        from controller.nelsonSiegelController import NelsonSiegelController
+        memory = MemorySink()
+        jsonl_path = os.path.join(self.directory, 'fits.jsonl')
+        prometheus_path = os.path.join(self.directory, 'fits.prom')
+        instrumentation = Instrumentation([memory, JsonlSink(jsonl_path), PrometheusSink(prometheus_path)], profile=True)
+
+        controller = NelsonSiegelController(instrumentation=instrumentation)
+        controller.df = controller.df.iloc[:4]
+        table = controller.run_batch(workers=1, use_cache=False)
+        instrumentation.close()
+
+        fits = [record for record in memory.records if record['type'] == 'fit']
+        self.assertEqual([record['date'] for record in fits], [str(date)[:10] for date in table['Date']])
+        self.assertEqual([record['tier'] for record in fits], list(table['Tier']))
+        self.assertEqual([record['warm_start'] for record in fits], [False, True, True, True])
+        self.assertTrue(all(record['nfev'] >= record['iterations'] > 0 for record in fits))
+        self.assertEqual({record['stage'] for record in memory.records if record['type'] == 'stage'},
+                         {'load', 'fit', 'score'})
+
+        with open(jsonl_path) as f:
+            self.assertEqual(len(f.readlines()), len(memory.records))
+        with open(prometheus_path) as f:
+            metrics = f.read()
+        self.assertIn('curve_fits_total{model="NSS",tier=', metrics)
+        self.assertIn('stage_seconds_total{stage="fit"}', metrics)
+        self.assertIn('fit_day', instrumentation.profile_report('fit'))
+
+class TestCubicSplineSurface(unittest.TestCase):
+    def test_surface_matches_daily_splines(self):
+        from models.cubicSpline import CubicSplineAnalyzer
+        df = csvReader.load_my_data()
+        analyzer = CubicSplineAnalyzer(df)
+        grid = np.array([0.05, 0.5, 4.0, 12.5, 30.0, 32.0])
+
+        for bc_type in ('natural', 'clamped'):
+            surface = analyzer.evaluate_surface(grid, bc_type=bc_type)
+            self.assertEqual(surface.shape, (len(df), len(grid)))
+            for day in (0, 300, len(df) - 1):
+                assert_almost_equal(surface[day], analyzer.calculate_spline(df.iloc[day, 1:].values.astype(float), bc_type)(grid))
+        self.assertEqual(set(analyzer.coefficients), {'natural', 'clamped'})
+
+        subset = analyzer.evaluate_surface(grid, dates=df['Date'].iloc[[3, 7]])
+        assert_almost_equal(subset, analyzer.evaluate_surface(grid)[[3, 7]])
+        with self.assertRaises(ValueError):
+            analyzer.evaluate_surface(grid, dates=[np.datetime64('1990-01-01')])
+
+class TestMaskedFitting(unittest.TestCase):
+    def setUp(self):
+        # Mixed coverage: no 4 month bill for 200 days, no 2 month bill for 100, one day without quotes
+        self.yields = csvReader.get_yield_store().yields[:300].copy()
+        self.yields[:200, 3] = np.nan
+        self.yields[:100, 1] = np.nan
+        self.yields[5] = np.nan
+        self.model = NelsonSiegelModel(self.yields[-1])
+
+    def test_spline_uses_observed_tenors(self):
+        from models.cubicSpline import CubicSplineAnalyzer
+        analyzer = CubicSplineAnalyzer(None)
+        grid = np.array([0.05, 0.2, 0.3, 4.0, 30.0])
+        surface = analyzer.evaluate_surface(grid, yields=self.yields)
+        for day in (0, 150, 250):
+            observed = ~np.isnan(self.yields[day])
+            expected = CubicSpline(analyzer.maturities[observed], self.yields[day, observed], bc_type='natural')(grid)
+            assert_almost_equal(surface[day], expected)
+            # The single-day spline skips the same NaN tenors
+            assert_almost_equal(analyzer.calculate_spline(self.yields[day])(grid), expected)
+        self.assertTrue(np.isnan(surface[5]).all())
+        with self.assertRaises(ValueError):
+            analyzer.calculate_spline(self.yields[5])
+
+        # A mask drops a quoted tenor as if it were missing
+        mask = np.ones_like(self.yields, dtype=bool)
+        mask[:, 3] = False
+        assert_almost_equal(analyzer.evaluate_surface(grid, yields=self.yields, mask=mask)[150], surface[150])
+
+    def test_nss_and_ns_fit_observed_tenors(self):
+        params, errors = self.model.fit_nelson_siegel_svensson_separable(self.yields)
+        self.assertTrue(np.isnan(params[5]).all())
+        self.assertTrue(np.isfinite(errors[[0, 150, 250]]).all())
+
+        # Batched masked fits match fitting each day alone, and masked values are ignored
+        for day in (0, 150):
+            single, _ = self.model.fit_nelson_siegel_svensson_separable(self.yields[day])
+            assert_almost_equal(params[day], single[0])
+        filled = np.nan_to_num(self.yields, nan=9.0)
+        masked, _ = self.model.fit_nelson_siegel_svensson_separable(filled, mask=~np.isnan(self.yields))
+        assert_almost_equal(masked[[0, 150, 250]], params[[0, 150, 250]])
+
+        true_params = np.array([[4.0, -1.0, 1.5, 1.2], [3.5, 0.5, -2.0, 2.0]])
+        curves = self.model.get_nelson_siegel_curve(true_params)
+        curves[0, [1, 3]] = np.nan
+        ns_params, ns_errors = self.model.fit_nelson_siegel_separable(curves, grid_size=200)
+        assert_almost_equal(ns_params, true_params, decimal=2)
+        self.assertLess(ns_errors.max(), 1e-4)
+
+
+class TestCurveSurface(unittest.TestCase):
+    def setUp(self):
+        store = csvReader.get_yield_store()
+        self.dates, self.yields = store.dates, store.yields
+        self.model = NelsonSiegelModel(None)
+
+    def test_parametric_surfaces(self):
+        from models.curveSurface import CurveSurface
+        params, _ = self.model.fit_nelson_siegel_svensson_separable(self.yields)
+        table = pd.DataFrame(params, columns=['β0', 'β1', 'β2', 'β3', 'λ0', 'λ1'])
+        table.insert(0, 'Date', self.dates)
+        surface = CurveSurface.from_table(table)
+
+        monthly = np.arange(1, 241) / 12
+        grid = surface.evaluate(monthly)
+        self.assertEqual(grid.shape, (len(self.dates), 240))
+        assert_almost_equal(grid[100, [11, 119]], self.model.nelson_siegel_svensson_batch(params[100], [1, 10])[0])
+        assert_almost_equal(surface.evaluate(monthly, dates=self.dates[[3, 7]]), grid[[3, 7]])
+        assert_almost_equal(surface.evaluate_at(self.dates[5], [1, 10, 20]),
+                            self.model.get_nelson_siegel_svensson_curve(params[5])[[5, 10, 11]])
+
+        # Hot grids are served from the cache and cannot be modified by a caller
+        self.assertIs(surface.evaluate(monthly), grid)
+        self.assertFalse(grid.flags.writeable)
+        with self.assertRaises(ValueError):
+            surface.evaluate(monthly, dates=['1990-01-02'])
+
+        ns_params, _ = self.model.fit_nelson_siegel_separable(self.yields)
+        ns_surface = CurveSurface(self.dates, 'ns', ns_params)
+        assert_almost_equal(ns_surface.evaluate([2.0], rows=[0])[0], self.model.nelson_siegel_batch(ns_params[0], [2.0])[0])
+        with self.assertRaises(ValueError):
+            CurveSurface(self.dates, 'ns', params)
+
+    def test_spline_surface(self):
+        from models.cubicSpline import CubicSplineAnalyzer
+        from models.curveSurface import CurveSurface
+        surface = CurveSurface(self.dates, 'spline', yields=self.yields, bc_type='clamped')
+        grid = np.array([0.5, 4.0, 12.5])
+        assert_almost_equal(surface.evaluate(grid), CubicSplineAnalyzer(None).evaluate_surface(grid, bc_type='clamped', yields=self.yields))
+
+
+class TestQueryService(unittest.TestCase):
+    def setUp(self):
+        from controller.queryController import QueryController, QueryServer
+        from instrumentation import MemorySink, Instrumentation
+        from models.fitCache import FitCache
+        self.directory = tempfile.mkdtemp()
+        self.sink = MemorySink()
+        store = csvReader.get_yield_store().window('2025-06-01', None)
+        controller = QueryController(store, Instrumentation([self.sink]), FitCache(os.path.join(self.directory, 'fits.npz')))
+        self.server = QueryServer(controller, cache_size=8)
+        self.store = store
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def ask(self, queries):
+        from controller.queryController import send_queries
+
+        async def scenario():
+            path = os.path.join(self.directory, 'query.sock')
+            listener = await self.server.start(path=path)
+            async with listener:
+                return await send_queries(queries, path=path)
+        return asyncio.run(scenario())
+
+    def test_queries_are_answered_coalesced_and_cached(self):
+        curve = {'type': 'curve', 'model': 'nss', 'dates': ['2025-06-02', '2025-07-18'], 'maturities': [7.5, 15]}
+        spread = {'type': 'spread', 'tenors': ['2 Yr', '5 Yr'], 'window': 20}
+        responses = self.ask([curve, curve, spread, {'type': 'curve', 'dates': ['2025-06-01']}, {'type': 'nope'}])
+
+        params = self.server.controller.nss_params()
+        expected = NelsonSiegelModel(None).nelson_siegel_svensson_batch(params[[0, -1]], [7.5, 15])
+        assert_almost_equal(np.array(responses[0]['result']['yields']), expected)
+        self.assertEqual(responses[0]['result'], responses[1]['result'])
+        self.assertEqual(responses[0]['result']['dates'], ['2025-06-02', '2025-07-18'])
+
+        from models.spreadMatrix import SpreadMatrix
+        z_scores = SpreadMatrix(self.store.yields, csvReader.TENORS).rolling_z_scores(20, [('2 Yr', '5 Yr')])
+        self.assertAlmostEqual(responses[2]['result']['z_score'][0], z_scores[-1, 0])
+        self.assertIn('2025-06-01', responses[3]['error'])
+        self.assertIn('error', responses[4])
+
+        # The identical curve query was computed once, and every day was fitted once
+        stats = self.server.stats()
+        self.assertEqual(stats['hits'] + stats['coalesced'], 1)
+        self.assertEqual(len([record for record in self.sink.records if record['type'] == 'fit']), len(self.store))
+
+        batch = self.ask([{'type': 'batch', 'queries': [curve, {'type': 'butterfly', 'curve': 'nss'}, {'type': 'scan', 'top': 3}]}])
+        self.assertEqual(batch[0]['result'][0], responses[0]['result'])
+        self.assertEqual(len(batch[0]['result'][2]), 3)
+        self.assertEqual(len([record for record in self.sink.records if record['type'] == 'fit']), len(self.store))
+
+
 class TestButterflyHedging(unittest.TestCase):
 
     def setUp(self):
@@ -1,10 +1,12 @@
-import matplotlib.pyplot as plt
+from view.reportRenderer import ReportRenderer
 
 class ButterflyView:
-    def __init__(self, df2, df5, df10):
+    def __init__(self, df2, df5, df10, renderer=None):
         self.df2 = df2
         self.df5 = df5
         self.df10 = df10
+        # Interactive windows unless a file-writing renderer is given
+        self.renderer = renderer or ReportRenderer()
 
     def plot_butterfly_spreads(self, butterfly_spreads_market, butterfly_spreads_nss, r_squared_values, dates):
         """
@@ -15,20 +17,22 @@ class ButterflyView:
         :param r_squared_values: List of R² values for NSS curve fit.
         :param dates: List of dates corresponding to the spreads.
         """
-        plt.figure(figsize=(14, 8))
+        fig, ax = self.renderer.figure('butterfly_spreads', figsize=(14, 8))
         
         # Plot market and NSS butterfly spreads
-        plt.plot(dates, butterfly_spreads_market, 'ro-', label='Market Butterfly Spread', markersize=6)
-        plt.plot(dates, butterfly_spreads_nss, 'go-', label='NSS Butterfly Spread', markersize=6)
+        ax.plot(dates, butterfly_spreads_market, 'ro-', label='Market Butterfly Spread', markersize=6)
+        ax.plot(dates, butterfly_spreads_nss, 'go-', label='NSS Butterfly Spread', markersize=6)
         
         
-        plt.title('Butterfly Spreads Comparison')
-        plt.xlabel('Date')
-        plt.ylabel('Butterfly Spread (%)')
-        plt.xticks(rotation=45)
-        plt.grid(True, alpha=0.3)
-        plt.legend()
-        plt.tight_layout()
+        ax.set_title('Butterfly Spreads Comparison')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Butterfly Spread (%)')
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+        self.renderer.tight_layout(fig)
+        # Shown together with the first table page
+        self.renderer.save(fig, 'butterfly_spreads')
 
         # Create a table with the spreads and R² values and compared spread values
         table_data = []
@@ -50,8 +54,8 @@ class ButterflyView:
             end_idx = min(start_idx + rows_per_page, total_rows)
             page_data = table_data[start_idx:end_idx]
             
-            # Create figure for this page
-            fig, ax = plt.subplots(figsize=(10, 4))
+            # Create figure for this page (reused between pages when writing files)
+            fig, ax = self.renderer.figure('butterfly_table', figsize=(10, 4))
             ax.axis('tight')
             ax.axis('off')
             
@@ -63,24 +67,24 @@ class ButterflyView:
             table.set_fontsize(8)
             table.scale(1, 1.2)
             
-            plt.title(f'Butterfly Spreads Table - Page {page + 1} of {total_pages}')
-            plt.tight_layout()
-            plt.show()
+            ax.set_title(f'Butterfly Spreads Table - Page {page + 1} of {total_pages}')
+            self.renderer.tight_layout(fig)
+            self.renderer.show(fig, f'butterfly_table_{page + 1:03d}')
 
     def plot_butterfly_z_scores(self, mean_reversion_spread, std_reversion_spread, difference):
         """
         Using a historgram to plot the z-scores of the difference in butterfly spreads.
         """
 
-        plt.figure(figsize=(12, 6))
+        fig, ax = self.renderer.figure('butterfly_z_scores', figsize=(12, 6))
         z_scores = (difference - mean_reversion_spread) / std_reversion_spread
         
-        plt.hist(z_scores, bins=30, color='blue', alpha=0.7, edgecolor='black')
-        plt.axvline(0, color='red', linestyle='dashed', linewidth=1)
+        ax.hist(z_scores, bins=30, color='blue', alpha=0.7, edgecolor='black')
+        ax.axvline(0, color='red', linestyle='dashed', linewidth=1)
         
-        plt.title('Z-Scores of Butterfly Spread Differences')
-        plt.xlabel('Z-Score')
-        plt.ylabel('Frequency')
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.show()
\ No newline at end of file
+        ax.set_title('Z-Scores of Butterfly Spread Differences')
+        ax.set_xlabel('Z-Score')
+        ax.set_ylabel('Frequency')
+        ax.grid(True, alpha=0.3)
+        self.renderer.tight_layout(fig)
+        self.renderer.show(fig, 'butterfly_z_scores')
\ No newline at end of file
@@ -1,8 +1,9 @@
-import matplotlib.pyplot as plt
+from view.reportRenderer import ReportRenderer
 
 class CubicSplineView:
-    def __init__(self):
-        pass
+    def __init__(self, renderer=None):
+        # Interactive windows unless a file-writing renderer is given
+        self.renderer = renderer or ReportRenderer()
 
     def plot_yield_curve(self, maturities, yields, smooth_maturities, smooth_yields, date):
         """
@@ -14,18 +15,18 @@ class CubicSplineView:
         :param smooth_yields: Smooth yield values from cubic spline.
         :param date: Date for which the yield curve is plotted.
         """
-        plt.figure(figsize=(12, 6))
+        fig, ax = self.renderer.figure('cubic_spline', figsize=(12, 6))
         
         # Plot original data points
-        plt.plot(maturities, yields, 'ro', markersize=8, label='Market Data', zorder=3)
+        ax.plot(maturities, yields, 'ro', markersize=8, label='Market Data', zorder=3)
         
         # Plot smooth cubic spline curve
-        plt.plot(smooth_maturities, smooth_yields, 'b-', linewidth=2, label='Cubic Spline', zorder=2)
+        ax.plot(smooth_maturities, smooth_yields, 'b-', linewidth=2, label='Cubic Spline', zorder=2)
 
-        plt.xlabel('Maturity (Years)')
-        plt.ylabel('Yield (%)')
-        plt.title(f'Treasury Yield Curve - {date}')
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.show()
\ No newline at end of file
+        ax.set_xlabel('Maturity (Years)')
+        ax.set_ylabel('Yield (%)')
+        ax.set_title(f'Treasury Yield Curve - {date}')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+        self.renderer.tight_layout(fig)
+        self.renderer.show(fig, f'cubic_spline_{str(date)[:10]}')
\ No newline at end of file
@@ -1,14 +1,19 @@
 import matplotlib.pyplot as plt
 
+from view.reportRenderer import ReportRenderer
+
 class NSSView:
+    def __init__(self, renderer=None):
+        # Interactive windows unless a file-writing renderer is given
+        self.renderer = renderer or ReportRenderer()
 
     def plot_yield_curve_proper_scale(self, market_curve, svensson_curve, date, nss_R_squared):
         maturities = [1/12, 2/12, 3/12, 4/12, 6/12, 1, 2, 3, 5, 7, 10, 20, 30]
         maturity_labels = ['1M', '2M', '3M', '4M', '6M', '1Y', '2Y', '3Y', '5Y', '7Y', '10Y', '20Y', '30Y']
         
         # Create figure with subplots - compact layout
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8), 
-                                       gridspec_kw={'height_ratios': [2.5, 1]})
+        fig, (ax1, ax2) = self.renderer.figure('nss_curve', nrows=2, ncols=1, figsize=(12, 8),
+                                               gridspec_kw={'height_ratios': [2.5, 1]})
         
         # Plot the curves
         ax1.plot(maturities, svensson_curve, 'green', linewidth=2, markersize=6, label='NSS Model')
@@ -70,6 +75,6 @@ class NSSView:
             elif r_squared < 0.5:
                 table_obj[(i+1, 4)].set_facecolor('#FFB6C1')  # Light red
 
-        plt.subplots_adjust(hspace=0.1)  # Minimize space between subplots
-        plt.tight_layout()
-        plt.show()
\ No newline at end of file
+        fig.subplots_adjust(hspace=0.1)  # Minimize space between subplots
+        self.renderer.tight_layout(fig)
+        self.renderer.show(fig, f'nss_curve_{str(date)[:10]}')
\ No newline at end of file
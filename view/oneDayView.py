@@ -1,6 +1,9 @@
-import matplotlib.pyplot as plt
+from view.reportRenderer import ReportRenderer
 
 class OneDayView():
+    def __init__(self, renderer=None):
+        # Interactive windows unless a file-writing renderer is given
+        self.renderer = renderer or ReportRenderer()
 
     def plot_yield_curve_proper_scale(self, curve):
         """
@@ -13,22 +16,22 @@ class OneDayView():
         :param tenures: The tenures corresponding to the yield curve.
         """
         maturities = [1/12, 2/12, 3/12, 4/12, 6/12, 1, 2, 3, 5, 7, 10, 20, 30]  # Tenures in years
-        plt.figure(figsize=(12, 6))
+        fig, ax = self.renderer.figure('one_day', figsize=(12, 6))
 
         # Use actual time values as x-coordinates
-        plt.plot(maturities, curve, 'bo-', linewidth=2, markersize=6)
+        ax.plot(maturities, curve, 'bo-', linewidth=2, markersize=6)
 
         # Set up x-axis with proper labels generated from tenures
         labels = ['1M', '2M', '3M', '4M', '6M', '1Y', '2Y', '3Y', '5Y', '7Y', '10Y', '20Y', '30Y']
         # Ensure labels and maturities have the same length
-        plt.xticks(maturities, labels[:len(maturities)], rotation=45)
-
-        plt.xlabel('Maturity')
-        plt.ylabel('Yield (%)')
-        plt.title('Treasury Yield Curve')
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.show()
+        ax.set_xticks(maturities, labels[:len(maturities)], rotation=45)
+
+        ax.set_xlabel('Maturity')
+        ax.set_ylabel('Yield (%)')
+        ax.set_title('Treasury Yield Curve')
+        ax.grid(True, alpha=0.3)
+        self.renderer.tight_layout(fig)
+        self.renderer.show(fig, 'one_day')
 
 
 
@@ -0,0 +1,167 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+
+
+class ReportRenderer:
+    """
+    Decides what happens to a finished figure.
+
+    With no output the figure is shown interactively, as the views always did. With an
+    output the Agg backend is used and figures are written to disk instead: one PNG/SVG
+    file per figure in the output directory, or every figure as a page of one PDF file.
+    In file mode figures are reused between pages instead of being allocated each time.
+    """
+
+    def __init__(self, output=None, fmt='png'):
+        """
+        :param output: None for interactive windows, a directory for 'png'/'svg', or a file path for 'pdf'.
+        :param fmt: 'png', 'svg' or 'pdf'.
+        """
+        if fmt not in ('png', 'svg', 'pdf'):
+            raise ValueError(f"Unsupported report format: {fmt}")
+        self.output = output
+        self.fmt = fmt
+        self.figures = {}
+        self.pdf = None
+        self.page_count = 0
+
+        if self.headless:
+            # Non-interactive backend: no windows, safe on a server
+            plt.switch_backend('Agg')
+            if fmt == 'pdf':
+                os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+                self.pdf = PdfPages(output)
+            else:
+                os.makedirs(output, exist_ok=True)
+
+    @property
+    def headless(self):
+        return self.output is not None
+
+    def figure(self, key, **subplot_kwargs):
+        """
+        Return (fig, axes) for a kind of page.
+
+        In file mode the figure created for `key` is kept and its axes are cleared for the next
+        page; interactive windows always get a new figure.
+
+        :param key: Name of the page layout, e.g. 'nss_curve'.
+        :param subplot_kwargs: Arguments for plt.subplots.
+        """
+        if self.headless and key in self.figures:
+            fig, axes = self.figures[key]
+            for ax in fig.axes:
+                ax.cla()
+            return fig, axes
+
+        fig, axes = plt.subplots(**subplot_kwargs)
+        if self.headless:
+            self.figures[key] = (fig, axes)
+        return fig, axes
+
+    def tight_layout(self, fig):
+        """
+        Apply tight_layout, only once per reused figure in file mode since every page has the same layout.
+        """
+        if self.headless and getattr(fig, '_report_laid_out', False):
+            return
+        fig.tight_layout()
+        fig._report_laid_out = self.headless
+
+    def save(self, fig=None, name='figure'):
+        """
+        Write a finished figure in file mode. Interactively the figure stays open and is
+        displayed by the next show(), as plt.show() displays every open figure.
+
+        :param fig: The figure, defaults to the current one.
+        :param name: File name (without extension) when writing PNG/SVG files.
+        """
+        fig = fig or plt.gcf()
+        if not self.headless:
+            return
+        self.page_count += 1
+
+        if self.pdf is not None:
+            self.pdf.savefig(fig)
+        else:
+            safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', str(name))
+            fig.savefig(os.path.join(self.output, f"{safe_name}.{self.fmt}"), format=self.fmt)
+
+        # One-off figures are closed straight away; reusable ones stay open for the next page
+        if all(fig is not cached for cached, _ in self.figures.values()):
+            plt.close(fig)
+
+    def show(self, fig=None, name='figure'):
+        """
+        Display or save a finished figure.
+
+        :param fig: The figure, defaults to the current one.
+        :param name: File name (without extension) when writing PNG/SVG files.
+        """
+        if not self.headless:
+            self.page_count += 1
+            plt.show()
+            return
+        self.save(fig, name)
+
+    def close(self):
+        """
+        Finish the report and release every figure.
+        """
+        if self.pdf is not None:
+            self.pdf.close()
+            self.pdf = None
+        for fig, _ in self.figures.values():
+            plt.close(fig)
+        self.figures = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _render_page_chunk(view_class, output, fmt, method, pages):
+    """
+    Worker: render a list of pages with a fresh view writing to its own files.
+    """
+    renderer = ReportRenderer(output, fmt)
+    view = view_class(renderer=renderer)
+    try:
+        for args in pages:
+            getattr(view, method)(*args)
+    finally:
+        renderer.close()
+    return renderer.page_count
+
+
+def render_pages(view_class, method, pages, output, fmt='png', workers=None):
+    """
+    Render many pages of one view method, in parallel for PNG/SVG output.
+
+    A multi-page PDF has a single writer, so PDF reports are rendered in this process
+    (still reusing one figure for every page).
+
+    :param view_class: View class whose constructor accepts renderer=.
+    :param method: Name of the view method that draws one page.
+    :param pages: List of argument tuples, one per page.
+    :param output: Output directory (PNG/SVG) or PDF file path.
+    :param fmt: 'png', 'svg' or 'pdf'.
+    :param workers: Number of worker processes for PNG/SVG, defaults to the CPU count.
+    :return: Number of pages written.
+    """
+    workers = workers or os.cpu_count() or 1
+    if fmt == 'pdf' or workers == 1 or len(pages) < 2:
+        return _render_page_chunk(view_class, output, fmt, method, pages)
+
+    chunk_size = -(-len(pages) // workers)
+    chunks = [pages[start:start + chunk_size] for start in range(0, len(pages), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        counts = executor.map(_render_page_chunk, [view_class] * len(chunks), [output] * len(chunks),
+                              [fmt] * len(chunks), [method] * len(chunks), chunks)
+        return sum(counts)
@@ -1,8 +1,9 @@
-import matplotlib.pyplot as plt
+from view.reportRenderer import ReportRenderer
 
 class SpreadView:
-    def __init__(self):
-        pass
+    def __init__(self, renderer=None):
+        # Interactive windows unless a file-writing renderer is given
+        self.renderer = renderer or ReportRenderer()
 
     def plot_two_year_five_year_yields(self, two_year_yields, five_year_yields, dates):
         """
@@ -11,17 +12,19 @@ class SpreadView:
         :param two_year_yields: A numpy array of 2-year yields.
         :param five_year_yields: A numpy array of 5-year yields.
         """
-        plt.figure(figsize=(12, 6))
-        plt.plot(dates, two_year_yields, label='2-Year Yield', color='blue', marker='o')
-        plt.plot(dates, five_year_yields, label='5-Year Yield', color='orange', marker='o')
+        fig, ax = self.renderer.figure('two_five_yields', figsize=(12, 6))
+        ax.plot(dates, two_year_yields, label='2-Year Yield', color='blue', marker='o')
+        ax.plot(dates, five_year_yields, label='5-Year Yield', color='orange', marker='o')
 
-        plt.xlabel('Date')
-        plt.ylabel('Yield (%)')
-        plt.title('2-Year and 5-Year Treasury Yields Over Time')
-        plt.xticks(rotation=45)
-        plt.grid(True)
-        plt.legend()
-        plt.tight_layout()
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Yield (%)')
+        ax.set_title('2-Year and 5-Year Treasury Yields Over Time')
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.grid(True)
+        ax.legend()
+        self.renderer.tight_layout(fig)
+        # Shown together with the first table page
+        self.renderer.save(fig, 'two_five_yields')
 
         #create a table with the yields and the spreads (5yr - 2yr yields)
         spreads = five_year_yields - two_year_yields
@@ -44,8 +47,8 @@ class SpreadView:
             end_idx = min(start_idx + rows_per_page, total_rows)
             page_data = table_data[start_idx:end_idx]
             
-            # Create figure for this page
-            fig, ax = plt.subplots(figsize=(8, 4))
+            # Create figure for this page (reused between pages when writing files)
+            fig, ax = self.renderer.figure('two_five_table', figsize=(8, 4))
             ax.axis('tight')
             ax.axis('off')
             
@@ -58,9 +61,9 @@ class SpreadView:
             table.scale(1, 1.2)
             
             # Add page information to title
-            plt.title(f'2-Year and 5-Year Yields with Spreads - Page {page + 1} of {total_pages}')
-            plt.tight_layout()
-            plt.show()
+            ax.set_title(f'2-Year and 5-Year Yields with Spreads - Page {page + 1} of {total_pages}')
+            self.renderer.tight_layout(fig)
+            self.renderer.show(fig, f'two_five_table_{page + 1:03d}')
 
     def plot_spread(self, spreads, dates):
         """
@@ -71,16 +74,16 @@ class SpreadView:
         :param five_year_yields: A numpy array of 5-year yields.
         :param dates: Dates corresponding to the yields.
         """
-        plt.figure(figsize=(12, 6))
-        plt.plot(dates, spreads, label='Spread', color='green', marker='o')
-        plt.xlabel('Date')
-        plt.ylabel('Spread (bps)')
-        plt.title('Spreads Between 2-Year and 5-Year Yields Over Time')
-        plt.xticks(rotation=45)
-        plt.grid(True)
-        plt.legend()
-        plt.tight_layout()
-        plt.show()
+        fig, ax = self.renderer.figure('spread', figsize=(12, 6))
+        ax.plot(dates, spreads, label='Spread', color='green', marker='o')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Spread (bps)')
+        ax.set_title('Spreads Between 2-Year and 5-Year Yields Over Time')
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.grid(True)
+        ax.legend()
+        self.renderer.tight_layout(fig)
+        self.renderer.show(fig, 'spread')
 
     def plot_spread_histogram(self, spreads, mean_spread, std_spread):
         """
@@ -90,33 +93,33 @@ class SpreadView:
         :param mean_spread: Mean of the spreads
         :param std_spread: Standard deviation of the spreads
         """
-        plt.figure(figsize=(10, 6))
+        fig, ax = self.renderer.figure('spread_histogram', figsize=(10, 6))
         
         # Create histogram
-        n, bins, patches = plt.hist(spreads, bins=20, alpha=0.7, color='lightblue', 
+        n, bins, patches = ax.hist(spreads, bins=20, alpha=0.7, color='lightblue', 
                                    edgecolor='black', density=True)
         
         # Add vertical lines for mean and std deviation bands
-        plt.axvline(mean_spread, color='red', linestyle='--', linewidth=2, 
+        ax.axvline(mean_spread, color='red', linestyle='--', linewidth=2, 
                    label=f'Mean: {mean_spread:.3f}%')
-        plt.axvline(mean_spread + std_spread, color='orange', linestyle=':', linewidth=2,
+        ax.axvline(mean_spread + std_spread, color='orange', linestyle=':', linewidth=2,
                     label=f'Mean + 1σ: {mean_spread + std_spread:.3f}%')
-        plt.axvline(mean_spread - std_spread, color='orange', linestyle=':', linewidth=2,
+        ax.axvline(mean_spread - std_spread, color='orange', linestyle=':', linewidth=2,
                     label=f'Mean - 1σ: {mean_spread - std_spread:.3f}%')
         
-        plt.xlabel('Spread (2Yx5Y) %')
-        plt.ylabel('Density')
-        plt.title('Distribution of 2Yx5Y Spreads')
-        plt.grid(True, alpha=0.3)
-        plt.legend()
+        ax.set_xlabel('Spread (2Yx5Y) %')
+        ax.set_ylabel('Density')
+        ax.set_title('Distribution of 2Yx5Y Spreads')
+        ax.grid(True, alpha=0.3)
+        ax.legend()
         
         # Add text box with statistics
         stats_text = f'Mean: {mean_spread:.3f}%\nStd Dev: {std_spread:.3f}%\nCount: {len(spreads)} days'
-        plt.text(0.02, 0.98, stats_text, transform=plt.gca().transAxes, 
+        ax.text(0.02, 0.98, stats_text, transform=ax.transAxes, 
                 verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
         
-        plt.tight_layout()
-        plt.show()
+        self.renderer.tight_layout(fig)
+        self.renderer.show(fig, 'spread_histogram')
 
     def plot_z_scores(self, z_scores, dates):
         """
@@ -125,24 +128,25 @@ class SpreadView:
         :param z_scores: Array of Z-scores.
         :param dates: Dates corresponding to the Z-scores.
         """
-        plt.figure(figsize=(12, 6))
+        fig, ax = self.renderer.figure('z_score_histogram', figsize=(12, 6))
         # Create histogram of Z-scores
-        plt.hist(z_scores, bins=20, alpha=0.7, color='lightblue', edgecolor='black', density=True)
-        plt.xlabel('Z-Score')
-        plt.ylabel('Density')
-        plt.title('Z-Scores of Spreads Over Time')
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
+        ax.hist(z_scores, bins=20, alpha=0.7, color='lightblue', edgecolor='black', density=True)
+        ax.set_xlabel('Z-Score')
+        ax.set_ylabel('Density')
+        ax.set_title('Z-Scores of Spreads Over Time')
+        ax.grid(True, alpha=0.3)
+        self.renderer.tight_layout(fig)
+        self.renderer.save(fig, 'z_score_histogram')
 
         #plot the Z-scores over time
-        plt.figure(figsize=(12, 6))
-        plt.plot(dates, z_scores, label='Z-Score', color='purple', marker='o')
-        plt.xlabel('Date')
-        plt.ylabel('Z-Score')
-        plt.title('Z-Scores of Spreads Over Time')
-        plt.xticks(rotation=45)
-        plt.grid(True)
-        plt.legend()
-        plt.tight_layout()
+        fig, ax = self.renderer.figure('z_scores', figsize=(12, 6))
+        ax.plot(dates, z_scores, label='Z-Score', color='purple', marker='o')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Z-Score')
+        ax.set_title('Z-Scores of Spreads Over Time')
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.grid(True)
+        ax.legend()
+        self.renderer.tight_layout(fig)
     
-        plt.show()
\ No newline at end of file
+        self.renderer.show(fig, 'z_scores')
\ No newline at end of file